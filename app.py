@@ -1,21 +1,173 @@
 import os
+import time
+import uuid
+from typing import Optional
 import streamlit as st
-from functions import (
-    client,
-    get_workload_distribution,
-    get_project_workflow,
-    generate_flowchart,
-    generate_project_structure,
-    suggest_project_names,
-    extract_text,
-    display_project_table  # Import the display function
-)
-import tempfile
+from config import METRICS_DEBUG_PANEL, JOB_POLL_SECONDS, SIMILARITY_ENABLED, SIMILARITY_AUTO_SERVE, MAX_TEAM_MEMBERS, STRUCTURED_MODE, PREFETCH_ENABLED
+
+# The functions package loads its heavy dependencies (openai, pandas, PyPDF2, ...) on
+# first use, so its names are imported where they are needed rather than at start-up.
 
 # For handling feedback storage
 # if 'feedback' not in st.session_state:
 #     st.session_state['feedback'] = []  # Initializes feedback storage
 
+def render_text_section(placeholder, success_message: Optional[str], title: str, body: str):
+    """Renders a stage result into its placeholder as a success banner, heading and body."""
+    with placeholder.container():
+        if success_message:
+            st.success(success_message)
+        st.subheader(title)
+        st.write(body)
+
+
+def start_setup(project_description: str, team_members, bypass_cache: bool, structured: bool, prefilled=None):
+    """Submits a setup job and remembers its id in the session."""
+    from functions import client
+    from functions.jobs import get_job_manager
+
+    # Workflow and names may already have been prefetched while the form was filled in
+    prefetched = None
+    if st.session_state.get("prefetch_session") and not bypass_cache:
+        from functions.prefetch import get_prefetcher
+        prefetched = get_prefetcher().take(project_description)
+
+    # The setup runs on a background worker so reruns triggered by other widgets
+    # neither abort it nor lose its results; this session just keeps the job id
+    llm_client = client.without_cache() if bypass_cache else client
+    job = get_job_manager().submit(
+        llm_client, project_description, team_members, reuse=not bypass_cache, prefilled=prefilled,
+        structured=structured, prefetched=prefetched, memoize=not bypass_cache,
+    )
+    st.session_state["job_id"] = job.id
+
+
+def update_prefetch(project_description: str, enabled: bool):
+    """Reports the current description to the prefetcher and shows the state of its prefetch."""
+    session_id = st.session_state.get("prefetch_session")
+    if not enabled or not (project_description or "").strip():
+        if session_id:
+            from functions.prefetch import get_prefetcher
+            get_prefetcher().cancel(session_id)
+        return
+    from functions import client
+    from functions.prefetch import get_prefetcher, RUNNING, READY
+
+    if not session_id:
+        session_id = st.session_state["prefetch_session"] = uuid.uuid4().hex
+    status = get_prefetcher().request(session_id, client, project_description)
+    if status == RUNNING:
+        st.sidebar.caption("Preparing the workflow and project names in the background...")
+    elif status == READY:
+        st.sidebar.caption("Workflow and project names are ready.")
+
+
+def find_similar_project(project_description: str, team_members) -> Optional[dict]:
+    """Looks the inputs up in the near-duplicate index; returns the reusable results and similarity."""
+    if not SIMILARITY_ENABLED:
+        return None
+    from functions.similarity import get_similarity_index, reusable_results
+
+    match = get_similarity_index().find(project_description, team_members)
+    if match is None:
+        return None
+    return {"similarity": match.description_similarity, "results": reusable_results(match)}
+
+
+def regenerate_stage(job, stage: str):
+    """Starts a job that recomputes one stage of ``job`` and reuses everything it does not affect."""
+    from functions import client
+    from functions.jobs import get_job_manager
+
+    st.session_state["job_id"] = get_job_manager().regenerate(client, job, stage).id
+    st.rerun()
+
+
+def render_job(job, stream_responses: bool):
+    """Renders the progress and results of a setup job; called on every rerun while it runs."""
+    from functions import display_project_table, parse_assignments, ASSIGNMENT, WORKFLOW, NAMING
+    from functions.jobs import BRIEF, FLOWCHART, SCAFFOLD, DONE, FAILED, RUNNING
+    from functions.artifacts import get_artifact_store
+    from functions.stage_graph import downstream, TABLE
+
+    snapshot = job.snapshot()
+    stages = snapshot["stages"]
+    artifacts = snapshot["artifacts"]
+    store = get_artifact_store()
+
+    if snapshot["error"]:
+        st.error(f"Project setup failed: {snapshot['error']}")
+
+    brief = stages[BRIEF]
+    if brief["status"] == DONE and brief["text"] != snapshot["project_description"]:
+        with st.expander("The project description was condensed to fit the model's context"):
+            st.write(brief["text"])
+
+    text_sections = {
+        ASSIGNMENT: ("Tasks Assigned Successfully!", "Task Assignments and Project Summary"),
+        WORKFLOW: ("Project Workflow Generated!", "Project Workflow"),
+        NAMING: ("Project Names Suggested!", "Project Name Suggestions"),
+    }
+    for stage in (ASSIGNMENT, WORKFLOW, FLOWCHART, SCAFFOLD, NAMING):
+        progress = stages[stage]
+        if stage in text_sections:
+            success_message, title = text_sections[stage]
+            if progress["status"] == FAILED:
+                st.error(f"{title} failed: {progress['error']}")
+            elif progress["status"] == DONE:
+                if progress.get("reused"):
+                    success_message += " (reused from a similar earlier project)"
+                elif progress.get("memoized"):
+                    success_message += " (inputs unchanged since an earlier run)"
+                render_text_section(st.empty(), success_message, title, progress["text"])
+                dependents = [name for name in (FLOWCHART, SCAFFOLD, TABLE) if name in downstream([stage])]
+                if job.finished and st.button(
+                    f"Regenerate {title.lower()}",
+                    key=f"regenerate_{stage}",
+                    help="Request a new result and keep the other sections"
+                         + (f"; the {', '.join(dependents)} are rebuilt if it changes." if dependents else "."),
+                ):
+                    regenerate_stage(job, stage)
+            elif stream_responses and progress["text"]:
+                render_text_section(st.empty(), None, title, progress["text"] + " ▌")
+            elif not job.finished:
+                st.info(f"{title}: in progress...")
+        elif progress["status"] == FAILED:
+            st.error(f"{'Flowchart' if stage == FLOWCHART else 'Project structure'} generation failed: {progress['error']}")
+        elif stage in (FLOWCHART, SCAFFOLD) and progress["status"] == DONE and not store.has(artifacts.get(stage)):
+            st.warning(f"The generated {stage} has expired from the artifact store; start the setup again to rebuild it.")
+        elif stage == FLOWCHART and progress["status"] == DONE:
+            flowchart_id = artifacts[FLOWCHART]
+            st.success("Flowchart Generated!")
+            st.subheader("Project Flowchart")
+            st.image(store.get(flowchart_id), use_column_width=True)
+            st.download_button(
+                label="Download Flowchart",
+                data=lambda: store.get(flowchart_id),
+                file_name="flowchart.png",
+                mime="image/png",
+                on_click="ignore",
+            )
+        elif stage == SCAFFOLD and progress["status"] == DONE:
+            scaffold_id = artifacts[SCAFFOLD]
+            st.success("Project Structure Generated!")
+            st.subheader("Download Project Structure")
+            # The ZIP is only read from the store when the button is clicked
+            st.download_button(
+                label="Download Project Folder",
+                data=lambda: store.get(scaffold_id),
+                file_name="project_structure.zip",
+                mime="application/zip",
+                on_click="ignore",
+            )
+        elif progress["status"] == RUNNING:
+            st.info(f"Generating {stage}...")
+
+    # Display the project table
+    if stages[ASSIGNMENT]["status"] == DONE:
+        display_project_table(parse_assignments(stages[ASSIGNMENT]["text"]))
+
+
 def main():
     # Set page configuration
     st.set_page_config(page_title="WorkUp - Project Management Automation", layout="wide")
@@ -27,6 +179,7 @@ def main():
     # File input for project description
     project_file = st.sidebar.file_uploader("Upload Project Description", type=["pdf", "docx", "txt"])
     if project_file:
+        from functions import extract_text
         project_description = extract_text(project_file)
         if project_description:
             st.sidebar.success("Project description loaded from file.")
@@ -36,6 +189,7 @@ def main():
     # File input for teammates' expertise
     expertise_file = st.sidebar.file_uploader("Upload Team Members' Expertise", type=["pdf", "docx", "txt"])
     if expertise_file:
+        from functions import extract_text
         expertise_text = extract_text(expertise_file)
         if expertise_text:
             # Assuming each team member's expertise is separated by a delimiter, e.g., '---'
@@ -53,7 +207,7 @@ def main():
         num_team_members = st.sidebar.number_input(
             "Number of Team Members",
             min_value=1,
-            max_value=20,
+            max_value=MAX_TEAM_MEMBERS,
             step=1,
             value=2,
             help="Select the number of team members."
@@ -75,6 +229,37 @@ def main():
         index=0
     )
     other_options = st.sidebar.text_input("Other Project-Specific Options")
+    bypass_cache = st.sidebar.checkbox(
+        "Bypass response cache",
+        value=False,
+        help="Always request fresh responses from the model instead of reusing cached ones."
+    )
+    stream_responses = st.sidebar.checkbox(
+        "Stream responses",
+        value=True,
+        help="Show generated text as it arrives instead of waiting for each section to finish."
+    )
+    structured_mode = st.sidebar.checkbox(
+        "Single-call generation",
+        value=STRUCTURED_MODE,
+        help="Generate assignments, workflow and project names with one structured request "
+             "(falls back to one request per section if that fails)."
+    )
+
+    prefetch = st.sidebar.checkbox(
+        "Prefetch workflow and names",
+        value=PREFETCH_ENABLED,
+        help="Start generating the workflow and project names in the background once the description "
+             "stops changing, so only the task assignment is left when you start the setup."
+    )
+    # Single-call generation produces these in the same request as the assignment
+    update_prefetch(project_description, prefetch and not bypass_cache and not structured_mode)
+
+    show_metrics = st.sidebar.checkbox(
+        "Show performance metrics",
+        value=METRICS_DEBUG_PANEL,
+        help="Show per-stage timings, token usage and cache hits for this server process."
+    )
 
     st.sidebar.markdown("---")
     st.sidebar.info("Provide project description and team members' expertise either via upload or manual input.")
@@ -107,87 +292,55 @@ def main():
         if missing_info:
             st.error(f"Please provide the following missing information: {', '.join(missing_info)}.")
         else:
-            # Initialize placeholders for incremental display
-            assignment_placeholder = st.empty()
-            workflow_placeholder = st.empty()
-            flowchart_placeholder = st.empty()
-            structure_placeholder = st.empty()
-            naming_placeholder = st.empty()
-            table_placeholder = st.empty()  # Placeholder for the project table
+            similar = find_similar_project(project_description, team_members) if not bypass_cache else None
+            if similar is not None and not SIMILARITY_AUTO_SERVE:
+                # Ask before serving stored results; the offer is answered on the next rerun,
+                # and only holds for the inputs it was matched against
+                from functions.jobs import job_fingerprint
+                similar["fingerprint"] = job_fingerprint(project_description, team_members)
+                st.session_state["similar_offer"] = similar
+            else:
+                start_setup(project_description, team_members, bypass_cache, structured_mode,
+                            prefilled=similar["results"] if similar else None)
 
-            try:
-                # Workload Distribution
-                with st.spinner("Assigning tasks based on team expertise..."):
-                    assignment_response = get_workload_distribution(client, project_description, team_members)
-                    assignment_placeholder.success("Tasks Assigned Successfully!")
-                    assignment_placeholder.subheader("Task Assignments and Project Summary")
-                    assignment_placeholder.write(assignment_response)
-
-                # Project Workflow
-                with st.spinner("Generating project workflow..."):
-                    workflow_response = get_project_workflow(client, project_description)
-                    workflow_placeholder.success("Project Workflow Generated!")
-                    workflow_placeholder.subheader("Project Workflow")
-                    workflow_placeholder.write(workflow_response)
-
-                # Flowchart Generation
-                with st.spinner("Generating flowchart..."):
-                    flowchart_path = generate_flowchart(workflow_response)
-                    if flowchart_path:
-                        flowchart_placeholder.success("Flowchart Generated!")
-                        flowchart_placeholder.subheader("Project Flowchart")
-                        flowchart_placeholder.image(flowchart_path, use_column_width=True)
-                        with open(flowchart_path, "rb") as img_file:
-                            btn = st.download_button(
-                                label="Download Flowchart",
-                                data=img_file,
-                                file_name="flowchart.png",
-                                mime="image/png"
-                            )
-
-                # Project Structure and Code Generation
-                with st.spinner("Generating project structure and starter code..."):
-                    project_zip = generate_project_structure(assignment_response)
-                    if project_zip:
-                        structure_placeholder.success("Project Structure Generated!")
-                        structure_placeholder.subheader("Download Project Structure")
-                        structure_placeholder.download_button(
-                            label="Download Project Folder",
-                            data=project_zip,
-                            file_name="project_structure.zip",
-                            mime="application/zip"
-                        )
-
-                # Project Naming Suggestions
-                with st.spinner("Generating project name suggestions..."):
-                    naming_response = suggest_project_names(client, project_description)
-                    naming_placeholder.success("Project Names Suggested!")
-                    naming_placeholder.subheader("Project Name Suggestions")
-                    naming_placeholder.write(naming_response)
-
-                # Parse the assignment_response to extract tasks per member
-                # Assuming `assignment_response` is a string formatted as "Member: Task"
-                team_tasks = []
-                for line in assignment_response.split('\n'):
-                    if ':' in line:
-                        member, task = line.split(':', 1)
-                        team_tasks.append({"name": member.strip(), "task": task.strip()})
-
-                # Display the project table
-                display_project_table(team_tasks)
-
-                # Project Naming Feedback
-                # feedback = st.text_area("Provide Feedback on the Project Setup:", height=100)
-                # if st.button("Submit Feedback", key="submit_feedback_main"):
-                #     if feedback.strip():
-                #         st.session_state.feedback.append(feedback.strip())
-                #         st.success("Thank you for your feedback!")
-                #     else:
-                #         st.error("Feedback cannot be empty.")
+    # Offer to reuse the results of a near-duplicate project set up earlier
+    offer = st.session_state.get("similar_offer")
+    if offer:
+        from functions.jobs import job_fingerprint
+        if offer["fingerprint"] != job_fingerprint(project_description or "", team_members):
+            # The inputs were edited after the match; it no longer applies
+            del st.session_state["similar_offer"]
+            offer = None
+    if offer:
+        st.info(
+            f"A very similar project ({offer['similarity']:.0%} match) was set up before. "
+            f"Its {', '.join(offer['results'])} results can be reused without calling the model."
+        )
+        reuse_column, fresh_column = st.columns(2)
+        if reuse_column.button("Reuse previous results", key="reuse_similar"):
+            del st.session_state["similar_offer"]
+            start_setup(project_description, team_members, bypass_cache, structured_mode, prefilled=offer["results"])
+        elif fresh_column.button("Generate fresh results", key="skip_similar"):
+            del st.session_state["similar_offer"]
+            start_setup(project_description, team_members, bypass_cache, structured_mode)
 
+    # Reattach to the session's setup job (running or finished) on every rerun
+    job = None
+    if st.session_state.get("job_id"):
+        from functions.jobs import get_job_manager
+        job = get_job_manager().get(st.session_state["job_id"])
+        if job is None:
+            del st.session_state["job_id"]
+        else:
+            try:
+                render_job(job, stream_responses)
             except Exception as e:
                 st.error(f"An unexpected error occurred: {str(e)}")
 
+    if show_metrics:
+        from functions import render_debug_panel
+        render_debug_panel()
+
     # Continuous Interaction Loop with Session Management and Feedback
     st.sidebar.markdown("---")
     # if st.sidebar.button("Reset Session", key="reset_session"):
@@ -214,5 +367,10 @@ def main():
     #     else:
     #         st.write("No feedback submitted yet.")
 
+    # Poll the running job; the rendering above already shows its latest progress
+    if job is not None and not job.finished:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
 if __name__ == "__main__":
     main()
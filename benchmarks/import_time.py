@@ -0,0 +1,70 @@
+# benchmarks/import_time.py
+"""
+Measures the cold import time of the app and checks that heavy libraries stay unloaded.
+
+Each target is imported in a fresh interpreter. The check fails (exit status 1)
+if a target loads one of the libraries that should only be imported on first use,
+or if its import takes longer than ``--max-seconds``.
+
+Usage:
+    python -m benchmarks.import_time --max-seconds 2.0
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict
+
+TARGETS = ["functions", "app"]
+
+# Libraries that must only be loaded when the feature using them runs
+DEFERRED_MODULES = ["openai", "httpx", "pandas", "matplotlib", "networkx", "PyPDF2", "docx", "graphviz"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(target: str) -> Dict[str, Any]:
+    """Imports ``target`` in a fresh interpreter and reports its import time and deferred modules it loaded."""
+    env = dict(os.environ)
+    # config falls back to Streamlit secrets when these are not set
+    env.setdefault("WORKUP_API_KEY", "import-time")
+    env.setdefault("WORKUP_BASE_URL", "http://127.0.0.1:9/v1")
+    env.setdefault("WORKUP_MODEL_NAME", "import-time")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = _PROBE.format(target=target, deferred=DEFERRED_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", probe], cwd=root, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check cold import time and lazy loading of heavy dependencies.")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if an import takes longer than this")
+    args = parser.parse_args(argv)
+
+    failed = False
+    report = {}
+    for target in TARGETS:
+        result = measure_import(target)
+        report[target] = result
+        if result["loaded"]:
+            print(f"{target}: loaded deferred modules {', '.join(result['loaded'])}", file=sys.stderr)
+            failed = True
+        if args.max_seconds is not None and result["seconds"] > args.max_seconds:
+            print(f"{target}: import took {result['seconds']:.3f}s (limit {args.max_seconds}s)", file=sys.stderr)
+            failed = True
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
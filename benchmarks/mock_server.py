@@ -0,0 +1,189 @@
+# benchmarks/mock_server.py
+"""
+Local stand-in for an OpenAI-compatible ``/chat/completions`` endpoint.
+
+Latency, token rate and error rate are configurable so the pipeline can be
+benchmarked offline and reproducibly. Replies are shaped like the real ones the
+app parses ("Member: Task" lines for assignments).
+
+Usage:
+    python -m benchmarks.mock_server --port 8000 --latency 0.5 --tokens-per-second 200
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+
+class MockSettings:
+    """Behaviour of the mock server; may be changed while it is running."""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, tokens_per_second: float = 0.0,
+                 completion_tokens: int = 200, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+
+def _team_members(prompt: str) -> List[Tuple[str, str]]:
+    """Finds the "name: expertise" roster lines an assignment (or shard assignment) prompt contains."""
+    if "whose members are:" in prompt:
+        roster = prompt.split("whose members are:", 1)[1].split("The other groups", 1)[0]
+    elif "team members" in prompt:
+        roster = prompt.split("involved:", 1)[-1]
+    else:
+        return []
+    return re.findall(r"^([^:\n]{1,80}):\s*(.+)$", roster, re.MULTILINE)
+
+
+def _structured_reply(prompt: str) -> str:
+    """Answers a JSON-schema (single-call) request with assignments, workflow and names."""
+    return json.dumps({
+        "summary": "A web platform delivered in milestones by the team.",
+        "assignments": [{"member": name.strip(), "task": f"Own the work that needs {expertise.strip()[:60]}",
+                         "outcome": "A working first release."} for name, expertise in _team_members(prompt)],
+        "workflow": [{"step": f"Deliver milestone {i}", "outcome": "Reviewed outcome"} for i in range(1, 9)],
+        "names": [f"Project {letter}" for letter in "ABCDE"],
+    })
+
+
+def _reply_text(prompt: str, completion_tokens: int) -> str:
+    members = _team_members(prompt)
+    if members:
+        lines = [f"{name.strip()}: Own the work that needs {expertise.strip()[:60]}" for name, expertise in members]
+        lines.append("Expected Outcome: A working first release.")
+    else:
+        lines = [f"Step {i}: Deliver milestone {i} and review the outcome" for i in range(1, 9)]
+    text = "\n".join(lines)
+    # Pad with filler words up to roughly the requested number of tokens
+    words = text.split(" ")
+    if len(words) < completion_tokens:
+        text += "\n" + " ".join("detail" for _ in range(completion_tokens - len(words)))
+    return text
+
+
+class _Handler(BaseHTTPRequestHandler):
+    settings: MockSettings = MockSettings()
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        settings = self.settings
+
+        delay = max(0.0, settings.latency + settings.random.uniform(-settings.jitter, settings.jitter))
+        time.sleep(delay)
+        if settings.random.random() < settings.error_rate:
+            status = settings.random.choice([429, 500, 503])
+            self._send_json(status, {"error": {"message": f"mock error {status}"}})
+            return
+
+        prompt = "\n".join(message.get("content", "") for message in body.get("messages", []))
+        max_tokens = body.get("max_tokens") or settings.completion_tokens
+        if (body.get("response_format") or {}).get("type") == "json_schema":
+            text = _structured_reply(prompt)
+        else:
+            text = _reply_text(prompt, min(settings.completion_tokens, max_tokens))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock")
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4,
+                 "total_tokens": (len(prompt) + len(text)) // 4}
+
+        finish_reason = "length" if max_tokens < settings.completion_tokens else "stop"
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            self._stream(completion_id, model, text, finish_reason, usage if include_usage else None)
+            return
+        if settings.tokens_per_second:
+            time.sleep(len(text.split(" ")) / settings.tokens_per_second)
+        self._send_json(200, {
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, model: str, text: str, finish_reason: str, usage: Optional[dict]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        words = text.split(" ")
+        for index, word in enumerate(words):
+            if self.settings.tokens_per_second:
+                time.sleep(1 / self.settings.tokens_per_second)
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if index == 0 else " " + word}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        header = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        final = dict(header, choices=[{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        self.wfile.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        if usage is not None:
+            # Like the OpenAI API: a last chunk without choices that carries the usage
+            self.wfile.write(f"data: {json.dumps(dict(header, choices=[], usage=usage))}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_mock_server(settings: MockSettings, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Starts the mock server on a background thread.
+
+    Args:
+        settings (MockSettings): Latency, token rate and error rate of the server.
+        host (str): Interface to bind.
+        port (int): Port to bind; 0 picks a free one.
+
+    Returns:
+        Tuple[ThreadingHTTPServer, str]: The server (call ``shutdown()`` to stop it) and its base URL.
+    """
+    handler = type("MockHandler", (_Handler,), {"settings": settings})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a mock OpenAI-compatible chat-completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generation rate (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/5xx")
+    args = parser.parse_args(argv)
+    settings = MockSettings(args.latency, tokens_per_second=args.tokens_per_second,
+                            completion_tokens=args.completion_tokens, error_rate=args.error_rate)
+    server, base_url = start_mock_server(settings, args.host, args.port)
+    print(f"Mock server listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
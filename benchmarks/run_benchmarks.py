@@ -0,0 +1,260 @@
+# benchmarks/run_benchmarks.py
+"""
+Offline benchmark of the WorkUp pipeline against the local mock server.
+
+Times each stage across description sizes and team sizes and writes p50/p95
+latency, throughput and error counts as JSON. Pass ``--compare`` with an earlier result file
+to print the relative change per stage.
+
+Usage:
+    python -m benchmarks.run_benchmarks --iterations 20 --output bench.json
+    python -m benchmarks.run_benchmarks --output new.json --compare bench.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List
+from .mock_server import MockSettings, start_mock_server
+
+DESCRIPTION_SIZES = {"small": 200, "medium": 5_000, "large": 50_000}
+TEAM_SIZES = [2, 10, 50]
+PDF_PAGE_COUNTS = [5, 50]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``samples`` (0 < fraction <= 1)."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def measure(name: str, params: Dict[str, Any], func: Callable[[int], Any], iterations: int) -> Dict[str, Any]:
+    """
+    Runs ``func(iteration)`` ``iterations`` times and summarizes the wall times.
+
+    A failing iteration does not stop the run: its exception type is counted under
+    ``errors`` and only successful iterations enter the latency percentiles.
+    """
+    samples = []
+    errors: Dict[str, int] = {}
+    started = time.perf_counter()
+    for iteration in range(iterations):
+        start = time.perf_counter()
+        try:
+            func(iteration)
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            continue
+        samples.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    return {
+        "stage": name,
+        "params": params,
+        "iterations": iterations,
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3) if samples else None,
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3) if samples else None,
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else None,
+        "throughput_per_s": round(len(samples) / elapsed, 3) if elapsed else None,
+        "error_count": iterations - len(samples),
+        "errors": errors,
+    }
+
+
+def make_description(size: int) -> str:
+    sentence = "The platform lets students plan coursework, share notes and track deadlines with their team. "
+    return (sentence * (size // len(sentence) + 1))[:size]
+
+
+def make_team(size: int) -> List[Dict[str, str]]:
+    skills = ["Python backend APIs", "React frontend", "PostgreSQL data modelling", "DevOps and CI", "UX research"]
+    return [{"name": f"Member {i}", "expertise": skills[i % len(skills)]} for i in range(1, size + 1)]
+
+
+def make_pdf(pages: int) -> bytes:
+    """Builds a minimal multi-page PDF with a text layer."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = " ".join(f"({make_description(80)} {page}-{line}) Tj T*" for line in range(40))
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_ref = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_ref} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int) -> bytes:
+    import docx
+    document = docx.Document()
+    for index in range(paragraphs):
+        document.add_paragraph(f"{make_description(300)} {index}")
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+class UploadedBytes(io.BytesIO):
+    """Minimal stand-in for Streamlit's UploadedFile."""
+
+    def __init__(self, data: bytes, mime_type: str):
+        super().__init__(data)
+        self.type = mime_type
+
+
+def run_benchmarks(iterations: int, settings: MockSettings) -> Dict[str, Any]:
+    server, base_url = start_mock_server(settings)
+    # config reads these when the package is first imported
+    os.environ["WORKUP_BASE_URL"] = base_url
+    os.environ.setdefault("WORKUP_API_KEY", "benchmark")
+    os.environ.setdefault("WORKUP_MODEL_NAME", "mock-model")
+
+    from functions import (
+        create_client,
+        get_workload_distribution,
+        get_project_workflow,
+        suggest_project_names,
+        generate_flowchart,
+        generate_project_structure,
+        extract_text,
+        run_project_setup,
+    )
+    from functions import flowchart_generation, utils
+
+    # The response cache is deliberately left out so every call reaches the server, and the
+    # scheduler so the rate limits don't turn call latency into admission wait
+    client = create_client(base_url=base_url, scheduled=False)
+    results = []
+    try:
+        for size_name, size in DESCRIPTION_SIZES.items():
+            description = make_description(size)
+            results.append(measure("get_project_workflow", {"description": size_name},
+                                   lambda i: get_project_workflow(client, description), iterations))
+            results.append(measure("suggest_project_names", {"description": size_name},
+                                   lambda i: suggest_project_names(client, description), iterations))
+            for team_size in TEAM_SIZES:
+                team = make_team(team_size)
+                params = {"description": size_name, "team": team_size}
+                results.append(measure("get_workload_distribution", params,
+                                       lambda i: get_workload_distribution(client, description, team), iterations))
+                results.append(measure("run_project_setup", params,
+                                       lambda i: run_project_setup(client, description, team), iterations))
+
+        for team_size in TEAM_SIZES:
+            assignment = None
+            for _ in range(10):  # The mock server may be configured to fail requests
+                try:
+                    assignment = get_workload_distribution(client, make_description(200), make_team(team_size))
+                    break
+                except Exception:
+                    continue
+            if assignment is None:
+                continue
+
+            def flowchart(i):
+                flowchart_generation._render_cache.clear()
+                generate_flowchart(assignment)
+
+            results.append(measure("generate_flowchart", {"team": team_size}, flowchart, iterations))
+            results.append(measure("generate_project_structure", {"team": team_size},
+                                   lambda i: generate_project_structure(assignment), iterations))
+
+        samples = {f"pdf_{pages}_pages": (make_pdf(pages), "application/pdf") for pages in PDF_PAGE_COUNTS}
+        samples["docx_200_paragraphs"] = (
+            make_docx(200), "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+        for name, (data, mime_type) in samples.items():
+            def extract(i, data=data, mime_type=mime_type):
+                utils._extraction_cache.clear()
+                extract_text(UploadedBytes(data, mime_type))
+
+            results.append(measure("extract_text", {"document": name}, extract, iterations))
+    finally:
+        server.shutdown()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "mock": {
+                "latency": settings.latency,
+                "tokens_per_second": settings.tokens_per_second,
+                "completion_tokens": settings.completion_tokens,
+                "error_rate": settings.error_rate,
+            },
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Formats the relative p50/p95 change of every stage present in both runs."""
+    def key(result):
+        return result["stage"], json.dumps(result["params"], sort_keys=True)
+
+    previous = {key(result): result for result in baseline["results"]}
+    lines = []
+    for result in current["results"]:
+        before = previous.get(key(result))
+        if not before:
+            continue
+        changes = []
+        for metric in ("p50_ms", "p95_ms"):
+            if before[metric] and result[metric] is not None:
+                changes.append(f"{metric} {(result[metric] - before[metric]) / before[metric]:+.1%}")
+        if result.get("error_count"):
+            changes.append(f"errors {result['error_count']}/{result['iterations']}")
+        lines.append(f"{result['stage']} {result['params']}: {', '.join(changes)}")
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the WorkUp pipeline against a local mock server.")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock server latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Mock generation rate (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    settings = MockSettings(args.latency, tokens_per_second=args.tokens_per_second,
+                            completion_tokens=args.completion_tokens, error_rate=args.error_rate, seed=0)
+    report = run_benchmarks(max(1, args.iterations), settings)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, report)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
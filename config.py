@@ -1,7 +1,138 @@
+import os
 import streamlit as st
 
 # config.py
 
-API_KEY = st.secrets["api_config"]["api_key"]
-BASE_URL = st.secrets["api_config"]["base_url"]
-MODEL_NAME = st.secrets["api_config"]["model_name"]
+
+def _api_setting(key: str) -> str:
+    # Environment variables (e.g. WORKUP_BASE_URL) override secrets, for headless runs
+    return os.environ.get(f"WORKUP_{key.upper()}") or st.secrets["api_config"][key]
+
+
+API_KEY = _api_setting("api_key")
+BASE_URL = _api_setting("base_url")
+MODEL_NAME = _api_setting("model_name")
+
+# Maximum number of independent LLM stages that run at the same time
+MAX_CONCURRENT_STAGES = 3
+
+# Produce assignments, workflow and names with one JSON-schema completion by default
+# (falls back to one call per stage if the provider rejects it or the output is malformed)
+STRUCTURED_MODE = False
+
+# Speculative prefetch: once the description has not changed for the debounce interval, the
+# description-only stages (workflow, names) are generated in the background before Start
+PREFETCH_ENABLED = False
+PREFETCH_DEBOUNCE_SECONDS = 2
+PREFETCH_WORKERS = 2
+PREFETCH_MAX_RESULTS = 64
+# Sessions that have not reported a description for this long are forgotten
+PREFETCH_SESSION_IDLE_SECONDS = 30 * 60
+
+# Response cache for chat completions (memory LRU in front of a SQLite file)
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_PATH = os.path.join(".cache", "responses.sqlite3")
+RESPONSE_CACHE_MEMORY_ENTRIES = 256
+RESPONSE_CACHE_MEMORY_BYTES = 32 * 1024 * 1024
+RESPONSE_CACHE_MAX_DISK_BYTES = 50 * 1024 * 1024
+RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Memory budget for extracted text of uploaded documents, shared across sessions
+EXTRACTION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# PDF extraction: larger documents are split into page chunks and parsed on a process pool
+PDF_MAX_PAGES = 1000
+PDF_CHUNK_PAGES = 16
+PDF_PAGE_TIMEOUT_SECONDS = 5
+PDF_CHUNK_GRACE_SECONDS = 10  # Extra time before a worker that ignores the page timeout is killed
+PDF_MAX_WORKERS = min(4, os.cpu_count() or 1)
+PDF_PARALLEL_MIN_PAGES = 32
+
+# Descriptions longer than the budget are condensed (map-reduce) into one brief for all prompts
+CONDENSE_TOKEN_BUDGET = 3000
+CONDENSE_CHUNK_TOKENS = 2000
+CONDENSE_CHARS_PER_TOKEN = 4
+CONDENSE_MAX_WORKERS = 4
+
+# Large teams: rosters above the threshold are assigned in shards of related expertise
+MAX_TEAM_MEMBERS = 500
+LARGE_TEAM_THRESHOLD = 20
+ASSIGNMENT_SHARD_SIZE = 15
+ASSIGNMENT_SHARD_WORKERS = 4
+
+# Expertise index: once the description and verbatim roster would exceed the token budget, longer
+# expertise texts are sent as their top terms, with a shortlist per project area
+EXPERTISE_PROMPT_TOKEN_BUDGET = 2000
+EXPERTISE_SUMMARY_TERMS = 12
+EXPERTISE_COMPACT_MIN_CHARS = 160
+EXPERTISE_SHORTLIST_SIZE = 3
+EXPERTISE_MAX_AREAS = 6
+
+# Memory budget for rendered flowchart images
+FLOWCHART_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Project table: larger tables are paginated; Arrow tables and exports share this memory budget
+TABLE_STATIC_MAX_ROWS = 25
+TABLE_PAGE_SIZE = 50
+TABLE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Project scaffold archive settings
+ZIP_COMPRESSION_LEVEL = 6
+ZIP_STREAM_CHUNK_BYTES = 64 * 1024
+
+# Headless batch runs
+BATCH_CONCURRENCY = 4
+BATCH_ARTIFACTS_DIR = "batch_artifacts"
+
+# HTTP client: connection pool sized for concurrent sessions, timeouts, retries and circuit breaker
+HTTP_MAX_CONNECTIONS = 50
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30
+HTTP_CONNECT_TIMEOUT_SECONDS = 5
+HTTP_READ_TIMEOUT_SECONDS = 60
+RETRY_MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 8
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+
+# Admission control for the shared API key: request/token budgets per minute (None disables one)
+# and the bounds of the adaptive concurrency limit; interactive calls are queued ahead of batch ones
+RATE_LIMIT_RPM = 500
+RATE_LIMIT_TPM = 200_000
+SCHEDULER_MAX_CONCURRENCY = 16
+SCHEDULER_MIN_CONCURRENCY = 1
+SCHEDULER_LATENCY_TARGET_SECONDS = 30
+SCHEDULER_COMPLETION_TOKENS_ESTIMATE = 500
+
+# Instrumentation: where per-stage timings, token usage and cache hits are exported
+METRICS_SINKS = ["log"]  # Any of "log", "prometheus_file"
+# The "log" sink writes to stderr at this level through the "workup.metrics" logger
+METRICS_LOG_LEVEL = "INFO"
+METRICS_PROMETHEUS_PATH = os.path.join(".cache", "metrics.prom")
+METRICS_PROMETHEUS_PORT = None  # Serve /metrics on this port when set
+METRICS_FILE_INTERVAL_SECONDS = 10
+METRICS_DEBUG_PANEL = False
+
+# Background setup jobs: survive Streamlit reruns and are persisted for reattaching
+JOBS_DIR = os.path.join(".cache", "jobs")
+JOB_WORKERS = 4
+JOB_POLL_SECONDS = 0.5
+JOB_STREAM_PERSIST_SECONDS = 2
+JOB_RETENTION_SECONDS = 7 * 24 * 3600  # Finished jobs are deleted this long after they finished
+JOB_MAX_IN_MEMORY = 256  # Older finished jobs are dropped from memory (they reload from disk)
+JOB_PRUNE_INTERVAL_SECONDS = 3600
+
+# Generated files (flowcharts, scaffold ZIPs, table exports), stored once per content hash
+ARTIFACTS_DIR = os.path.join(".cache", "artifacts")
+ARTIFACT_MAX_DISK_BYTES = 512 * 1024 * 1024
+ARTIFACT_MEMORY_BYTES = 64 * 1024 * 1024
+ARTIFACT_TTL_SECONDS = 7 * 24 * 3600
+
+# Near-duplicate detection: reuse stored results for projects similar to earlier ones
+SIMILARITY_ENABLED = True
+SIMILARITY_INDEX_PATH = os.path.join(".cache", "similarity.sqlite3")
+SIMILARITY_THRESHOLD = 0.85  # Estimated Jaccard similarity of the descriptions
+SIMILARITY_AUTO_SERVE = False  # Serve matches without asking the user
+SIMILARITY_NUM_PERM = 128
+SIMILARITY_BANDS = 16
@@ -1,13 +1,131 @@
 # functions/__init__.py
+#
+# Public names are resolved lazily (PEP 562) so that importing the package does not
+# pull in openai, pandas, PyPDF2, python-docx or Graphviz before they are needed.
+# ``from functions import extract_text`` only loads the extraction modules.
 
-from .workload_distribution import get_workload_distribution
-from .project_workflow import get_project_workflow
-from .flowchart_generation import generate_flowchart
-from .project_structure_generation import generate_project_structure
-from .project_naming import suggest_project_names
-from .utils import extract_text    
-from .project_table import generate_project_table, display_project_table
-from config import API_KEY, BASE_URL, MODEL_NAME
-from openai import OpenAI
-
-client = OpenAI(api_key=API_KEY, base_url=BASE_URL)
+import importlib
+import threading
+from typing import Any
+
+# Public name -> (submodule, attribute)
+_EXPORTS = {
+    "get_workload_distribution": (".workload_distribution", "get_workload_distribution"),
+    "get_project_workflow": (".project_workflow", "get_project_workflow"),
+    "generate_flowchart": (".flowchart_generation", "generate_flowchart"),
+    "render_flowchart": (".flowchart_generation", "render_flowchart"),
+    "generate_project_structure": (".project_structure_generation", "generate_project_structure"),
+    "iter_project_structure_chunks": (".project_structure_generation", "iter_project_structure_chunks"),
+    "suggest_project_names": (".project_naming", "suggest_project_names"),
+    "extract_text": (".utils", "extract_text"),
+    "extraction_cache_stats": (".utils", "extraction_cache_stats"),
+    "iter_pdf_pages": (".pdf_extraction", "iter_pdf_pages"),
+    "generate_project_table": (".project_table", "generate_project_table"),
+    "display_project_table": (".project_table", "display_project_table"),
+    "generate_arrow_table": (".project_table", "generate_arrow_table"),
+    "export_project_table": (".project_table", "export_project_table"),
+    "ParsedAssignments": (".assignment_parser", "ParsedAssignments"),
+    "TaskAssignment": (".assignment_parser", "TaskAssignment"),
+    "parse_assignments": (".assignment_parser", "parse_assignments"),
+    "run_llm_stages": (".pipeline", "run_llm_stages"),
+    "run_project_setup": (".pipeline", "run_project_setup"),
+    "StageEvent": (".pipeline", "StageEvent"),
+    "ASSIGNMENT": (".pipeline", "ASSIGNMENT"),
+    "WORKFLOW": (".pipeline", "WORKFLOW"),
+    "NAMING": (".pipeline", "NAMING"),
+    "CachedClient": (".cache", "CachedClient"),
+    "ResponseCache": (".cache", "ResponseCache"),
+    "CircuitBreaker": (".llm_client", "CircuitBreaker"),
+    "ResilientClient": (".llm_client", "ResilientClient"),
+    "create_client": (".llm_client", "create_client"),
+    "LLMError": (".errors", "LLMError"),
+    "LLMConnectionError": (".errors", "LLMConnectionError"),
+    "LLMTimeoutError": (".errors", "LLMTimeoutError"),
+    "LLMRateLimitError": (".errors", "LLMRateLimitError"),
+    "LLMServerError": (".errors", "LLMServerError"),
+    "LLMRequestError": (".errors", "LLMRequestError"),
+    "CircuitOpenError": (".errors", "CircuitOpenError"),
+    "CoalescingClient": (".coalescing", "CoalescingClient"),
+    "InstrumentedClient": (".metrics", "InstrumentedClient"),
+    "MetricsRegistry": (".metrics", "MetricsRegistry"),
+    "metrics_registry": (".metrics", "registry"),
+    "stage_timer": (".metrics", "stage_timer"),
+    "timed": (".metrics", "timed"),
+    "render_debug_panel": (".metrics", "render_debug_panel"),
+    "condense_description": (".condensation", "condense_description"),
+    "condense_brief": (".condensation", "condense_brief"),
+    "estimate_tokens": (".condensation", "estimate_tokens"),
+    "get_sharded_workload_distribution": (".large_team", "get_sharded_workload_distribution"),
+    "shard_team": (".large_team", "shard_team"),
+    "ExpertiseIndex": (".expertise_index", "ExpertiseIndex"),
+    "get_expertise_index": (".expertise_index", "get_expertise_index"),
+    "StructuredSetup": (".structured_generation", "StructuredSetup"),
+    "StructuredOutputError": (".structured_generation", "StructuredOutputError"),
+    "generate_structured_setup": (".structured_generation", "generate_structured_setup"),
+    "ArtifactStore": (".artifacts", "ArtifactStore"),
+    "get_artifact_store": (".artifacts", "get_artifact_store"),
+    "PriorityScheduler": (".scheduling", "PriorityScheduler"),
+    "RateLimiter": (".scheduling", "RateLimiter"),
+    "ScheduledClient": (".scheduling", "ScheduledClient"),
+    "get_scheduler": (".scheduling", "get_scheduler"),
+    "request_priority": (".scheduling", "request_priority"),
+    "Prefetcher": (".prefetch", "Prefetcher"),
+    "get_prefetcher": (".prefetch", "get_prefetcher"),
+    "STAGE_GRAPH": (".stage_graph", "STAGE_GRAPH"),
+    "StageMemo": (".stage_graph", "StageMemo"),
+    "Job": (".jobs", "Job"),
+    "JobManager": (".jobs", "JobManager"),
+    "get_job_manager": (".jobs", "get_job_manager"),
+    "SimilarityIndex": (".similarity", "SimilarityIndex"),
+    "SimilarMatch": (".similarity", "SimilarMatch"),
+    "get_similarity_index": (".similarity", "get_similarity_index"),
+}
+
+_client_lock = threading.Lock()
+
+
+def _create_shared_client() -> None:
+    """Builds the process-wide response cache and API client on first use."""
+    from config import (
+        RESPONSE_CACHE_ENABLED,
+        RESPONSE_CACHE_PATH,
+        RESPONSE_CACHE_MEMORY_ENTRIES,
+        RESPONSE_CACHE_MEMORY_BYTES,
+        RESPONSE_CACHE_MAX_DISK_BYTES,
+        RESPONSE_CACHE_TTL_SECONDS,
+    )
+    from .cache import CachedClient, ResponseCache
+    from .llm_client import create_client
+    from .metrics import InstrumentedClient
+    from .coalescing import CoalescingClient
+
+    cache = ResponseCache(
+        RESPONSE_CACHE_PATH,
+        max_memory_entries=RESPONSE_CACHE_MEMORY_ENTRIES,
+        max_disk_bytes=RESPONSE_CACHE_MAX_DISK_BYTES,
+        ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+        max_memory_bytes=RESPONSE_CACHE_MEMORY_BYTES,
+    )
+    globals()["response_cache"] = cache
+    # Identical requests share one upstream call while it is in flight; the cache serves later repeats
+    globals()["client"] = CachedClient(
+        CoalescingClient(InstrumentedClient(create_client())), cache, enabled=RESPONSE_CACHE_ENABLED
+    )
+
+
+def __getattr__(name: str) -> Any:
+    if name in ("client", "response_cache"):
+        with _client_lock:
+            if name not in globals():
+                _create_shared_client()
+        return globals()[name]
+    if name in _EXPORTS:
+        module_name, attribute = _EXPORTS[name]
+        value = getattr(importlib.import_module(module_name, __name__), attribute)
+        globals()[name] = value  # Later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS) | {"client", "response_cache"})
@@ -0,0 +1,178 @@
+# functions/artifacts.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from config import ARTIFACTS_DIR, ARTIFACT_MAX_DISK_BYTES, ARTIFACT_MEMORY_BYTES, ARTIFACT_TTL_SECONDS
+from .cache import LRUCache
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated files (flowcharts, scaffold ZIPs, table exports).
+
+    Artifacts are identified by the SHA-256 of their bytes, so identical files from
+    different sessions or jobs are stored once. Files live under ``root`` with a
+    SQLite index of their sizes and access times; a memory LRU sits in front. The
+    disk tier is kept under ``max_disk_bytes`` by evicting the least recently used
+    artifacts, and artifacts not read for ``ttl_seconds`` are removed.
+
+    Aliases name an artifact by how it was produced (e.g. the hash of a table plus
+    the export format), so a producer can find an earlier result before rebuilding it.
+
+    Args:
+        root (str): Directory for the files and the index.
+        max_disk_bytes (int): Size budget of the disk tier.
+        memory_bytes (int): Size budget of the memory tier.
+        ttl_seconds (Optional[float]): Idle time after which an artifact is removed.
+    """
+
+    def __init__(self, root: str, max_disk_bytes: int, memory_bytes: int, ttl_seconds: Optional[float]):
+        self.root = root
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory = LRUCache(max_bytes=memory_bytes)
+        self._lock = threading.Lock()
+        self.evictions = 0
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite3"), timeout=30, check_same_thread=False)
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "id TEXT PRIMARY KEY, size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, id TEXT NOT NULL)")
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def path(self, artifact_id: str) -> str:
+        """Returns where the artifact's file is (or would be) stored."""
+        return os.path.join(self.root, "blobs", artifact_id)
+
+    def put(self, data: bytes, alias: Optional[str] = None) -> str:
+        """
+        Stores an artifact, or refreshes it if the same bytes are already stored.
+
+        Args:
+            data (bytes): The file contents.
+            alias (Optional[str]): A name to find the artifact by later.
+
+        Returns:
+            str: The artifact id (hex SHA-256 of the contents).
+        """
+        artifact_id = hashlib.sha256(data).hexdigest()
+        now = time.time()
+        self._memory.set(artifact_id, data)
+        with self._lock, self._conn as conn:
+            exists = conn.execute("SELECT 1 FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+            if exists and os.path.exists(self.path(artifact_id)):
+                conn.execute("UPDATE artifacts SET accessed_at = ? WHERE id = ?", (now, artifact_id))
+            else:
+                temp_path = f"{self.path(artifact_id)}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, self.path(artifact_id))
+                conn.execute(
+                    "INSERT OR REPLACE INTO artifacts (id, size, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (artifact_id, len(data), now, now),
+                )
+            if alias is not None:
+                conn.execute("INSERT OR REPLACE INTO aliases (alias, id) VALUES (?, ?)", (alias, artifact_id))
+            self._evict(conn, now, keep=artifact_id)
+        return artifact_id
+
+    def get(self, artifact_id: str) -> Optional[bytes]:
+        """Returns the artifact's bytes, or None if it was never stored or has been evicted."""
+        now = time.time()
+        with self._lock, self._conn as conn:
+            row = conn.execute("SELECT accessed_at FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+            if row is None or self._expired(row[0], now):
+                if row is not None:
+                    self._delete(conn, artifact_id)
+                return None
+            conn.execute("UPDATE artifacts SET accessed_at = ? WHERE id = ?", (now, artifact_id))
+
+        data = self._memory.get(artifact_id)
+        if data is None:
+            try:
+                with open(self.path(artifact_id), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+            self._memory.set(artifact_id, data)
+        return data
+
+    def has(self, artifact_id: Optional[str]) -> bool:
+        """Returns whether the artifact is stored and has not expired."""
+        if not artifact_id:
+            return False
+        with self._lock, self._conn as conn:
+            row = conn.execute("SELECT accessed_at FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+        return row is not None and not self._expired(row[0], time.time()) and os.path.exists(self.path(artifact_id))
+
+    def lookup(self, alias: str) -> Optional[str]:
+        """Returns the id of the artifact stored under ``alias``, if it is still available."""
+        with self._lock, self._conn as conn:
+            row = conn.execute(
+                "SELECT artifacts.id, artifacts.accessed_at FROM aliases JOIN artifacts ON artifacts.id = aliases.id "
+                "WHERE aliases.alias = ?",
+                (alias,),
+            ).fetchone()
+        if row is None or self._expired(row[1], time.time()):
+            return None
+        return row[0]
+
+    def _expired(self, accessed_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - accessed_at > self.ttl_seconds
+
+    def _delete(self, conn: sqlite3.Connection, artifact_id: str):
+        conn.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
+        conn.execute("DELETE FROM aliases WHERE id = ?", (artifact_id,))
+        self._memory.pop(artifact_id)
+        try:
+            os.remove(self.path(artifact_id))
+        except FileNotFoundError:
+            pass
+        self.evictions += 1
+
+    def _evict(self, conn: sqlite3.Connection, now: float, keep: str):
+        if self.ttl_seconds is not None:
+            for (artifact_id,) in conn.execute(
+                "SELECT id FROM artifacts WHERE accessed_at < ? AND id != ?", (now - self.ttl_seconds, keep)
+            ).fetchall():
+                self._delete(conn, artifact_id)
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for artifact_id, size in conn.execute(
+            "SELECT id, size FROM artifacts WHERE id != ? ORDER BY accessed_at ASC", (keep,)
+        ).fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._delete(conn, artifact_id)
+            total -= size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock, self._conn as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        return {"artifacts": count, "disk_bytes": total, "memory_bytes": self._memory.total_bytes,
+                "evictions": self.evictions}
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Returns the process-wide artifact store, shared by all Streamlit sessions and jobs."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore(ARTIFACTS_DIR, ARTIFACT_MAX_DISK_BYTES, ARTIFACT_MEMORY_BYTES, ARTIFACT_TTL_SECONDS)
+        return _store
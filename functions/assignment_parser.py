@@ -0,0 +1,90 @@
+# functions/assignment_parser.py
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
+
+# Keys that describe the outcome of the preceding task rather than a new assignment
+_OUTCOME_KEY = re.compile(r"^(expected\s+)?outcomes?$", re.IGNORECASE)
+# Markdown decoration the model commonly puts around names (bullets, headings, bold)
+_DECORATION = " \t-*#>`_"
+# Heading of the free-text project summary that may follow the assignments
+SUMMARY_HEADING = "Project Summary"
+
+
+@dataclass(frozen=True)
+class TaskAssignment:
+    """One "Member: Task" line of an assignment response."""
+    __slots__ = ("member", "task", "outcome")
+    member: str
+    task: str
+    outcome: str
+
+
+@dataclass(frozen=True)
+class ParsedAssignments:
+    """All task assignments found in a response, in response order."""
+    __slots__ = ("items",)
+    items: Tuple[TaskAssignment, ...]
+
+    def __iter__(self) -> Iterator[TaskAssignment]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
+
+    def by_member(self) -> List[Tuple[str, str]]:
+        """
+        Returns one (member, task) pair per member.
+
+        A member's position is that of their first line and their task is that of
+        their last line, matching how repeated lines have always been merged.
+        """
+        tasks: Dict[str, str] = {}
+        for item in self.items:
+            tasks[item.member] = item.task
+        return list(tasks.items())
+
+    def as_rows(self) -> List[Dict[str, str]]:
+        """Returns the assignments as ``{"name", "task", "outcome"}`` dictionaries for tables."""
+        return [{"name": item.member, "task": item.task, "outcome": item.outcome} for item in self.items]
+
+
+@lru_cache(maxsize=64)
+def parse_assignments(response: str) -> ParsedAssignments:
+    """
+    Parses "Member: Task" lines out of an LLM assignment response.
+
+    "Expected outcome: ..." lines are attached to the assignment above them and
+    parsing stops at a SUMMARY_HEADING line, whose text is not an assignment.
+    Results are memoized, so every stage that needs the parse of the same
+    response shares a single pass over it.
+
+    Args:
+        response (str): The assignment text returned by the model.
+
+    Returns:
+        ParsedAssignments: The assignments in response order.
+    """
+    items: List[TaskAssignment] = []
+    for line in response.split('\n'):
+        if line.strip(_DECORATION).casefold() == SUMMARY_HEADING.casefold():
+            break
+        if ':' not in line:
+            continue
+        key, value = line.split(':', 1)
+        key = key.strip(_DECORATION)
+        value = value.strip(_DECORATION)
+        if not key:
+            continue
+        if _OUTCOME_KEY.match(key):
+            if items:
+                previous = items[-1]
+                items[-1] = TaskAssignment(previous.member, previous.task, value)
+            continue
+        items.append(TaskAssignment(key, value, ""))
+    return ParsedAssignments(tuple(items))
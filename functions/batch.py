@@ -0,0 +1,194 @@
+# functions/batch.py
+"""
+Headless batch mode: runs the project setup pipeline for every project in a JSONL file.
+
+Each input line is a JSON object with ``description``, ``team_members`` (a list of
+``{"name", "expertise"}`` objects) and an optional ``id``. One result line is
+appended to the output JSONL per project as soon as it finishes, and the scaffold
+ZIP is written to ``<artifacts_dir>/<id>/project_structure.zip`` (ids that are not
+plain file names get a sanitized directory name). A line that is not a JSON object
+gets an error result with the id ``line-<number>``. Projects that already have a
+successful result line are skipped, so an interrupted run can be restarted with
+the same arguments.
+
+Usage:
+    python -m functions.batch projects.jsonl results.jsonl --concurrency 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+from config import BATCH_CONCURRENCY, BATCH_ARTIFACTS_DIR
+from .pipeline import run_project_setup, ASSIGNMENT, WORKFLOW, NAMING
+from .scheduling import request_priority, BATCH
+
+_UNSAFE_NAME_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def project_id(project: Dict[str, Any]) -> str:
+    """Returns the project's ``id``, or a stable hash of its description and team."""
+    if project.get("id"):
+        return str(project["id"])
+    payload = json.dumps([project.get("description", ""), project.get("team_members", [])], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Returns the ids of projects that already have a successful result in ``output_path``."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A line cut short by an interruption
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def artifacts_dirname(pid: str) -> str:
+    """
+    Returns a directory name for the project's artifacts that cannot leave the artifacts directory.
+
+    Ids that are not plain file names (e.g. ``../x``) have the unsafe characters
+    replaced, plus a hash of the id so different ids never share a directory.
+    """
+    name = _UNSAFE_NAME_CHARACTERS.sub("_", pid)
+    if name == pid and not name.startswith("."):
+        return name
+    return f"{name.lstrip('.')}-{hashlib.sha256(pid.encode('utf-8')).hexdigest()[:8]}"
+
+
+def iter_projects(input_path: str) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Yields ``(id, project, error)`` for every non-empty input line.
+
+    A line that is not a JSON object yields ``("line-<number>", None, reason)``.
+    """
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                project = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield f"line-{line_number}", None, f"Line {line_number} is not valid JSON: {e}"
+                continue
+            if not isinstance(project, dict):
+                yield f"line-{line_number}", None, f"Line {line_number} is not a JSON object."
+                continue
+            yield project_id(project), project, None
+
+
+def process_project(client, project: Dict[str, Any], pid: str, artifacts_dir: str) -> Dict[str, Any]:
+    """Runs the pipeline for one project, writes its artifacts and returns its result record."""
+    record: Dict[str, Any] = {"id": pid}
+    try:
+        # Bulk work queues behind interactive sessions sharing the same API key
+        with request_priority(BATCH):
+            result = run_project_setup(client, project["description"], project.get("team_members", []))
+        artifacts = {}
+        if result["project_zip"]:
+            project_dir = os.path.join(artifacts_dir, artifacts_dirname(pid))
+            os.makedirs(project_dir, exist_ok=True)
+            zip_path = os.path.join(project_dir, "project_structure.zip")
+            with open(zip_path, "wb") as f:
+                f.write(result["project_zip"])
+            artifacts["project_structure"] = zip_path
+        record.update({
+            "status": "error" if result["errors"] else "ok",
+            "assignment": result[ASSIGNMENT],
+            "workflow": result[WORKFLOW],
+            "names": result[NAMING],
+            "artifacts": artifacts,
+            "errors": result["errors"],
+        })
+    except Exception as e:
+        record.update({"status": "error", "errors": {"pipeline": str(e)}})
+    return record
+
+
+def run_batch(
+    client,
+    input_path: str,
+    output_path: str,
+    artifacts_dir: str = BATCH_ARTIFACTS_DIR,
+    concurrency: int = BATCH_CONCURRENCY,
+) -> Dict[str, int]:
+    """
+    Processes every pending project in ``input_path`` with at most ``concurrency`` in flight.
+
+    Args:
+        client: The API client.
+        input_path (str): JSONL file of projects.
+        output_path (str): JSONL file results are appended to.
+        artifacts_dir (str): Directory for per-project artifacts.
+        concurrency (int): Maximum number of projects processed at the same time.
+
+    Returns:
+        Dict[str, int]: Counts of ``ok``, ``error`` and ``skipped`` projects.
+    """
+    done = completed_ids(output_path)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    concurrency = max(1, concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+            open(output_path, "a", encoding="utf-8") as out:
+        pending = set()
+
+        def write_finished(finished):
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                counts[record["status"]] += 1
+
+        try:
+            for pid, project, error in iter_projects(input_path):
+                if error is not None:
+                    out.write(json.dumps({"id": pid, "status": "error", "errors": {"input": error}}) + "\n")
+                    out.flush()
+                    counts["error"] += 1
+                    continue
+                if pid in done:
+                    counts["skipped"] += 1
+                    continue
+                done.add(pid)  # Also skips duplicate ids within the same input
+                # Keep the number of queued projects bounded instead of reading the whole file up front
+                if len(pending) >= concurrency * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write_finished(finished)
+                pending.add(executor.submit(process_project, client, project, pid, artifacts_dir))
+        finally:
+            # Results of projects already started are written even if reading the input fails
+            finished, _ = wait(pending)
+            write_finished(finished)
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run WorkUp project setups in bulk from a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one project per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--artifacts-dir", default=BATCH_ARTIFACTS_DIR, help="Directory for generated artifacts")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Projects processed at the same time")
+    parser.add_argument("--no-cache", action="store_true", help="Always request fresh responses from the model")
+    args = parser.parse_args(argv)
+
+    from . import client
+    batch_client = client.without_cache() if args.no_cache else client
+    counts = run_batch(batch_client, args.input, args.output, args.artifacts_dir, args.concurrency)
+    print(f"ok: {counts['ok']}, errors: {counts['error']}, skipped: {counts['skipped']}")
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+# functions/cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+from .llm_client import ChatClientWrapper
+from . import metrics
+
+# Request arguments that do not change the completion and are left out of the key
+_NON_SEMANTIC_KEYS = {"stream", "stream_options", "timeout", "extra_headers", "user", "cache_bypass"}
+# Completions that were cut off or filtered are not worth replaying
+_UNCACHEABLE_FINISH_REASONS = {"length", "content_filter"}
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache bounded by entry count and/or total size.
+
+    Args:
+        max_entries (Optional[int]): Maximum number of entries kept.
+        max_bytes (Optional[int]): Maximum total size of the stored values.
+        sizeof (Callable[[Any], int]): Returns the size of a value in bytes.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = len):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any):
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                return  # Larger than the whole budget; never worth caching
+            self._remove(key)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            while self._over_budget():
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._data.get(key, default)
+            self._remove(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: Hashable):
+        if key in self._data:
+            del self._data[key]
+            self._total_bytes -= self._sizes.pop(key, 0)
+
+    def _over_budget(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._total_bytes > self.max_bytes
+
+
+class ResponseCache:
+    """
+    Two-tier (memory + SQLite) cache for serialized chat completions.
+
+    The disk tier is accessed through one connection, opened up front and shared by
+    all threads under the cache's lock; close() releases it. Its total size is
+    read once and then kept up to date, so writes don't scan the table.
+
+    Args:
+        path (str): Location of the SQLite database file.
+        max_memory_entries (int): Number of responses kept in the memory tier.
+        max_disk_bytes (int): Size budget of the disk tier; least recently used rows are evicted.
+        ttl_seconds (float): Age after which an entry is treated as a miss.
+        max_memory_bytes (Optional[int]): Size budget of the memory tier (characters of the stored responses).
+    """
+
+    def __init__(self, path: str, max_memory_entries: int, max_disk_bytes: int, ttl_seconds: float,
+                 max_memory_bytes: Optional[int] = None):
+        self.path = path
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory = LRUCache(max_entries=max_memory_entries, max_bytes=max_memory_bytes,
+                                sizeof=lambda entry: len(entry[1]))
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._disk_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if not self._expired(created_at, now):
+                self.memory_hits += 1
+                return value
+            self._memory.pop(key)
+
+        with self._lock, self._conn as conn:
+            row = conn.execute("SELECT value, created_at, size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._expired(row[1], now):
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._disk_bytes -= row[2]
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+        self.disk_hits += 1
+        self._memory.set(key, (row[1], row[0]))
+        return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        self._memory.set(key, (now, value))
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn as conn:
+            replaced = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._disk_bytes += size - (replaced[0] if replaced else 0)
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall():
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+
+    def clear(self):
+        self._memory.clear()
+        with self._lock, self._conn as conn:
+            conn.execute("DELETE FROM responses")
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory.total_bytes,
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions,
+        }
+
+
+def request_fingerprint(**kwargs) -> str:
+    """
+    Builds a stable hash of a chat-completion request (model, messages and sampling parameters).
+
+    Returns:
+        str: Hex SHA-256 digest of the canonical JSON form of the request.
+    """
+    payload = {k: v for k, v in kwargs.items() if k not in _NON_SEMANTIC_KEYS}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CachedClient(ChatClientWrapper):
+    """
+    Serves repeated chat completions from a ResponseCache.
+
+    Pass ``cache_bypass=True`` to ``create`` (or construct with ``enabled=False``) to
+    always go to the wrapped client; fresh responses are still written back.
+    Streaming requests share entries with non-streaming ones: a hit is replayed as a
+    single chunk and a miss is recorded once the stream has been fully consumed.
+    """
+
+    def __init__(self, inner: Any, cache: ResponseCache, enabled: bool = True):
+        super().__init__(inner)
+        self.cache = cache
+        self.enabled = enabled
+
+    def without_cache(self) -> "CachedClient":
+        """Returns a client sharing this cache that always calls the model but still refreshes the cache."""
+        return CachedClient(self.inner, self.cache, enabled=False)
+
+    def create(self, cache_bypass: bool = False, **kwargs) -> Any:
+        from openai.types.chat import ChatCompletion
+
+        key = request_fingerprint(**kwargs)
+        if self.enabled and not cache_bypass:
+            cached = self.cache.get(key)
+            metrics.registry.record_cache_lookup(metrics.current_stage(), cached is not None)
+            if cached is not None:
+                completion = ChatCompletion.model_validate_json(cached)
+                return _replay_as_stream(completion) if kwargs.get("stream") else completion
+
+        response = self.inner.chat.completions.create(**kwargs)
+        if kwargs.get("stream"):
+            return self._record_stream(key, response)
+        if response.choices and _cacheable(response.choices[0].finish_reason):
+            self.cache.set(key, response.model_dump_json())
+        return response
+
+    def _record_stream(self, key: str, stream: Any) -> Iterator[Any]:
+        """Passes chunks through and caches the assembled completion once the stream ends."""
+        from openai.types.chat import ChatCompletion
+
+        parts: List[str] = []
+        last_chunk = None
+        finish_reason = None
+        usage = None
+        for chunk in stream:
+            last_chunk = chunk
+            if chunk.choices:
+                if chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage.model_dump()
+            yield chunk
+        # A stream that ended without a finish reason was interrupted
+        if last_chunk is not None and _cacheable(finish_reason):
+            completion = ChatCompletion.model_validate({
+                "id": last_chunk.id,
+                "object": "chat.completion",
+                "created": last_chunk.created,
+                "model": last_chunk.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(parts)},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            })
+            self.cache.set(key, completion.model_dump_json())
+
+
+def _cacheable(finish_reason: Optional[str]) -> bool:
+    """Whether a completion that ended with ``finish_reason`` is complete enough to replay."""
+    return finish_reason is not None and finish_reason not in _UNCACHEABLE_FINISH_REASONS
+
+
+def _replay_as_stream(completion: Any) -> Iterator[Any]:
+    """Presents a cached completion as a one-chunk stream."""
+    from openai.types.chat import ChatCompletionChunk
+
+    yield ChatCompletionChunk.model_validate({
+        "id": completion.id,
+        "object": "chat.completion.chunk",
+        "created": completion.created,
+        "model": completion.model,
+        "choices": [{
+            "index": 0,
+            "delta": {"role": "assistant", "content": completion.choices[0].message.content},
+            "finish_reason": completion.choices[0].finish_reason,
+        }],
+    })
@@ -0,0 +1,189 @@
+# functions/coalescing.py
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from .cache import request_fingerprint
+from .llm_client import ChatClientWrapper
+from . import metrics
+
+
+class _InFlight:
+    """One upstream call that concurrent identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.abandoned = False
+
+
+class _SharedStream:
+    """
+    Fans one upstream stream out to several consumers.
+
+    Every consumer sees all chunks from the start, whenever it joined. Whichever
+    consumer needs the next chunk pulls it from upstream; an upstream error is
+    re-raised to every consumer. If all consumers stop early the upstream stream
+    is closed and no one can join any more.
+    """
+
+    def __init__(self, upstream: Any, on_finish):
+        self._upstream = iter(upstream)
+        self._source = upstream
+        self._on_finish = on_finish
+        self._chunks: List[Any] = []
+        self._finished = False
+        self._abandoned = False
+        self._error: Optional[BaseException] = None
+        self._consumers = 0
+        # Reentrant: a consumer dropped by garbage collection may leave while this thread holds the lock
+        self._lock = threading.RLock()
+
+    def join(self) -> Optional["_StreamConsumer"]:
+        """Returns a new consumer, or None if the stream was abandoned by everyone else."""
+        with self._lock:
+            if self._abandoned:
+                return None
+            self._consumers += 1
+        return _StreamConsumer(self)
+
+    def chunk(self, index: int) -> Any:
+        """Returns chunk ``index``, pulling it from upstream if needed; raises StopIteration at the end."""
+        with self._lock:
+            # Pull under the lock so chunks are appended in upstream order
+            while index >= len(self._chunks):
+                if self._error is not None:
+                    raise self._error
+                if self._finished:
+                    raise StopIteration
+                try:
+                    self._chunks.append(next(self._upstream))
+                except StopIteration:
+                    self._finished = True
+                    self._on_finish()
+                except BaseException as e:
+                    self._error = e
+                    self._on_finish()
+            return self._chunks[index]
+
+    def leave(self):
+        with self._lock:
+            self._consumers -= 1
+            abandon = self._consumers == 0 and not self._finished and self._error is None
+            self._abandoned = self._abandoned or abandon
+        if abandon:
+            self._on_finish()
+            close = getattr(self._source, "close", None)
+            if close is not None:
+                close()
+
+
+class _StreamConsumer:
+    """One caller's position in a shared stream; leaving is detected even if it is never iterated."""
+
+    def __init__(self, stream: _SharedStream):
+        self._stream = stream
+        self._index = 0
+        self._left = False
+
+    def __iter__(self) -> "_StreamConsumer":
+        return self
+
+    def __next__(self) -> Any:
+        if self._left:
+            raise StopIteration
+        try:
+            chunk = self._stream.chunk(self._index)
+        except BaseException:
+            self.close()
+            raise
+        self._index += 1
+        return chunk
+
+    def close(self):
+        if not self._left:
+            self._left = True
+            self._stream.leave()
+
+    def __del__(self):
+        self.close()
+
+
+class CoalescingClient(ChatClientWrapper):
+    """
+    Shares one upstream call between concurrent identical chat-completion requests.
+
+    Requests are matched by request_fingerprint (plus whether they stream). The first
+    caller makes the call; callers that arrive while it is in flight wait for it and
+    receive the same response, or the same exception. If the first caller is
+    interrupted (anything that is not an ``Exception``, e.g. KeyboardInterrupt), a
+    waiting caller retries the request instead of failing. Streams are shared chunk
+    by chunk and replayed from the start to late joiners.
+
+    Sits below the response cache: the cache answers repeats of finished requests,
+    this layer covers the window while the first one is still running.
+    """
+
+    def __init__(self, inner: Any):
+        super().__init__(inner)
+        self._in_flight: Dict[Tuple[str, bool], _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        """Number of distinct upstream calls currently shared."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def create(self, **kwargs) -> Any:
+        key = (request_fingerprint(**kwargs), bool(kwargs.get("stream")))
+        while True:
+            with self._lock:
+                entry = self._in_flight.get(key)
+                leader = entry is None
+                if leader:
+                    entry = self._in_flight[key] = _InFlight()
+            if leader:
+                return self._lead(key, entry, kwargs)
+
+            metrics.registry.record_coalesced(metrics.current_stage())
+            entry.done.wait()
+            if entry.abandoned:
+                continue  # The first caller was cancelled; try again, possibly as the new leader
+            if entry.error is not None:
+                raise entry.error
+            if not key[1]:
+                return entry.result
+            consumer = entry.result.join()
+            if consumer is not None:
+                return consumer
+            # Everyone else stopped reading the stream before it ended; start a new one
+
+    def _lead(self, key: Tuple[str, bool], entry: _InFlight, kwargs: Dict[str, Any]) -> Any:
+        def finish():
+            with self._lock:
+                if self._in_flight.get(key) is entry:
+                    del self._in_flight[key]
+
+        try:
+            response = self.inner.chat.completions.create(**kwargs)
+        except Exception as e:
+            entry.error = e
+            finish()
+            entry.done.set()
+            raise
+        except BaseException:
+            entry.abandoned = True
+            finish()
+            entry.done.set()
+            raise
+
+        if key[1]:
+            # The entry stays registered until the stream ends, so later callers can join it
+            entry.result = _SharedStream(response, finish)
+            consumer = entry.result.join()
+            entry.done.set()
+            return consumer
+        entry.result = response
+        finish()
+        entry.done.set()
+        return response
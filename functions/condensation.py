@@ -0,0 +1,182 @@
+# functions/condensation.py
+
+import contextvars
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from openai import OpenAI, OpenAIError
+from config import (
+    MODEL_NAME,
+    CONDENSE_TOKEN_BUDGET,
+    CONDENSE_CHUNK_TOKENS,
+    CONDENSE_CHARS_PER_TOKEN,
+    CONDENSE_MAX_WORKERS,
+)
+from .cache import LRUCache
+from .errors import LLMError
+from .metrics import timed
+
+# Maximum number of summarize-and-merge rounds before the brief is truncated
+_MAX_REDUCE_ROUNDS = 3
+
+_brief_cache = LRUCache(max_entries=64)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text.
+
+    Uses a characters-per-token ratio, which is close enough for budgeting prompts
+    and needs no tokenizer for the configured model.
+    """
+    return (len(text) + CONDENSE_CHARS_PER_TOKEN - 1) // CONDENSE_CHARS_PER_TOKEN
+
+
+def chunk_text(text: str, chunk_tokens: int = CONDENSE_CHUNK_TOKENS) -> List[str]:
+    """
+    Splits text into chunks of at most ``chunk_tokens`` estimated tokens.
+
+    Paragraph boundaries are kept where possible; paragraphs that are larger than a
+    chunk on their own are cut at the character limit.
+
+    Args:
+        text (str): The text to split.
+        chunk_tokens (int): The token budget of one chunk.
+
+    Returns:
+        List[str]: The chunks in document order.
+    """
+    max_chars = max(1, chunk_tokens * CONDENSE_CHARS_PER_TOKEN)
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)]
+        for piece in pieces:
+            if current and current_len + len(piece) + 2 > max_chars:
+                chunks.append("\n\n".join(current))
+                current, current_len = [], 0
+            current.append(piece)
+            current_len += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+@timed("condense_chunk")
+def summarize_chunk(client: OpenAI, chunk: str, target_tokens: int) -> Tuple[str, bool]:
+    """
+    Summarizes one chunk of a project description into roughly ``target_tokens`` tokens.
+
+    If the provider request fails or returns no text (e.g. a refusal or a filtered
+    response) the chunk is truncated to the target size instead, so a single failed
+    call never drops a part of the description entirely. A summary cut off at the
+    token limit is kept but reported as incomplete.
+
+    Returns:
+        Tuple[str, bool]: The summary and whether the model summarized the whole chunk
+        (False if truncated or cut off).
+    """
+    try:
+        response = client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You condense project specifications. Keep goals, scope, deliverables, constraints, technologies and deadlines; drop boilerplate.",
+                },
+                {
+                    "role": "user",
+                    "content": f"Summarize this part of a project description in at most {target_tokens} tokens:\n\n{chunk}",
+                },
+            ],
+            max_tokens=target_tokens,
+        )
+    except (OpenAIError, LLMError):
+        return chunk[:target_tokens * CONDENSE_CHARS_PER_TOKEN], False
+    choice = response.choices[0] if response.choices else None
+    summary = (choice.message.content or "").strip() if choice is not None else ""
+    if not summary:
+        return chunk[:target_tokens * CONDENSE_CHARS_PER_TOKEN], False
+    return summary, choice.finish_reason != "length"
+
+
+@timed("condense")
+def condense_brief(
+    client: OpenAI,
+    project_description: str,
+    token_budget: int = CONDENSE_TOKEN_BUDGET,
+    chunk_tokens: int = CONDENSE_CHUNK_TOKENS,
+) -> Tuple[str, bool]:
+    """
+    Returns a project brief that fits within ``token_budget`` estimated tokens, and whether it is complete.
+
+    Descriptions within the budget are returned unchanged. Longer ones are chunked,
+    the chunks are summarized concurrently (map) and the summaries are joined; if
+    the result is still too long the process repeats on the summaries (reduce).
+    Briefs are memoized by a hash of the input so every downstream prompt reuses
+    the same one. A brief in which any chunk fell back to truncation (the provider
+    failed) is not memoized, so it is retried next time.
+
+    Args:
+        client (OpenAI): The API client.
+        project_description (str): The full project description.
+        token_budget (int): Maximum size of the brief in estimated tokens.
+        chunk_tokens (int): Size of the chunks sent for summarization.
+
+    Returns:
+        Tuple[str, bool]: The brief and False if it was degraded by truncated chunks.
+    """
+    if estimate_tokens(project_description) <= token_budget:
+        return project_description, True
+
+    key = (hashlib.sha256(project_description.encode("utf-8")).hexdigest(), token_budget, chunk_tokens)
+    brief: Optional[str] = _brief_cache.get(key)
+    if brief is not None:
+        return brief, True
+
+    brief = project_description
+    complete = True
+    for _ in range(_MAX_REDUCE_ROUNDS):
+        if estimate_tokens(brief) <= token_budget:
+            break
+        chunks = chunk_text(brief, chunk_tokens)
+        # Share the budget between chunks so the joined summaries fit in one pass
+        target_tokens = max(64, token_budget // len(chunks))
+        with ThreadPoolExecutor(max_workers=max(1, min(CONDENSE_MAX_WORKERS, len(chunks)))) as executor:
+            # One copy of the caller's context per chunk, so e.g. its request priority applies in the workers
+            contexts = [contextvars.copy_context() for _ in chunks]
+            results = list(executor.map(
+                lambda context, chunk: context.run(summarize_chunk, client, chunk, target_tokens), contexts, chunks
+            ))
+        brief = "\n\n".join(summary for summary, _ in results)
+        complete = complete and all(summarized for _, summarized in results)
+
+    brief = brief[:token_budget * CONDENSE_CHARS_PER_TOKEN]
+    if complete:
+        _brief_cache.set(key, brief)
+    return brief, complete
+
+
+def condense_description(
+    client: OpenAI,
+    project_description: str,
+    token_budget: int = CONDENSE_TOKEN_BUDGET,
+    chunk_tokens: int = CONDENSE_CHUNK_TOKENS,
+) -> str:
+    """
+    Returns a project brief that fits within ``token_budget`` estimated tokens (see condense_brief).
+
+    Args:
+        client (OpenAI): The API client.
+        project_description (str): The full project description.
+        token_budget (int): Maximum size of the brief in estimated tokens.
+        chunk_tokens (int): Size of the chunks sent for summarization.
+
+    Returns:
+        str: The condensed brief.
+    """
+    return condense_brief(client, project_description, token_budget, chunk_tokens)[0]
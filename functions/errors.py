@@ -0,0 +1,75 @@
+# functions/errors.py
+
+from typing import Optional
+
+
+class LLMError(Exception):
+    """Base class for failures of a chat-completion request."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMConnectionError(LLMError):
+    """The provider could not be reached."""
+
+
+class LLMTimeoutError(LLMConnectionError):
+    """The provider did not answer within the configured timeout."""
+
+
+class LLMRateLimitError(LLMError):
+    """The provider rejected the request with HTTP 429."""
+
+    def __init__(self, message: str, status_code: Optional[int] = 429, retry_after: Optional[float] = None):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
+
+class LLMServerError(LLMError):
+    """The provider answered with a 5xx status."""
+
+
+class LLMRequestError(LLMError):
+    """The request itself was rejected (4xx other than 429); retrying will not help."""
+
+
+class CircuitOpenError(LLMError):
+    """Requests are short-circuited because the provider has been failing."""
+
+
+def as_llm_error(error: Exception) -> LLMError:
+    """
+    Converts an OpenAI client exception into the matching LLMError subclass.
+
+    Args:
+        error (Exception): The exception raised by the OpenAI client.
+
+    Returns:
+        LLMError: The typed error; ``error`` itself if it already is one.
+    """
+    if isinstance(error, LLMError):
+        return error
+    import httpx
+    import openai
+
+    message = f"API request failed: {str(error)}"
+    if isinstance(error, (openai.APITimeoutError, httpx.TimeoutException)):
+        return LLMTimeoutError(message)
+    if isinstance(error, (openai.APIConnectionError, httpx.HTTPError)):
+        return LLMConnectionError(message)
+    if isinstance(error, openai.RateLimitError):
+        return LLMRateLimitError(message, retry_after=_retry_after(error))
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code >= 500:
+            return LLMServerError(message, error.status_code)
+        return LLMRequestError(message, error.status_code)
+    return LLMError(message)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
@@ -0,0 +1,200 @@
+# functions/expertise_index.py
+
+import hashlib
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+from config import (
+    EXPERTISE_PROMPT_TOKEN_BUDGET,
+    EXPERTISE_SUMMARY_TERMS,
+    EXPERTISE_COMPACT_MIN_CHARS,
+    EXPERTISE_SHORTLIST_SIZE,
+    EXPERTISE_MAX_AREAS,
+)
+from .cache import LRUCache
+from .condensation import estimate_tokens
+
+# Words that say nothing about what a member can work on
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in into is it of on or our that the their this to was we "
+    "will with who can also over than very well all any both each more most other some such about experience "
+    "experienced expert expertise skilled skills knowledge years year good strong senior junior".split()
+)
+_TERM = re.compile(r"[a-z][a-z0-9+#.]*")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+# Project terms count this much more when choosing which expertise terms to keep
+_PROJECT_BOOST = 2.0
+
+_index_cache = LRUCache(max_entries=32)
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lowercase terms, keeping names like "c++" and "node.js" and dropping stopwords."""
+    terms = (term.rstrip(".") for term in _TERM.findall(text.lower()))
+    return [term for term in terms if term and term not in STOPWORDS]
+
+
+class ExpertiseIndex:
+    """
+    TF-IDF vectors of a roster's expertise, for ranking members against project text.
+
+    Terms that many members share weigh less than rare ones, so a member's vector
+    is dominated by what sets them apart. Vectors are sparse dicts normalized to unit
+    length, which makes ranking a dot product.
+    """
+
+    def __init__(self, team_members: List[Dict[str, str]]):
+        self.members = [dict(member) for member in team_members]
+        counts = [Counter(tokenize(member["expertise"])) for member in self.members]
+        document_frequency = Counter(term for member_counts in counts for term in member_counts)
+        total = len(self.members)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        # Terms most of the team shares don't tell members apart, so summaries leave them out
+        self.generic = frozenset(term for term, df in document_frequency.items() if total > 2 and df * 2 > total)
+        self.vectors = [self._normalize({term: tf * self.idf[term] for term, tf in member_counts.items()})
+                        for member_counts in counts]
+
+    @staticmethod
+    def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def query_vector(self, text: str) -> Dict[str, float]:
+        """Weights the terms of ``text`` that occur in the roster; other terms cannot match anyone."""
+        counts = Counter(term for term in tokenize(text) if term in self.idf)
+        return self._normalize({term: tf * self.idf[term] for term, tf in counts.items()})
+
+    def rank(self, text: str, limit: int = EXPERTISE_SHORTLIST_SIZE) -> List[Tuple[str, float]]:
+        """
+        Ranks members by how well their expertise matches a piece of project text.
+
+        Args:
+            text (str): The project text, e.g. one area of the description.
+            limit (int): Maximum number of members returned.
+
+        Returns:
+            List[Tuple[str, float]]: (name, cosine similarity) pairs with a positive
+            score, best first.
+        """
+        query = self.query_vector(text)
+        scores = []
+        for member, vector in zip(self.members, self.vectors):
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            if score > 0:
+                scores.append((member["name"], score))
+        scores.sort(key=lambda item: -item[1])
+        return scores[:limit]
+
+    def summary(self, position: int, project_terms: frozenset = frozenset(), max_terms: int = EXPERTISE_SUMMARY_TERMS) -> str:
+        """
+        Returns a compact summary of one member's expertise.
+
+        Short expertise texts are kept verbatim. Longer ones are reduced to their
+        highest-weighted terms that are not shared by most of the team, preferring
+        terms that also occur in the project.
+
+        Args:
+            position (int): The member's position in the roster.
+            project_terms (frozenset): Terms of the project description.
+            max_terms (int): Maximum number of terms in a reduced summary.
+
+        Returns:
+            str: The summary.
+        """
+        expertise = self.members[position]["expertise"]
+        if len(expertise) <= EXPERTISE_COMPACT_MIN_CHARS:
+            return expertise
+        vector = self.vectors[position]
+        specific = [term for term in vector if term not in self.generic or term in project_terms]
+        weighted = sorted(specific, key=lambda term: -vector[term] * (_PROJECT_BOOST if term in project_terms else 1.0))
+        return ", ".join(weighted[:max_terms]) or expertise[:EXPERTISE_COMPACT_MIN_CHARS]
+
+    def summaries(self, project_description: str) -> List[str]:
+        """Returns the compact expertise summary of every member, in roster order (names need not be unique)."""
+        project_terms = frozenset(tokenize(project_description))
+        return [self.summary(i, project_terms) for i in range(len(self.members))]
+
+    def shortlist(self, project_description: str, max_areas: int = EXPERTISE_MAX_AREAS,
+                  size: int = EXPERTISE_SHORTLIST_SIZE) -> List[Tuple[str, List[str]]]:
+        """
+        Finds the best candidates for each area of a project.
+
+        The areas are the sentences of the description that match the roster most
+        strongly, in description order.
+
+        Args:
+            project_description (str): The project description.
+            max_areas (int): Maximum number of areas.
+            size (int): Maximum number of candidates per area.
+
+        Returns:
+            List[Tuple[str, List[str]]]: (area text, candidate names) pairs.
+        """
+        areas = []
+        for position, sentence in enumerate(part.strip() for part in _SENTENCE.split(project_description)):
+            weight = sum(self.idf.get(term, 0.0) for term in set(tokenize(sentence)))
+            if weight > 0:
+                areas.append((weight, position, sentence))
+        strongest = sorted(sorted(areas, key=lambda area: -area[0])[:max_areas], key=lambda area: area[1])
+        shortlist = []
+        for _, _, sentence in strongest:
+            candidates = [name for name, _ in self.rank(sentence, size)]
+            if candidates:
+                shortlist.append((sentence, candidates))
+        return shortlist
+
+
+def get_expertise_index(team_members: List[Dict[str, str]]) -> ExpertiseIndex:
+    """
+    Returns the expertise index of a roster, building it only once per distinct roster.
+
+    Args:
+        team_members (List[Dict[str, str]]): Team member names and expertise.
+
+    Returns:
+        ExpertiseIndex: The index.
+    """
+    key = hashlib.sha256(json.dumps(team_members, sort_keys=True).encode("utf-8")).hexdigest()
+    index = _index_cache.get(key)
+    if index is None:
+        index = ExpertiseIndex(team_members)
+        _index_cache.set(key, index)
+    return index
+
+
+def compact_expertise(project_description: str, team_members: List[Dict[str, str]],
+                      token_budget: int = EXPERTISE_PROMPT_TOKEN_BUDGET) -> Tuple[str, str]:
+    """
+    Builds the roster part of an assignment prompt, compacting it only when the prompt would be too long.
+
+    The expertise is sent verbatim while the description and the verbatim roster fit
+    in ``token_budget`` estimated tokens. Beyond that it is summarized with the
+    expertise index, and the shortlist is only added when the summaries saved more
+    tokens than it costs, so the roster part is never longer than the verbatim list.
+
+    Args:
+        project_description (str): The project description.
+        team_members (List[Dict[str, str]]): Team member names and expertise.
+        token_budget (int): Estimated prompt tokens up to which the expertise is kept verbatim.
+
+    Returns:
+        Tuple[str, str]: "Name: expertise" lines (summarized over budget), and "area: candidates"
+        lines (empty within budget, when the team is too small for a shortlist to narrow
+        anything down, or when it would make the prompt longer).
+    """
+    verbatim = "\n".join(f"{member['name']}: {member['expertise']}" for member in team_members)
+    if estimate_tokens(project_description) + estimate_tokens(verbatim) <= token_budget:
+        return verbatim, ""
+    index = get_expertise_index(team_members)
+    summaries = index.summaries(project_description)
+    expertise_list = "\n".join(f"{member['name']}: {summary}" for member, summary in zip(team_members, summaries))
+    if len(team_members) <= EXPERTISE_SHORTLIST_SIZE:
+        return expertise_list, ""
+    shortlist = "\n".join(
+        f"- {area[:120]} -> {', '.join(candidates)}" for area, candidates in index.shortlist(project_description)
+    )
+    if estimate_tokens(expertise_list) + estimate_tokens(shortlist) >= estimate_tokens(verbatim):
+        return expertise_list, ""
+    return expertise_list, shortlist
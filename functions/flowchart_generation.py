@@ -1,74 +1,120 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import tempfile
-import streamlit as st
-import random
+import hashlib
+import io
+import json
+import textwrap
+from typing import List, Tuple, Union
+from config import FLOWCHART_CACHE_MAX_BYTES
+from .cache import LRUCache
+from .metrics import timed
+from .assignment_parser import ParsedAssignments, parse_assignments
+
+# Rendered images keyed by a hash of the task list and output format
+_render_cache = LRUCache(max_bytes=FLOWCHART_CACHE_MAX_BYTES)
+
+_TERMINAL_COLOR = "#d3d3d3"
+
+
+def _member_color(member: str) -> str:
+    """Derives a stable light fill colour from the member name, so identical charts render identically."""
+    digest = hashlib.md5(member.encode("utf-8")).digest()
+    return "#" + "".join(f"{128 + b // 2:02x}" for b in digest[:3])
+
+
+def _render_graphviz(tasks: List[Tuple[str, str]], fmt: str) -> bytes:
+    """Lays the tasks out as a top-to-bottom chain with Graphviz ``dot``."""
+    import graphviz
+
+    graph = graphviz.Digraph("workload", format=fmt)
+    graph.attr(rankdir="TB", label="Workload Distribution Flowchart", labelloc="t", fontsize="14")
+    graph.attr("node", shape="box", style="rounded,filled", fontname="Helvetica", fontsize="10")
+    graph.attr("edge", color="gray")
+    graph.node("start", "Start", shape="ellipse", fillcolor=_TERMINAL_COLOR)
+    prev = "start"
+    for index, (member, task) in enumerate(tasks, start=1):
+        node_id = f"task_{index}"
+        label = f"{member}\n" + "\n".join(textwrap.wrap(task, width=40))
+        graph.node(node_id, label, fillcolor=_member_color(member))
+        graph.edge(prev, node_id)
+        prev = node_id
+    graph.node("end", "End", shape="ellipse", fillcolor=_TERMINAL_COLOR)
+    graph.edge(prev, "end")
+    return graph.pipe()
+
+
+def _render_matplotlib(tasks: List[Tuple[str, str]], fmt: str) -> bytes:
+    """Fallback for hosts without the Graphviz binaries; draws the chain on a fixed vertical layout."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    labels = ["Start"] + [f"{member}\n" + "\n".join(textwrap.wrap(task, width=40)) for member, task in tasks] + ["End"]
+    colors = [_TERMINAL_COLOR] + [_member_color(member) for member, _ in tasks] + [_TERMINAL_COLOR]
+    fig, ax = plt.subplots(figsize=(8, max(4, 1.2 * len(labels))))
+    for index, (label, color) in enumerate(zip(labels, colors)):
+        y = -index
+        ax.text(0, y, label, ha="center", va="center", fontsize=9,
+                bbox=dict(boxstyle="round", facecolor=color, edgecolor="gray"))
+        if index:
+            ax.annotate("", xy=(0, y + 0.3), xytext=(0, y + 0.7), arrowprops=dict(arrowstyle="->", color="gray"))
+    ax.set_xlim(-1, 1)
+    ax.set_ylim(-len(labels), 1)
+    ax.set_title("Workload Distribution Flowchart", fontsize=14)
+    ax.axis('off')
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches="tight")
+    plt.close(fig)  # Close the figure to free memory
+    return buffer.getvalue()
+
+
+def render_flowchart(tasks: List[Tuple[str, str]], fmt: str = "png") -> bytes:
+    """
+    Renders a (member, task) chain as an image, reusing earlier renders of the same list.
+
+    Args:
+        tasks (List[Tuple[str, str]]): The tasks in flow order.
+        fmt (str): Output format, "png" or "svg".
+
+    Returns:
+        bytes: The encoded image.
+    """
+    key = (hashlib.sha256(json.dumps(tasks).encode("utf-8")).hexdigest(), fmt)
+    image = _render_cache.get(key)
+    if image is not None:
+        return image
+    import graphviz
 
-def generate_flowchart(workload_distribution: str) -> str:
     try:
-        # Parse the workload_distribution to extract tasks and assignments
-        tasks = {}
-        for line in workload_distribution.split('\n'):
-            if ':' in line:
-                member, task = line.split(':', 1)
-                tasks[member.strip()] = task.strip()
-        
-        if not tasks:
-            st.error("No tasks found to generate a flowchart.")
-            return ""
-        
-        # Create a directed graph
-        G = nx.DiGraph()
-        G.add_node('Start', label='Start')
-        G.add_node('End', label='End')
-
-        prev = 'Start'
-        colors = ["#d3d3d3"]  # Color for the Start node
-        unique_members = list(set(tasks.keys()))
-        member_colors = {member: f"#{random.randint(0, 0xFFFFFF):06x}" for member in unique_members}  # Assign random color for each member
-
-        for member, task in tasks.items():
-            node_name = ''.join(e for e in member if e.isalnum() or e == '_')
-            if not node_name:
-                node_name = f"Member_{list(tasks.keys()).index(member) + 1}"
-            G.add_node(node_name, label=f"{member}\n{task}")
-            G.add_edge(prev, node_name)
-            prev = node_name
-            colors.append(member_colors[member])  # Add color based on member
-
-        G.add_edge(prev, 'End')
-        colors.append("#d3d3d3")  # Color for 'End' node
-
-        # Define a shell layout or a spring layout for better flowchart structure
-        pos = nx.spring_layout(G, seed=42)  # Use spring layout for a more natural flow
-
-        # Draw the flowchart with distinct colors and labels
-        plt.figure(figsize=(10, 8))
-        nx.draw(
-            G, pos,
-            with_labels=True,
-            labels=nx.get_node_attributes(G, 'label'),
-            node_size=4000,
-            node_color=colors,  # Apply different colors to members
-            font_size=10,
-            font_color='black',
-            font_weight='bold',
-            arrows=True,
-            edge_color="gray"
-        )
-
-        # Add title and improve aesthetics
-        plt.title("Workload Distribution Flowchart", fontsize=14)
-        plt.axis('off')  # Hide axes for better presentation
-
-        # Save the flowchart to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmpfile:
-            plt.savefig(tmpfile.name, format='png')
-            plt.close()  # Close the plot to free memory
-            flowchart_path = tmpfile.name
-        
-        return flowchart_path
-
-    except Exception as e:
-        st.error(f"Flowchart generation failed: {str(e)}")
-        return ""
+        image = _render_graphviz(tasks, fmt)
+    except graphviz.ExecutableNotFound:
+        image = _render_matplotlib(tasks, fmt)
+    _render_cache.set(key, image)
+    return image
+
+
+@timed("flowchart")
+def generate_flowchart(workload_distribution: Union[str, ParsedAssignments], fmt: str = "png") -> bytes:
+    """
+    Renders the task assignments as a flowchart image.
+
+    Runs on job worker threads, so failures (including rendering errors) are raised
+    for the caller to record rather than reported with Streamlit.
+
+    Args:
+        workload_distribution (Union[str, ParsedAssignments]): The task assignments.
+        fmt (str): Output format, "png" or "svg".
+
+    Returns:
+        bytes: The encoded image.
+
+    Raises:
+        ValueError: If there are no tasks.
+    """
+    # Parse the workload_distribution to extract tasks and assignments
+    if isinstance(workload_distribution, str):
+        workload_distribution = parse_assignments(workload_distribution)
+    tasks = workload_distribution.by_member()
+
+    if not tasks:
+        raise ValueError("No tasks found to generate a flowchart.")
+
+    return render_flowchart(tasks, fmt)
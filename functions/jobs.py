@@ -0,0 +1,424 @@
+# functions/jobs.py
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from config import (
+    JOBS_DIR,
+    JOB_WORKERS,
+    JOB_STREAM_PERSIST_SECONDS,
+    JOB_RETENTION_SECONDS,
+    JOB_MAX_IN_MEMORY,
+    JOB_PRUNE_INTERVAL_SECONDS,
+    SIMILARITY_ENABLED,
+    STRUCTURED_MODE,
+)
+from .pipeline import run_llm_stages, ASSIGNMENT, WORKFLOW, NAMING
+from .condensation import condense_brief
+from .assignment_parser import parse_assignments
+from .flowchart_generation import generate_flowchart
+from .project_structure_generation import generate_project_structure
+from .metrics import stage_timer
+from .similarity import get_similarity_index
+from .artifacts import get_artifact_store
+from .stage_graph import (
+    StageMemo, content_hash, EXTRACTION, TEAM, BRIEF, PARSED_ASSIGNMENTS, FLOWCHART, SCAFFOLD,
+)
+
+# Stage names in display order
+JOB_STAGES = [BRIEF, ASSIGNMENT, WORKFLOW, NAMING, FLOWCHART, SCAFFOLD]
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+logger = logging.getLogger("workup.jobs")
+
+
+def job_fingerprint(project_description: str, team_members: List[Dict[str, str]]) -> str:
+    """Hash of the job inputs, used to reattach to an identical job instead of starting a new one."""
+    payload = json.dumps([project_description, team_members], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Job:
+    """
+    State of one project setup run, safe to read from the script thread while a worker updates it.
+
+    ``stages`` maps each stage name to ``{"status", "text", "error", "seconds", "reused", "memoized"}``
+    (``memoized``: kept from an earlier run with the same inputs, see stage_graph);
+    binary outputs (flowchart, scaffold ZIP) are in the artifact store, and ``artifacts``
+    maps their stage to the artifact id. ``error`` is the reason the job failed outside
+    any single stage, if it did.
+    """
+
+    def __init__(self, job_id: str, fingerprint: str, project_description: str, team_members: List[Dict[str, str]]):
+        self.id = job_id
+        self.fingerprint = fingerprint
+        self.project_description = project_description
+        self.team_members = team_members
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.stages: Dict[str, Dict[str, Any]] = {
+            stage: {"status": QUEUED, "text": "", "error": None, "seconds": None, "reused": False, "memoized": False}
+            for stage in JOB_STAGES
+        }
+        self.artifacts: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def update_stage(self, stage: str, **fields):
+        with self._lock:
+            self.stages[stage].update(fields)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a consistent copy of the job state."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "fingerprint": self.fingerprint,
+                "project_description": self.project_description,
+                "team_members": self.team_members,
+                "status": self.status,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+                "stages": copy.deepcopy(self.stages),
+                "artifacts": dict(self.artifacts),
+            }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict[str, Any]) -> "Job":
+        job = cls(data["id"], data["fingerprint"], data["project_description"], data["team_members"])
+        job.status = data["status"]
+        job.created_at = data["created_at"]
+        job.finished_at = data.get("finished_at")
+        job.error = data.get("error")
+        job.stages.update(data["stages"])
+        job.artifacts.update(data.get("artifacts", {}))
+        return job
+
+
+class JobManager:
+    """
+    Runs project setups on a worker pool outside the Streamlit script thread.
+
+    Jobs are persisted under ``jobs_dir`` as they progress, so a rerun, a new
+    session or a server restart can reattach to them by id. Submitting inputs that
+    match a queued, running or successfully finished job returns that job instead
+    of redoing the work; failed jobs are retried.
+
+    Finished jobs are deleted ``retention_seconds`` after they finished, and at
+    most ``max_in_memory`` finished jobs are kept in memory.
+    """
+
+    def __init__(self, jobs_dir: str = JOBS_DIR, max_workers: int = JOB_WORKERS,
+                 retention_seconds: Optional[float] = JOB_RETENTION_SECONDS, max_in_memory: int = JOB_MAX_IN_MEMORY):
+        self.jobs_dir = jobs_dir
+        self.retention_seconds = retention_seconds
+        self.max_in_memory = max_in_memory
+        os.makedirs(jobs_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="workup-job")
+        self._jobs: Dict[str, Job] = {}
+        self._by_fingerprint: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._last_prune: Optional[float] = None
+
+    def submit(self, client: Any, project_description: str, team_members: List[Dict[str, str]],
+               reuse: bool = True, prefilled: Optional[Dict[str, str]] = None,
+               structured: bool = STRUCTURED_MODE, prefetched: Optional[Dict[str, str]] = None,
+               memoize: bool = True, regenerate: Iterable[str] = ()) -> Job:
+        """
+        Starts a job for the inputs, or returns an existing one for the same inputs.
+
+        Args:
+            client: The API client the job uses.
+            project_description (str): The project description.
+            team_members (List[Dict[str, str]]): Team member names and expertise.
+            reuse (bool): Return a matching job that has not failed instead of starting a new one
+                (unless its artifacts have expired; the new job rebuilds them from the memo).
+            prefilled (Optional[Dict[str, str]]): LLM stage results to use instead of calling the
+                model, e.g. from a similar earlier project.
+            structured (bool): Try to generate the LLM stages with a single structured call.
+            prefetched (Optional[Dict[str, str]]): LLM stage results generated speculatively for
+                these inputs (see prefetch), used like ``prefilled`` but not reported as reused.
+            memoize (bool): Reuse stage outputs memoized for the same inputs (see stage_graph).
+            regenerate (Iterable[str]): Stages to recompute even if their inputs are unchanged;
+                their downstream stages are recomputed if the new output differs.
+
+        Returns:
+            Job: The job.
+        """
+        self.prune()
+        fingerprint = job_fingerprint(project_description, team_members)
+        with self._lock:
+            existing = self._jobs.get(self._by_fingerprint.get(fingerprint, ""))
+            if (reuse and existing is not None and existing.status in (QUEUED, RUNNING, DONE)
+                    and not self._artifacts_expired(existing)):
+                return existing
+            job = Job(uuid.uuid4().hex, fingerprint, project_description, team_members)
+            for stage, text in (prefilled or {}).items():
+                job.update_stage(stage, status=DONE, text=text, reused=True)
+            for stage, text in (prefetched or {}).items():
+                if job.stages[stage]["status"] != DONE:
+                    job.update_stage(stage, status=DONE, text=text)
+            self._jobs[job.id] = job
+            self._by_fingerprint[fingerprint] = job.id
+        self._persist(job)
+        self._executor.submit(self._run, client, job, structured, memoize, regenerate)
+        return job
+
+    @staticmethod
+    def _artifacts_expired(job: Job) -> bool:
+        """Whether a finished job's flowchart or scaffold has been evicted from the artifact store."""
+        if job.status != DONE:
+            return False
+        store = get_artifact_store()
+        with job._lock:
+            artifact_ids = list(job.artifacts.values())
+        return any(not store.has(artifact_id) for artifact_id in artifact_ids)
+
+    def regenerate(self, client: Any, job: Job, stage: str) -> Job:
+        """
+        Starts a new job for the inputs of ``job`` that recomputes one stage.
+
+        Every other stage is taken from the memo unless it depends on the regenerated output.
+
+        Args:
+            client: The API client the job uses.
+            job (Job): The job whose inputs are used.
+            stage (str): The stage to recompute.
+
+        Returns:
+            Job: The new job.
+        """
+        return self.submit(client, job.project_description, job.team_members, reuse=False, structured=False,
+                           regenerate=[stage])
+
+    def prune(self, force: bool = False):
+        """
+        Deletes expired finished jobs and drops the oldest finished jobs from memory.
+
+        Runs at most every JOB_PRUNE_INTERVAL_SECONDS unless ``force`` is set.
+        """
+        now = time.time()
+        with self._lock:
+            if not force and self._last_prune is not None and now - self._last_prune < JOB_PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = now
+            finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at or 0)
+            expired = [job for job in finished if self._expired(job.finished_at, now)]
+            evicted = finished[len(expired):][:max(0, len(finished) - len(expired) - self.max_in_memory)]
+            for job in expired + evicted:
+                del self._jobs[job.id]
+                if self._by_fingerprint.get(job.fingerprint) == job.id:
+                    del self._by_fingerprint[job.fingerprint]
+            in_memory = set(self._jobs)
+
+        if self.retention_seconds is None:
+            return
+        for job_id in os.listdir(self.jobs_dir):
+            path = os.path.join(self._job_dir(job_id), "job.json")
+            if job_id in in_memory or not os.path.exists(path):
+                continue
+            # The record is last written when the job finishes
+            if self._expired(os.path.getmtime(path), now):
+                shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def _expired(self, finished_at: Optional[float], now: float) -> bool:
+        return self.retention_seconds is not None and finished_at is not None and now - finished_at > self.retention_seconds
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Returns the job with this id from memory or disk, or None if it is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    def _run(self, client: Any, job: Job, structured: bool = False, memoize: bool = True,
+             regenerate: Iterable[str] = ()):
+        with job._lock:
+            job.status = RUNNING
+        self._persist(job)
+        try:
+            memo = StageMemo()
+            regenerate = set(regenerate)
+            hashes = {EXTRACTION: content_hash(job.project_description), TEAM: content_hash(job.team_members)}
+
+            def memoized(stage: str) -> Optional[str]:
+                if not memoize or stage in regenerate:
+                    return None
+                return memo.get_text(memo.key(stage, hashes))
+
+            pending = [stage for stage in (ASSIGNMENT, WORKFLOW, NAMING) if job.stages[stage]["status"] != DONE]
+            if pending:
+                brief = memoized(BRIEF)
+                if brief is not None:
+                    job.update_stage(BRIEF, status=DONE, text=brief, memoized=True)
+                else:
+                    complete = {}
+
+                    def condense() -> str:
+                        text, complete[BRIEF] = condense_brief(client, job.project_description)
+                        return text
+
+                    brief = self._run_stage(job, BRIEF, condense)
+                    # A brief with truncated chunks (provider errors) is retried next time instead
+                    if brief and complete[BRIEF]:
+                        memo.put_text(memo.key(BRIEF, hashes), brief)
+                hashes[BRIEF] = content_hash(brief)
+            else:
+                brief = job.project_description
+                job.update_stage(BRIEF, status=DONE, text=brief)
+
+            # Only stages whose inputs changed since an earlier run (or that are regenerated) call the model
+            for stage in list(pending):
+                text = memoized(stage)
+                if text is not None:
+                    job.update_stage(stage, status=DONE, text=text, memoized=True)
+                    pending.remove(stage)
+            for stage in pending:
+                job.update_stage(stage, status=RUNNING)
+            self._persist(job)
+            # Regenerated stages must not be answered from the response cache either
+            try:
+                llm_client = client.without_cache() if regenerate else client
+            except AttributeError:  # No response cache in this client stack
+                llm_client = client
+            last_persist = time.monotonic()
+            assignments = None
+            for event in run_llm_stages(llm_client, brief, job.team_members, stream=True, stages=pending,
+                                        structured=structured):
+                if event.error is not None:
+                    job.update_stage(event.stage, status=FAILED, error=str(event.error))
+                elif event.done:
+                    job.update_stage(event.stage, status=DONE, text=event.text)
+                    if event.stage == ASSIGNMENT:
+                        assignments = event.data
+                else:
+                    job.update_stage(event.stage, text=event.text)
+                if event.done or time.monotonic() - last_persist >= JOB_STREAM_PERSIST_SECONDS:
+                    self._persist(job)
+                    last_persist = time.monotonic()
+            for stage in (ASSIGNMENT, WORKFLOW, NAMING):
+                progress = job.stages[stage]
+                key = memo.key(stage, hashes)
+                # Results reused from a similar project are not the output of these inputs
+                if key and progress["status"] == DONE and not progress["reused"] and not progress["memoized"]:
+                    memo.put_text(key, progress["text"])
+
+            if assignments is None:
+                assignments = parse_assignments(job.stages[ASSIGNMENT]["text"])
+            if assignments:
+                hashes[PARSED_ASSIGNMENTS] = content_hash(assignments.as_rows())
+                for stage, build in ((FLOWCHART, generate_flowchart), (SCAFFOLD, generate_project_structure)):
+                    key = memo.key(stage, hashes)
+                    artifact_id = memo.get_artifact(key) if memoize and stage not in regenerate else None
+                    if artifact_id is not None:
+                        job.update_stage(stage, status=DONE, memoized=True)
+                    else:
+                        try:
+                            data = self._run_stage(job, stage, lambda: build(assignments))
+                        except Exception:
+                            continue  # The reason is on the stage; build the other artifacts anyway
+                        artifact_id = memo.put_artifact(key, data) if data else None
+                    if artifact_id is not None:
+                        with job._lock:
+                            job.artifacts[stage] = artifact_id
+            else:
+                for stage in (FLOWCHART, SCAFFOLD):
+                    job.update_stage(stage, status=FAILED, error="No task assignments to build from.")
+            failed = any(job.stages[stage]["status"] == FAILED for stage in JOB_STAGES)
+            final_status = FAILED if failed else DONE
+            if final_status == DONE and pending and SIMILARITY_ENABLED:
+                get_similarity_index().add(job.project_description, job.team_members, {
+                    stage: job.stages[stage]["text"] for stage in (ASSIGNMENT, WORKFLOW, NAMING)
+                })
+        except Exception as e:
+            logger.exception("Setup job %s failed", job.id)
+            final_status = FAILED
+            message = str(e) or type(e).__name__
+            with job._lock:
+                job.error = message
+                for progress in job.stages.values():
+                    if progress["status"] in (QUEUED, RUNNING):
+                        progress.update(status=FAILED, error=message)
+        with job._lock:
+            job.status = final_status
+            job.finished_at = time.time()
+        if final_status == FAILED:
+            # Submitting the same inputs again retries instead of returning this job
+            with self._lock:
+                if self._by_fingerprint.get(job.fingerprint) == job.id:
+                    del self._by_fingerprint[job.fingerprint]
+        self._persist(job)
+
+    def _run_stage(self, job: Job, stage: str, func) -> Any:
+        job.update_stage(stage, status=RUNNING)
+        self._persist(job)
+        start = time.perf_counter()
+        try:
+            with stage_timer(stage):
+                result = func()
+        except Exception as e:
+            job.update_stage(stage, status=FAILED, error=str(e), seconds=time.perf_counter() - start)
+            raise
+        text = result if isinstance(result, str) else ""
+        job.update_stage(stage, status=DONE if result else FAILED, text=text,
+                         error=None if result else "Nothing was generated.",
+                         seconds=time.perf_counter() - start)
+        return result
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _persist(self, job: Job):
+        """Writes the job record atomically."""
+        job_dir = self._job_dir(job.id)
+        os.makedirs(job_dir, exist_ok=True)
+        snapshot = job.snapshot()
+        temp_path = os.path.join(job_dir, "job.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, os.path.join(job_dir, "job.json"))
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        path = os.path.join(self._job_dir(job_id), "job.json")
+        if not os.path.basename(job_id) == job_id or not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            job = Job.from_snapshot(json.load(f))
+        if not job.finished:
+            # Its worker belonged to a previous server process
+            job.status = FAILED
+            for progress in job.stages.values():
+                if progress["status"] in (QUEUED, RUNNING):
+                    progress.update(status=FAILED, error="Interrupted by a server restart.")
+        with self._lock:
+            self._jobs.setdefault(job.id, job)
+            if job.status != FAILED:
+                self._by_fingerprint.setdefault(job.fingerprint, job.id)
+            return self._jobs[job.id]
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Returns the process-wide JobManager, shared by all Streamlit sessions."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -0,0 +1,223 @@
+# functions/large_team.py
+
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Union
+from openai import OpenAI, OpenAIError
+from config import MODEL_NAME, ASSIGNMENT_SHARD_SIZE, ASSIGNMENT_SHARD_WORKERS
+from .assignment_parser import TaskAssignment, parse_assignments
+from .errors import as_llm_error
+from .expertise_index import get_expertise_index, tokenize
+from .metrics import timed
+
+def shard_team(team_members: List[Dict[str, str]], shard_size: int = ASSIGNMENT_SHARD_SIZE) -> List[List[Dict[str, str]]]:
+    """
+    Splits a roster into groups of at most ``shard_size`` members with related expertise.
+
+    Each member is keyed by the expertise term they share with the most colleagues, so
+    e.g. all "frontend" people end up next to each other; terms used by more than half
+    of the team (like "developer") are too generic to group by. Groups are then cut
+    into shards of even size, which keeps clusters together where the size allows.
+
+    Args:
+        team_members (List[Dict[str, str]]): Team member names and expertise.
+        shard_size (int): Maximum number of members per shard.
+
+    Returns:
+        List[List[Dict[str, str]]]: The shards; a single shard for small teams.
+    """
+    shard_size = max(1, shard_size)
+    if len(team_members) <= shard_size:
+        return [list(team_members)]
+
+    terms = [set(tokenize(member["expertise"])) for member in team_members]
+    frequency = Counter(term for member_terms in terms for term in member_terms)
+    clusters: Dict[str, List[Dict[str, str]]] = {}
+    for member, member_terms in zip(team_members, terms):
+        specific = [term for term in member_terms if frequency[term] * 2 <= len(team_members)]
+        key = min(specific, key=lambda term: (-frequency[term], term)) if specific else ""
+        clusters.setdefault(key, []).append(member)
+
+    ordered = [member for _, members in sorted(clusters.items(), key=lambda item: (-len(item[1]), item[0])) for member in members]
+    num_shards = -(-len(ordered) // shard_size)
+    size = -(-len(ordered) // num_shards)
+    return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+
+def _shard_label(shard: List[Dict[str, str]]) -> str:
+    counts = Counter(term for member in shard for term in set(tokenize(member["expertise"])))
+    return ", ".join(term for term, _ in counts.most_common(3)) or "general"
+
+
+@timed("assignment_shard")
+def assign_shard(
+    client: OpenAI,
+    project_description: str,
+    shard: List[Dict[str, str]],
+    shard_index: int,
+    other_groups: List[str],
+) -> str:
+    """
+    Asks the model to assign tasks to the members of one shard.
+
+    Members are described by their compact expertise summaries (``summary``), and the prompt names
+    the focus of the other groups so the shard picks work that fits its own
+    expertise instead of duplicating theirs.
+    """
+    expertise_list = "\n".join(f"{member['name']}: {member['summary']}" for member in shard)
+    others = "\n".join(f"- Group {i}: {label}" for i, label in enumerate(other_groups, start=1) if i != shard_index + 1)
+    user_input = (
+        f"The project is described as: '{project_description}'.\n"
+        f"The team is split into {len(other_groups)} groups by expertise. You are assigning group {shard_index + 1}, "
+        f"whose members are:\n{expertise_list}.\n"
+        f"The other groups focus on:\n{others}\n"
+        "Assign each member of this group one task that fits their expertise and does not overlap with the other groups. "
+        "Answer with one line per member in the form 'Name: Task', each followed by a line "
+        "'Expected outcome: ...'. Do not add any other text."
+    )
+    response = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an AI assistant who assigns project tasks intelligently based on expertise, summarizes project details, and provides expected outcomes.",
+            },
+            {"role": "user", "content": user_input},
+        ],
+    )
+    return response.choices[0].message.content
+
+
+@timed("assignment_reconcile")
+def reconcile_assignments(
+    client: OpenAI,
+    project_description: str,
+    assignments: List[TaskAssignment],
+    unassigned: List[Dict[str, str]],
+) -> Dict[str, str]:
+    """
+    Asks the model to fix overlaps and gaps in the merged shard assignments.
+
+    Only the corrections are requested, so the response stays small however large
+    the team is.
+
+    Returns:
+        Dict[str, str]: Corrected tasks keyed by member name; empty if nothing changes.
+    """
+    current = "\n".join(f"{item.member}: {item.task}" for item in assignments)
+    missing = "\n".join(f"{member['name']}: {member['summary']}" for member in unassigned) or "None"
+    user_input = (
+        f"The project is described as: '{project_description}'.\n"
+        f"Tasks were assigned to the team in separate groups:\n{current}\n"
+        f"Members still without a task (name: expertise):\n{missing}\n"
+        "Make the distribution consistent: give every member without a task one, and change tasks that duplicate "
+        "another member's work or leave a part of the project uncovered. Answer only with the changed or new lines "
+        "in the form 'Name: Task'. If nothing needs to change, answer 'NONE'."
+    )
+    response = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=[
+            {
+                "role": "system",
+                "content": "You review project task distributions for large teams and correct duplicated or missing work.",
+            },
+            {"role": "user", "content": user_input},
+        ],
+    )
+    return {item.member: item.task for item in parse_assignments(response.choices[0].message.content or "")}
+
+
+def _format_assignments(items: List[TaskAssignment]) -> str:
+    lines = []
+    for item in items:
+        lines.append(f"{item.member}: {item.task}")
+        if item.outcome:
+            lines.append(f"Expected outcome: {item.outcome}")
+    return "\n".join(lines)
+
+
+def get_sharded_workload_distribution(
+    client: OpenAI,
+    project_description: str,
+    team_members: List[Dict[str, str]],
+    stream: bool = False,
+    shard_size: int = ASSIGNMENT_SHARD_SIZE,
+    max_workers: int = ASSIGNMENT_SHARD_WORKERS,
+) -> Union[str, Iterator[str]]:
+    """
+    Assigns tasks to a large team by sharding the roster and merging the results.
+
+    Each shard is assigned in its own request, concurrently; the results are merged
+    (lines naming members outside the shard are dropped) and a reconciliation pass
+    fixes overlaps and gives unassigned members a task. If that pass fails the merged
+    shard results are returned as they are.
+
+    Args:
+        client (OpenAI): The API client.
+        project_description (str): The project description.
+        team_members (List[Dict[str, str]]): Team member names and expertise.
+        stream (bool): Return an iterator instead of a string. The text is produced
+            as one piece once reconciliation is done, as shard results can still change.
+        shard_size (int): Maximum number of members per assignment request.
+        max_workers (int): Maximum number of shard requests in flight.
+
+    Returns:
+        Union[str, Iterator[str]]: The assignments as "Name: Task" lines with expected outcomes.
+    """
+    if stream:
+        return iter([get_sharded_workload_distribution(client, project_description, team_members,
+                                                       shard_size=shard_size, max_workers=max_workers)])
+
+    # Summaries are attached by roster position, so members who share a name keep their own
+    summaries = get_expertise_index(team_members).summaries(project_description)
+    members = [dict(member, summary=summary) for member, summary in zip(team_members, summaries)]
+    shards = shard_team(members, shard_size)
+    labels = [_shard_label(shard) for shard in shards]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shards)))) as executor:
+            # One copy of the caller's context per shard, so e.g. its request priority applies in the workers
+            contexts = [contextvars.copy_context() for _ in shards]
+            responses = list(executor.map(
+                lambda context, index, shard: context.run(
+                    assign_shard, client, project_description, shard, index, labels
+                ),
+                contexts, range(len(shards)), shards,
+            ))
+    except OpenAIError as e:
+        raise as_llm_error(e) from e
+
+    merged: List[TaskAssignment] = []
+    for shard, response in zip(shards, responses):
+        names = {member["name"].casefold(): member["name"] for member in shard}
+        for item in parse_assignments(response or ""):
+            name = names.get(item.member.casefold())
+            if name is not None:
+                merged.append(TaskAssignment(name, item.task, item.outcome))
+
+    assigned = {item.member for item in merged}
+    unassigned = [member for member in members if member["name"] not in assigned]
+    try:
+        corrections = reconcile_assignments(client, project_description, merged, unassigned)
+    except Exception:
+        corrections = {}
+
+    roster = {member["name"].casefold(): member["name"] for member in team_members}
+    corrected: Dict[str, str] = {}
+    for member, task in corrections.items():
+        name = roster.get(member.casefold())
+        if name is not None:
+            corrected[name] = task
+
+    # A corrected task replaces all of the member's lines at the position of the first one
+    result: List[TaskAssignment] = []
+    for item in merged:
+        if item.member not in corrected:
+            result.append(item)
+        elif item.member not in {entry.member for entry in result}:
+            result.append(TaskAssignment(item.member, corrected[item.member], ""))
+    # Members who only got a task in the reconciliation pass, in roster order
+    placed = {item.member for item in result}
+    result.extend(TaskAssignment(member["name"], corrected[member["name"]], "")
+                  for member in team_members if member["name"] in corrected and member["name"] not in placed)
+    return _format_assignments(result)
@@ -0,0 +1,274 @@
+# functions/llm_client.py
+
+import copy
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Optional
+from config import (
+    API_KEY,
+    BASE_URL,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_READ_TIMEOUT_SECONDS,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_MAX_DELAY_SECONDS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+)
+from .errors import (
+    CircuitOpenError,
+    LLMConnectionError,
+    LLMError,
+    LLMRateLimitError,
+    LLMServerError,
+    as_llm_error,
+)
+
+
+class ChatClientWrapper:
+    """
+    Base class for layers that sit in front of an OpenAI-compatible client.
+
+    Wrappers expose the same ``client.chat.completions.create(...)`` entry point as
+    the OpenAI client, so the stage helpers work unchanged whichever layers are
+    stacked. Subclasses override ``create``; everything else is forwarded to the
+    wrapped client.
+    """
+
+    def __init__(self, inner: Any):
+        self.inner = inner
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs) -> Any:
+        return self.inner.chat.completions.create(**kwargs)
+
+    def without_cache(self) -> "ChatClientWrapper":
+        """Returns a copy of this layer whose wrapped client skips the response cache."""
+        return self._rewrap(self.inner.without_cache())
+
+    def _rewrap(self, inner: Any) -> "ChatClientWrapper":
+        clone = copy.copy(self)
+        clone.inner = inner
+        clone.chat = SimpleNamespace(completions=SimpleNamespace(create=clone.create))
+        return clone
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for missing attributes; never forward dunders or ``inner`` itself
+        if name == "inner" or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated provider failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls are
+    rejected for ``reset_seconds``. Then a single trial call is let through: any
+    answer from the provider (including a rate limit) closes the circuit, a server
+    or connection failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def before_call(self) -> bool:
+        """
+        Raises CircuitOpenError if the call must not be attempted.
+
+        Returns:
+            bool: Whether the call is the half-open trial; it must then end with
+            record_success, record_failure or release_trial.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                raise CircuitOpenError("The model provider is unavailable; not sending requests for now.")
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """Frees the trial slot of a call that ended without an outcome (e.g. an unexpected exception)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class ResilientClient(ChatClientWrapper):
+    """
+    Retries transient failures with exponential backoff and full jitter behind a circuit breaker.
+
+    Rate limits (429), server errors (5xx), timeouts and connection errors are
+    retried up to ``max_attempts`` times; a ``Retry-After`` header is honoured.
+    Server and connection failures count towards the circuit breaker. All errors
+    are raised as LLMError subclasses.
+
+    A stream counts as a success only once it has been read to the end; errors
+    while reading it are classified the same way, and retried if no chunk had
+    been passed on yet.
+    """
+
+    def __init__(
+        self,
+        inner: Any,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY_SECONDS,
+        max_delay: float = RETRY_MAX_DELAY_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        super().__init__(inner)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+
+    def create(self, **kwargs) -> Any:
+        return self._create(kwargs, 1)
+
+    def _create(self, kwargs: Dict[str, Any], first_attempt: int) -> Any:
+        from openai import OpenAIError
+
+        for attempt in range(first_attempt, self.max_attempts + 1):
+            trial = self.breaker.before_call()
+            streaming = False
+            try:
+                try:
+                    response = self.inner.chat.completions.create(**kwargs)
+                except (OpenAIError, LLMError) as e:
+                    error = self._record_error(e)
+                    if attempt == self.max_attempts:
+                        raise error from e
+                    time.sleep(self._delay(attempt, error))
+                    continue
+                if kwargs.get("stream"):
+                    # The stream holds the trial slot and reports the outcome once it ends
+                    streaming = True
+                    return self._resilient_stream(kwargs, response, attempt, trial)
+                self.breaker.record_success()
+                return response
+            finally:
+                if trial and not streaming:
+                    # No-op after record_success/record_failure; frees the slot after any other exception
+                    self.breaker.release_trial()
+
+    def _record_error(self, e: Exception) -> LLMError:
+        """Reports a failed call to the circuit breaker; returns it as an LLMError if it can be retried, else raises it."""
+        error = as_llm_error(e)
+        if isinstance(error, (LLMServerError, LLMConnectionError)):
+            self.breaker.record_failure()
+        else:
+            # The provider answered (a rate limit or a bad request), so it is reachable
+            self.breaker.record_success()
+            if not isinstance(error, LLMRateLimitError):
+                raise error from e
+        return error
+
+    def _resilient_stream(self, kwargs: Dict[str, Any], stream: Any, attempt: int, trial: bool) -> Iterator[Any]:
+        import httpx
+        from openai import OpenAIError
+
+        received = False
+        try:
+            try:
+                for chunk in stream:
+                    received = True
+                    yield chunk
+            except GeneratorExit:
+                # The caller stopped reading; the call has no outcome to report
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+                raise
+            except (OpenAIError, LLMError, httpx.HTTPError) as e:
+                error = self._record_error(e)
+                if received or attempt == self.max_attempts:
+                    raise error from e
+            else:
+                self.breaker.record_success()
+                return
+        finally:
+            if trial:
+                self.breaker.release_trial()
+        # Failed before the first chunk was passed on, so the request can be repeated
+        time.sleep(self._delay(attempt, error))
+        yield from self._create(kwargs, attempt + 1)
+
+    def _delay(self, attempt: int, error: LLMError) -> float:
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def create_client(api_key: str = API_KEY, base_url: str = BASE_URL, scheduled: bool = True) -> ResilientClient:
+    """
+    Creates the OpenAI client with a pooled keep-alive HTTP client, explicit timeouts and retries.
+
+    The OpenAI library's own retries are disabled so that ResilientClient is the
+    only retry policy.
+
+    Args:
+        api_key (str): The API key.
+        base_url (str): The OpenAI-compatible endpoint.
+        scheduled (bool): Admit calls through the process-wide PriorityScheduler and its
+            rate limits; disable for measurements that must not include queueing.
+
+    Returns:
+        ResilientClient: The wrapped client.
+    """
+    import httpx
+    from openai import OpenAI
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+    )
+    openai_client = OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=http_client,
+        max_retries=0,
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+    )
+    if not scheduled:
+        return ResilientClient(openai_client)
+    from .scheduling import ScheduledClient, get_scheduler
+
+    # Every attempt, including retries, goes through the shared rate limiter and priority queue
+    return ResilientClient(ScheduledClient(openai_client, get_scheduler()))
@@ -0,0 +1,354 @@
+# functions/metrics.py
+
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from config import (
+    METRICS_SINKS,
+    METRICS_LOG_LEVEL,
+    METRICS_PROMETHEUS_PATH,
+    METRICS_PROMETHEUS_PORT,
+    METRICS_FILE_INTERVAL_SECONDS,
+    CONDENSE_CHARS_PER_TOKEN,
+)
+from .llm_client import ChatClientWrapper
+
+logger = logging.getLogger("workup.metrics")
+
+# Name of the stage the current thread is working on; LLM calls are attributed to it
+_current_stage: contextvars.ContextVar[str] = contextvars.ContextVar("workup_stage", default="llm")
+
+
+@dataclass
+class MetricEvent:
+    """One measured unit of work: a pipeline stage or a single LLM call."""
+    stage: str
+    kind: str  # "stage" or "llm"
+    seconds: float
+    error: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class StageStats:
+    __slots__ = ("count", "errors", "total_seconds", "max_seconds", "prompt_tokens", "completion_tokens",
+                 "cache_hits", "cache_misses", "coalesced")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+
+
+class MetricsRegistry:
+    """Aggregates MetricEvents per (kind, stage) and forwards each event to the configured sinks."""
+
+    def __init__(self, sinks: Optional[List[Callable[[MetricEvent], None]]] = None):
+        self.sinks = list(sinks or [])
+        self._stats: Dict[Tuple[str, str], StageStats] = {}
+        self._gauges: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, event: MetricEvent):
+        with self._lock:
+            stats = self._stats.setdefault((event.kind, event.stage), StageStats())
+            stats.count += 1
+            stats.errors += event.error is not None
+            stats.total_seconds += event.seconds
+            stats.max_seconds = max(stats.max_seconds, event.seconds)
+            stats.prompt_tokens += event.prompt_tokens
+            stats.completion_tokens += event.completion_tokens
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception:
+                logger.exception("Metrics sink failed")
+
+    def record_cache_lookup(self, stage: str, hit: bool):
+        """Counts a response-cache lookup against the LLM calls of ``stage``."""
+        with self._lock:
+            stats = self._stats.setdefault(("llm", stage), StageStats())
+            if hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+
+    def record_coalesced(self, stage: str):
+        """Counts an LLM call of ``stage`` that was answered by an identical request already in flight."""
+        with self._lock:
+            self._stats.setdefault(("llm", stage), StageStats()).coalesced += 1
+
+    def register_gauges(self, name: str, read: Callable[[], Dict[str, float]]):
+        """Adds current values reported by ``read`` (e.g. queue depth) to the exported metrics as ``name``."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def gauges(self) -> Dict[str, Dict[str, float]]:
+        """Reads all registered gauges."""
+        with self._lock:
+            readers = dict(self._gauges)
+        return {name: read() for name, read in readers.items()}
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Returns the aggregated statistics as one dictionary per (kind, stage)."""
+        with self._lock:
+            rows = []
+            for (kind, stage), stats in sorted(self._stats.items()):
+                rows.append({
+                    "kind": kind,
+                    "stage": stage,
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "total_seconds": round(stats.total_seconds, 4),
+                    "mean_seconds": round(stats.total_seconds / stats.count, 4) if stats.count else 0.0,
+                    "max_seconds": round(stats.max_seconds, 4),
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "cache_hits": stats.cache_hits,
+                    "cache_misses": stats.cache_misses,
+                    "coalesced": stats.coalesced,
+                })
+            return rows
+
+    def render_prometheus(self) -> str:
+        """Renders the aggregates in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE workup_duration_seconds summary",
+            "# TYPE workup_errors_total counter",
+            "# TYPE workup_tokens_total counter",
+            "# TYPE workup_cache_lookups_total counter",
+            "# TYPE workup_coalesced_requests_total counter",
+        ]
+        for row in self.snapshot():
+            labels = f'kind="{row["kind"]}",stage="{row["stage"]}"'
+            lines.append(f"workup_duration_seconds_sum{{{labels}}} {row['total_seconds']}")
+            lines.append(f"workup_duration_seconds_count{{{labels}}} {row['count']}")
+            lines.append(f"workup_errors_total{{{labels}}} {row['errors']}")
+            if row["kind"] == "llm":
+                lines.append(f'workup_tokens_total{{{labels},type="prompt"}} {row["prompt_tokens"]}')
+                lines.append(f'workup_tokens_total{{{labels},type="completion"}} {row["completion_tokens"]}')
+                lines.append(f'workup_cache_lookups_total{{{labels},result="hit"}} {row["cache_hits"]}')
+                lines.append(f'workup_cache_lookups_total{{{labels},result="miss"}} {row["cache_misses"]}')
+                lines.append(f"workup_coalesced_requests_total{{{labels}}} {row['coalesced']}")
+        for name, values in self.gauges().items():
+            for key, value in values.items():
+                lines.append(f"# TYPE workup_{name}_{key} gauge")
+                lines.append(f"workup_{name}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def log_sink(event: MetricEvent):
+    """Writes every event as one structured log line."""
+    logger.info(
+        "kind=%s stage=%s seconds=%.4f error=%s prompt_tokens=%d completion_tokens=%d",
+        event.kind, event.stage, event.seconds, event.error, event.prompt_tokens, event.completion_tokens,
+    )
+
+
+_log_handler: Optional[logging.Handler] = None
+
+
+def configure_log_sink(level: str = METRICS_LOG_LEVEL) -> logging.Logger:
+    """
+    Gives the "workup.metrics" logger its own stderr handler at ``level``.
+
+    Neither Streamlit nor the batch runner configures the root logger, so without
+    this the sink's INFO lines would be dropped. The logger does not propagate,
+    so a root handler configured elsewhere does not print every line twice.
+    Calling it again only updates the level.
+    """
+    global _log_handler
+    logger.setLevel(level)
+    if _log_handler is None:
+        _log_handler = logging.StreamHandler()
+        _log_handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(_log_handler)
+    logger.propagate = False
+    return logger
+
+
+class PrometheusFileSink:
+    """Rewrites a Prometheus text file with the registry's aggregates, at most every ``interval`` seconds."""
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = METRICS_FILE_INTERVAL_SECONDS):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, event: MetricEvent):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_write < self.interval:
+                return
+            self._last_write = now
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.registry.render_prometheus())
+        os.replace(temp_path, self.path)  # Scrapers never see a half-written file
+
+
+def start_prometheus_endpoint(registry: MetricsRegistry, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves ``/metrics`` in the Prometheus text format on a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200 if self.path == "/metrics" else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _create_registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    if "log" in METRICS_SINKS:
+        configure_log_sink()
+        registry.sinks.append(log_sink)
+    if "prometheus_file" in METRICS_SINKS and METRICS_PROMETHEUS_PATH:
+        registry.sinks.append(PrometheusFileSink(registry, METRICS_PROMETHEUS_PATH))
+    if METRICS_PROMETHEUS_PORT:
+        try:
+            start_prometheus_endpoint(registry, METRICS_PROMETHEUS_PORT)
+        except OSError:
+            logger.warning("Metrics endpoint port %s is already in use", METRICS_PROMETHEUS_PORT)
+    return registry
+
+
+# Process-wide registry used by the app, the batch runner and the client wrapper
+registry = _create_registry()
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Records the wall time and outcome of a block as a pipeline stage.
+
+    LLM calls made inside the block (on the same thread) are attributed to ``stage``.
+    """
+    token = _current_stage.set(stage)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current_stage.reset(token)
+        registry.record(MetricEvent(stage, "stage", time.perf_counter() - start, error=error))
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of stage_timer."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_stage() -> str:
+    return _current_stage.get()
+
+
+class InstrumentedClient(ChatClientWrapper):
+    """
+    Records duration, token usage and errors of every chat-completion call.
+
+    Sits below the response cache, so only calls that reach the provider (and cost
+    tokens) are recorded; CachedClient counts the hits separately.
+    """
+
+    def create(self, **kwargs) -> Any:
+        stage = current_stage()
+        start = time.perf_counter()
+        try:
+            response = self.inner.chat.completions.create(**kwargs)
+        except Exception as e:
+            registry.record(MetricEvent(stage, "llm", time.perf_counter() - start, error=type(e).__name__))
+            raise
+        if kwargs.get("stream"):
+            return self._measure_stream(stage, start, response, kwargs)
+        usage = getattr(response, "usage", None)
+        registry.record(MetricEvent(
+            stage, "llm", time.perf_counter() - start,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        ))
+        return response
+
+    def _measure_stream(self, stage: str, start: float, stream: Any, kwargs: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Passes chunks through and records the call once the stream ends.
+
+        Token counts come from the final usage chunk (requested with
+        ``stream_options={"include_usage": True}``); providers that don't send one
+        are estimated from the character counts instead.
+        """
+        characters = 0
+        usage = None
+        error = None
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices:
+                    characters += len(chunk.choices[0].delta.content or "")
+                yield chunk
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            if usage is not None:
+                prompt_tokens = usage.prompt_tokens or 0
+                completion_tokens = usage.completion_tokens or 0
+            else:
+                prompt_characters = sum(len(str(message.get("content") or "")) for message in kwargs.get("messages", []))
+                prompt_tokens = prompt_characters // CONDENSE_CHARS_PER_TOKEN
+                completion_tokens = characters // CONDENSE_CHARS_PER_TOKEN
+            registry.record(MetricEvent(
+                stage, "llm", time.perf_counter() - start, error=error,
+                prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            ))
+
+
+def render_debug_panel():
+    """Shows the aggregated metrics of this process in a Streamlit expander."""
+    import streamlit as st
+
+    with st.expander("Performance metrics"):
+        rows = registry.snapshot()
+        if not rows:
+            st.write("No measurements yet.")
+            return
+        st.dataframe(rows, use_container_width=True)
+        for name, values in registry.gauges().items():
+            st.caption(f"{name}: " + ", ".join(f"{key}={value}" for key, value in values.items()))
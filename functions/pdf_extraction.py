@@ -0,0 +1,213 @@
+# functions/pdf_extraction.py
+
+import io
+import multiprocessing
+import queue
+import signal
+import threading
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Iterator, List, Optional, Tuple, Union
+from config import (
+    PDF_MAX_PAGES,
+    PDF_CHUNK_PAGES,
+    PDF_PAGE_TIMEOUT_SECONDS,
+    PDF_CHUNK_GRACE_SECONDS,
+    PDF_MAX_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Returns the process pool shared by all extractions, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking the multithreaded Streamlit server can deadlock the child; start clean interpreters
+            _pool = ProcessPoolExecutor(max_workers=PDF_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Kills the workers of a pool with a hung chunk; the next extraction starts a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    # A running task can't be cancelled, and ProcessPoolExecutor has no public way to stop its workers
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class _PageTimeout(Exception):
+    pass
+
+
+def _raise_page_timeout(signum, frame):
+    raise _PageTimeout()
+
+
+def _extract_page_range(data: bytes, start: int, stop: int, page_timeout: Optional[float] = None) -> List[str]:
+    """
+    Extracts pages ``start`` to ``stop`` (exclusive); runs in a worker process.
+
+    Where SIGALRM is available each page gets ``page_timeout`` seconds; a page that
+    takes longer is returned as "".
+    """
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    use_alarm = (page_timeout is not None and hasattr(signal, "setitimer")
+                 and threading.current_thread() is threading.main_thread())
+    previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout) if use_alarm else None
+    pages = []
+    try:
+        for index in range(start, stop):
+            try:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, page_timeout)
+                # extract_text() returns None for pages without a text layer
+                text = reader.pages[index].extract_text() or ""
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            except _PageTimeout:
+                text = ""
+            pages.append(text)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    return pages
+
+
+def _iter_pages_serial(reader: Any, data: bytes, page_count: int, page_timeout: float) -> Iterator[str]:
+    """
+    Extracts pages in order on a helper thread, waiting at most ``page_timeout`` seconds per page.
+
+    A page that times out yields "" and the remaining pages continue on a new thread
+    with its own reader; the stuck thread can't be stopped and exits after its page.
+    """
+    import PyPDF2
+
+    index = 0
+    stopped = threading.Event()
+    try:
+        while index < page_count:
+            pages: "queue.Queue[Any]" = queue.Queue()
+            stopped = threading.Event()
+
+            def work(reader=reader, first=index, pages=pages, stopped=stopped):
+                for page_index in range(first, page_count):
+                    if stopped.is_set():
+                        return
+                    try:
+                        pages.put(reader.pages[page_index].extract_text() or "")
+                    except Exception as e:
+                        pages.put(e)
+                        return
+
+            threading.Thread(target=work, daemon=True, name="workup-pdf").start()
+            while index < page_count:
+                try:
+                    page = pages.get(timeout=page_timeout)
+                except queue.Empty:
+                    stopped.set()
+                    # The old reader may still be in use by the stuck thread
+                    reader = PyPDF2.PdfReader(io.BytesIO(data))
+                    yield ""
+                    index += 1
+                    break
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+                index += 1
+    finally:
+        stopped.set()
+
+
+def iter_pdf_pages(
+    source: Union[bytes, "io.IOBase"],
+    max_pages: Optional[int] = PDF_MAX_PAGES,
+    chunk_size: int = PDF_CHUNK_PAGES,
+    page_timeout: float = PDF_PAGE_TIMEOUT_SECONDS,
+) -> Iterator[str]:
+    """
+    Yields the text of each PDF page in order.
+
+    Small documents are read in-process. Larger ones are split into chunks of
+    ``chunk_size`` pages that are extracted in parallel on a process pool; chunks
+    are yielded in page order as soon as they are ready. A page that takes longer
+    than ``page_timeout`` seconds yields "" in either mode. If a worker does not
+    finish its chunk within the page timeouts plus PDF_CHUNK_GRACE_SECONDS (e.g. it
+    is stuck where the timeout can't interrupt it), the pool's workers are killed
+    and the remaining chunks move to a new pool.
+
+    Args:
+        source: The PDF as bytes or a binary file-like object.
+        max_pages (Optional[int]): Stop after this many pages (None for no limit).
+        chunk_size (int): Number of pages handed to a worker at a time.
+        page_timeout (float): Time budget per page.
+
+    Yields:
+        str: The text of each page ("" for pages without extractable text).
+    """
+    import PyPDF2
+
+    data = source if isinstance(source, bytes) else _read_bytes(source)
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+
+    if page_count < PDF_PARALLEL_MIN_PAGES or PDF_MAX_WORKERS <= 1:
+        yield from _iter_pages_serial(reader, data, page_count, page_timeout)
+        return
+
+    chunk_size = max(1, chunk_size)
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    def submit(pool: ProcessPoolExecutor, start: int, stop: int) -> Tuple[ProcessPoolExecutor, Future]:
+        return pool, pool.submit(_extract_page_range, data, start, stop, page_timeout)
+
+    def resubmit(first: int):
+        """Moves the unfinished chunks from ``first`` on off a discarded pool."""
+        pool = _get_pool()
+        for index in range(first, len(ranges)):
+            owner, future = futures[index]
+            finished = future.done() and not future.cancelled() and future.exception() is None
+            if owner is not pool and not finished:
+                futures[index] = submit(pool, *ranges[index])
+
+    pool = _get_pool()
+    futures = [submit(pool, start, stop) for start, stop in ranges]
+    try:
+        for index, (start, stop) in enumerate(ranges):
+            pages = [""] * (stop - start)
+            for _ in range(2):
+                owner, future = futures[index]
+                try:
+                    pages = future.result(timeout=page_timeout * (stop - start) + PDF_CHUNK_GRACE_SECONDS)
+                    break
+                except FutureTimeoutError:
+                    _discard_pool(owner)
+                    resubmit(index + 1)
+                    break
+                except (BrokenProcessPool, CancelledError):
+                    # The shared pool was discarded, by this or another extraction; retry once
+                    resubmit(index)
+            yield from pages
+    finally:
+        # Drop pending chunks if the consumer stops early
+        for _, future in futures:
+            future.cancel()
+
+
+def _read_bytes(file) -> bytes:
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
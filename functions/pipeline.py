@@ -0,0 +1,179 @@
+# functions/pipeline.py
+
+import contextvars
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from openai import OpenAI
+from config import MAX_CONCURRENT_STAGES, LARGE_TEAM_THRESHOLD, STRUCTURED_MODE
+from .workload_distribution import get_workload_distribution
+from .large_team import get_sharded_workload_distribution
+from .project_workflow import get_project_workflow
+from .project_naming import suggest_project_names
+from .condensation import condense_description
+from .assignment_parser import parse_assignments
+from .project_structure_generation import generate_project_structure
+from .structured_generation import generate_structured_setup, StructuredOutputError
+from .errors import LLMRequestError
+from .metrics import stage_timer
+
+# Stage names used as keys for results and placeholders
+ASSIGNMENT = "assignment"
+WORKFLOW = "workflow"
+NAMING = "naming"
+
+logger = logging.getLogger("workup.pipeline")
+
+
+class StageEvent(NamedTuple):
+    """
+    Progress of one stage: partial text while streaming, then a final event with ``done=True``.
+
+    ``data`` carries the already parsed result where there is one, e.g. the
+    ParsedAssignments of a structured (single-call) assignment.
+    """
+    stage: str
+    text: str
+    error: Optional[BaseException] = None
+    done: bool = False
+    data: Any = None
+
+
+def run_llm_stages(
+    client: OpenAI,
+    project_description: str,
+    team_members: List[Dict[str, str]],
+    max_workers: int = MAX_CONCURRENT_STAGES,
+    stream: bool = False,
+    stages: Optional[Iterable[str]] = None,
+    structured: bool = False,
+) -> Iterator[StageEvent]:
+    """
+    Runs the independent LLM stages concurrently and reports their progress.
+
+    Worker threads only talk to the model; events are yielded on the calling thread,
+    so it can safely update Streamlit placeholders. Teams larger than
+    LARGE_TEAM_THRESHOLD are assigned in shards (see large_team).
+
+    Args:
+        client (OpenAI): The API client shared by all stages.
+        project_description (str): The project description.
+        team_members (List[Dict[str, str]]): Team member names and expertise.
+        max_workers (int): Upper bound on the number of calls in flight.
+        stream (bool): Whether to report the accumulated text as tokens arrive.
+        stages (Optional[Iterable[str]]): Only run these stages (default: all three).
+        structured (bool): Try to produce all three stages with one JSON-schema completion
+            first; falls back to the per-stage calls if the response is malformed or the
+            provider rejects the request (other errors, e.g. an open circuit or a rate limit,
+            are raised). Only used when all three stages are requested for a team that needs
+            no sharding.
+
+    Yields:
+        StageEvent: Partial events (streaming only, coalesced to the latest text per
+        stage) and exactly one final event per stage, in completion order.
+    """
+    # One prompt with the whole roster gets slow and truncated for large teams
+    assign = get_workload_distribution if len(team_members) <= LARGE_TEAM_THRESHOLD else get_sharded_workload_distribution
+    calls = {
+        ASSIGNMENT: (assign, (client, project_description, team_members)),
+        WORKFLOW: (get_project_workflow, (client, project_description)),
+        NAMING: (suggest_project_names, (client, project_description)),
+    }
+    if stages is not None:
+        calls = {stage: call for stage, call in calls.items() if stage in set(stages)}
+    if structured and set(calls) == {ASSIGNMENT, WORKFLOW, NAMING} and len(team_members) <= LARGE_TEAM_THRESHOLD:
+        try:
+            with stage_timer("structured"):
+                setup = generate_structured_setup(client, project_description, team_members)
+        except (StructuredOutputError, LLMRequestError) as e:
+            logger.warning("Structured generation failed, falling back to one call per stage: %s", e)
+            setup = None
+        if setup is not None:
+            yield StageEvent(ASSIGNMENT, setup.assignment_text(), done=True, data=setup.assignments)
+            yield StageEvent(WORKFLOW, setup.workflow_text(), done=True, data=setup.workflow)
+            yield StageEvent(NAMING, setup.names_text(), done=True, data=setup.names)
+            return
+
+    events: "queue.Queue[StageEvent]" = queue.Queue()
+
+    def run(stage, func, args):
+        try:
+            with stage_timer(stage):
+                if not stream:
+                    events.put(StageEvent(stage, func(*args), done=True))
+                    return
+                parts = []
+                for delta in func(*args, stream=True):
+                    parts.append(delta)
+                    events.put(StageEvent(stage, "".join(parts)))
+                events.put(StageEvent(stage, "".join(parts), done=True))
+        except Exception as e:
+            events.put(StageEvent(stage, "", error=e, done=True))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for stage, (func, args) in calls.items():
+            # Copy the caller's context so e.g. its request priority applies in the worker
+            executor.submit(contextvars.copy_context().run, run, stage, func, args)
+
+        remaining = len(calls)
+        while remaining:
+            # Block for the next event, then drain whatever else has queued up so
+            # that only the latest partial text per stage is rendered
+            batch = [events.get()]
+            while True:
+                try:
+                    batch.append(events.get_nowait())
+                except queue.Empty:
+                    break
+            latest_partial: Dict[str, StageEvent] = {}
+            for event in batch:
+                if event.done:
+                    latest_partial.pop(event.stage, None)
+                    remaining -= 1
+                    yield event
+                else:
+                    latest_partial[event.stage] = event
+            yield from latest_partial.values()
+
+
+def run_project_setup(
+    client: OpenAI,
+    project_description: str,
+    team_members: List[Dict[str, str]],
+    structured: bool = STRUCTURED_MODE,
+) -> Dict[str, Any]:
+    """
+    Runs the whole setup pipeline without any UI, for batch and background use.
+
+    Args:
+        client (OpenAI): The API client.
+        project_description (str): The project description.
+        team_members (List[Dict[str, str]]): Team member names and expertise.
+        structured (bool): Try the single-call structured mode first.
+
+    Returns:
+        Dict[str, Any]: ``brief``, the text of each LLM stage keyed by stage name,
+        ``project_zip`` (bytes, empty if no tasks were found or it failed) and ``errors``
+        mapping failed stages to their messages.
+    """
+    brief = condense_description(client, project_description)
+    result: Dict[str, Any] = {"brief": brief, ASSIGNMENT: "", WORKFLOW: "", NAMING: "", "errors": {}}
+    assignments = None
+    for event in run_llm_stages(client, brief, team_members, structured=structured):
+        if event.error is not None:
+            result["errors"][event.stage] = str(event.error)
+        else:
+            result[event.stage] = event.text
+            if event.stage == ASSIGNMENT:
+                assignments = event.data
+
+    if assignments is None:
+        assignments = parse_assignments(result[ASSIGNMENT])
+    result["project_zip"] = b""
+    if assignments:
+        try:
+            result["project_zip"] = generate_project_structure(assignments)
+        except Exception as e:
+            result["errors"]["project_zip"] = str(e)
+    return result
@@ -0,0 +1,178 @@
+# functions/prefetch.py
+
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from config import PREFETCH_DEBOUNCE_SECONDS, PREFETCH_WORKERS, PREFETCH_MAX_RESULTS, PREFETCH_SESSION_IDLE_SECONDS
+from .cache import LRUCache
+from .condensation import condense_brief
+from .metrics import stage_timer
+from .pipeline import run_llm_stages, WORKFLOW, NAMING
+from .scheduling import request_priority, PREFETCH
+
+# Stages that only depend on the project description
+PREFETCH_STAGES = (WORKFLOW, NAMING)
+
+SCHEDULED = "scheduled"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+
+def description_key(project_description: str) -> str:
+    """Identifies a description's prefetch (hex SHA-256 of the text)."""
+    return hashlib.sha256(project_description.encode("utf-8")).hexdigest()
+
+
+class Prefetcher:
+    """
+    Generates the description-only stages speculatively while the user is still filling in the form.
+
+    Each session reports its current description with request(). Once a description
+    has not changed for ``debounce`` seconds, its workflow and names are generated in
+    the background at PREFETCH priority, through the same client (and therefore the
+    same response cache and request coalescing) the setup job uses. A setup started
+    while a prefetch is still running joins its streams instead of repeating them;
+    finished results are handed over with take().
+
+    A newer description cancels the session's pending prefetch, and results for
+    descriptions no session is waiting for any more are discarded. Sessions that
+    have not reported a description for ``session_idle`` seconds (closed browser
+    tabs never call cancel()) are forgotten the same way.
+
+    Args:
+        debounce (float): Seconds a description must stay unchanged before it is prefetched.
+        max_workers (int): Prefetches that run at the same time.
+        max_results (int): Finished prefetches kept for take().
+        session_idle (float): Seconds after which a silent session is forgotten.
+    """
+
+    def __init__(self, debounce: float = PREFETCH_DEBOUNCE_SECONDS, max_workers: int = PREFETCH_WORKERS,
+                 max_results: int = PREFETCH_MAX_RESULTS, session_idle: float = PREFETCH_SESSION_IDLE_SECONDS):
+        self.debounce = debounce
+        self.session_idle = session_idle
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="workup-prefetch")
+        self._timers: Dict[str, threading.Timer] = {}  # Description key -> pending debounce timer
+        # Session id -> (key of its current description, last request), least recently seen first
+        self._sessions: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._waiting: Counter = Counter()  # Description key -> sessions whose current description it is
+        self._status: Dict[str, str] = {}
+        self._results = LRUCache(max_entries=max_results)
+        self._lock = threading.Lock()
+
+    def request(self, session_id: str, client: Any, project_description: str) -> Optional[str]:
+        """
+        Reports a session's current description; schedules its prefetch after the debounce interval.
+
+        Args:
+            session_id (str): Identifies the Streamlit session.
+            client: The API client the setup job will use.
+            project_description (str): The description as currently entered.
+
+        Returns:
+            Optional[str]: The status of the description's prefetch.
+        """
+        key = description_key(project_description)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            previous = self._sessions.get(session_id)
+            if previous is not None and previous[0] == key:
+                self._sessions[session_id] = (key, now)
+                self._sessions.move_to_end(session_id)
+            else:
+                self._cancel(session_id)
+                self._sessions[session_id] = (key, now)
+                self._waiting[key] += 1
+                if self._results.get(key) is None and self._status.get(key) not in (SCHEDULED, RUNNING):
+                    timer = threading.Timer(self.debounce, self._start, (key, client, project_description))
+                    timer.daemon = True
+                    self._timers[key] = timer
+                    self._status[key] = SCHEDULED
+                    timer.start()
+            return READY if self._results.get(key) is not None else self._status.get(key)
+
+    def cancel(self, session_id: str):
+        """Forgets the session's description, e.g. when it was cleared or prefetching was turned off."""
+        with self._lock:
+            self._cancel(session_id)
+
+    def _cancel(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        previous = session[0]
+        self._waiting[previous] -= 1
+        if self._waiting[previous] > 0:
+            return
+        del self._waiting[previous]
+        timer = self._timers.pop(previous, None)
+        if timer is not None:
+            timer.cancel()
+            self._status.pop(previous, None)
+
+    def _expire(self, now: float):
+        while self._sessions:
+            session_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if now - last_seen < self.session_idle:
+                break
+            self._cancel(session_id)
+
+    def _wanted(self, key: str) -> bool:
+        return key in self._waiting
+
+    def status(self, project_description: str) -> Optional[str]:
+        """Returns the status of the description's prefetch, or None if there is none."""
+        key = description_key(project_description)
+        with self._lock:
+            return READY if self._results.get(key) is not None else self._status.get(key)
+
+    def take(self, project_description: str) -> Dict[str, str]:
+        """Returns the finished prefetched stages for the description (stage -> text), possibly none."""
+        return dict(self._results.get(description_key(project_description)) or {})
+
+    def _start(self, key: str, client: Any, project_description: str):
+        with self._lock:
+            if self._timers.pop(key, None) is None or not self._wanted(key):
+                return  # Cancelled while the timer was pending
+            self._status[key] = RUNNING
+        self._executor.submit(self._run, key, client, project_description)
+
+    def _run(self, key: str, client: Any, project_description: str):
+        results: Dict[str, str] = {}
+        try:
+            with request_priority(PREFETCH), stage_timer("prefetch"):
+                brief, complete = condense_brief(client, project_description)
+                with self._lock:
+                    wanted = self._wanted(key)
+                # Stages built on a truncated brief are left to the setup job, which retries the brief
+                if wanted and complete:
+                    # Streamed like the setup job's calls, so a job started meanwhile can join them
+                    for event in run_llm_stages(client, brief, [], stream=True, stages=PREFETCH_STAGES):
+                        if event.done and event.error is None and event.text:
+                            results[event.stage] = event.text
+        except Exception:
+            results = {}
+        with self._lock:
+            if results and self._wanted(key):
+                self._results.set(key, results)
+            if results or not self._wanted(key):
+                self._status.pop(key, None)
+            else:
+                self._status[key] = FAILED
+
+
+_prefetcher: Optional[Prefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    """Returns the process-wide prefetcher, shared by all Streamlit sessions."""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher()
+        return _prefetcher
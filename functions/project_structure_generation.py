@@ -1,9 +1,10 @@
-import os
+import io
 import zipfile
-import tempfile
 import re  # Import regex for sanitizing filenames
-from typing import List
-import streamlit as st
+from typing import Iterator, List, Tuple, Union
+from config import ZIP_COMPRESSION_LEVEL, ZIP_STREAM_CHUNK_BYTES
+from .metrics import timed
+from .assignment_parser import ParsedAssignments, parse_assignments
 
 def sanitize_filename(name: str) -> str:
     """
@@ -18,65 +19,10 @@ def sanitize_filename(name: str) -> str:
     # Remove any characters that are not alphanumeric, underscores, or hyphens
     return re.sub(r'[^\w\-]', '_', name)
 
-def generate_project_structure(workload_distribution: str) -> bytes:
-    try:
-        # Split the workload distribution into lines
-        lines = workload_distribution.split('\n')
-
-        # Create a temporary directory to hold project files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Project documentation file
-            documentation_path = os.path.join(temp_dir, 'project_documentation.txt')
-            with open(documentation_path, 'w') as doc_file:
-                doc_file.write("Project Documentation\n")
-                doc_file.write("===================================\n")
-                doc_file.write("Overview:\n")
-                doc_file.write("This project aims to build a state-of-the-art application that utilizes advanced AI technologies.\n\n")
-                doc_file.write("Objectives and Goals:\n")
-                doc_file.write("1. Develop a user-friendly interface.\n")
-                doc_file.write("2. Implement backend services for data processing.\n")
-                doc_file.write("3. Ensure high performance and scalability.\n\n")
-                doc_file.write("Team Member Tasks:\n")
-
-                # Initialize tasks and members
-                tasks = {}
-                for line in lines:
-                    if ':' in line:
-                        member, task = line.split(':', 1)
-                        sanitized_member = sanitize_filename(member.strip())
-                        task_detail = task.strip()
-                        tasks[sanitized_member] = task_detail
-                        doc_file.write(f"- {sanitized_member}: {task_detail}\n")
-
-            if not tasks:
-                st.error("No tasks found to generate project structure.")
-                return b""
-
-            # Create project code structure folder
-            code_structure_path = os.path.join(temp_dir, 'project_code_structure')
-            os.makedirs(code_structure_path, exist_ok=True)
-
-            # Create Python files based on member tasks and initial code structure
-            for idx, (member, task) in enumerate(tasks.items(), start=1):
-                # Create a Python file for each member's task
-                task_filename = f"{member}_task.py"
-                task_filepath = os.path.join(code_structure_path, task_filename)
-                with open(task_filepath, 'w') as f:
-                    f.write(f"# Task assigned to {member}\n")
-                    f.write(f"def {sanitize_filename(task)}():\n")
-                    f.write("    # Placeholder for implementation\n")
-                    f.write("    print(f'Executing task: {task}')\n")
-                    f.write("    # More code goes here\n")
-                    f.write("    # Simulating task completion...\n")
-                    f.write("    return 'Task Completed'\n\n")
-                    f.write(f"# Example usage:\n")
-                    f.write(f"if __name__ == '__main__':\n")
-                    f.write(f"    result = {sanitize_filename(task)}()\n")
-                    f.write(f"    print(result)\n")
-
-            # Create initial code files (e.g., app.py and other relevant files)
-            initial_files = {
-                'app.py': """from flask import Flask
+
+# Starter code files added to every scaffold
+_INITIAL_FILES = {
+    'app.py': """from flask import Flask
 
 app = Flask(__name__)
 
@@ -87,7 +33,7 @@ def home():
 if __name__ == "__main__":
     app.run(debug=True)
 """,
-                'database.py': """import sqlite3
+    'database.py': """import sqlite3
 
 def create_connection(db_file):
     conn = sqlite3.connect(db_file)
@@ -101,40 +47,159 @@ def initialize_database():
                         task TEXT NOT NULL);''')
     conn.close()
 """,
-                'utils.py': """def log_task(task):
+    'utils.py': """def log_task(task):
     print(f'Task logged: {task}')
 
 def send_notification(message):
     print(f'Notification: {message}')
 """
-            }
-
-            # Write the initial code files
-            for filename, content in initial_files.items():
-                filepath = os.path.join(code_structure_path, filename)
-                with open(filepath, 'w') as f:
-                    f.write(content)
-
-            # Create requirements.txt
-            with open(os.path.join(code_structure_path, 'requirements.txt'), 'w') as f:
-                f.write("streamlit\nopenai\nflask\n")  # Add more dependencies as needed
-
-            # Zip the project folder
-            zip_path = os.path.join(temp_dir, 'project_structure.zip')
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        if file != 'project_structure.zip':
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, temp_dir)
-                            zipf.write(file_path, arcname=arcname)
-
-            # Read the zip file
-            with open(zip_path, 'rb') as f:
-                zip_bytes = f.read()
-
-            return zip_bytes
-
-    except Exception as e:
-        st.error(f"Project structure generation failed: {str(e)}")
-        return b""
+}
+
+
+def _scaffold_tasks(workload_distribution: Union[str, ParsedAssignments]) -> List[Tuple[str, str]]:
+    """Returns (sanitized member name, task) pairs, one per file name."""
+    if isinstance(workload_distribution, str):
+        workload_distribution = parse_assignments(workload_distribution)
+    tasks = {}
+    for member, task in workload_distribution.by_member():
+        tasks[sanitize_filename(member)] = task
+    return list(tasks.items())
+
+
+def _documentation(tasks: List[Tuple[str, str]]) -> str:
+    lines = [
+        "Project Documentation\n",
+        "===================================\n",
+        "Overview:\n",
+        "This project aims to build a state-of-the-art application that utilizes advanced AI technologies.\n\n",
+        "Objectives and Goals:\n",
+        "1. Develop a user-friendly interface.\n",
+        "2. Implement backend services for data processing.\n",
+        "3. Ensure high performance and scalability.\n\n",
+        "Team Member Tasks:\n",
+    ]
+    lines.extend(f"- {member}: {task}\n" for member, task in tasks)
+    return "".join(lines)
+
+
+def _task_module(member: str, task: str) -> str:
+    function_name = sanitize_filename(task)
+    return (
+        f"# Task assigned to {member}\n"
+        f"def {function_name}():\n"
+        "    # Placeholder for implementation\n"
+        "    print(f'Executing task: {task}')\n"
+        "    # More code goes here\n"
+        "    # Simulating task completion...\n"
+        "    return 'Task Completed'\n\n"
+        "# Example usage:\n"
+        "if __name__ == '__main__':\n"
+        f"    result = {function_name}()\n"
+        "    print(result)\n"
+    )
+
+
+def iter_scaffold_entries(tasks: List[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the (archive path, content) pairs that make up the project scaffold.
+
+    Args:
+        tasks (List[Tuple[str, str]]): (sanitized member name, task) pairs.
+    """
+    yield "project_documentation.txt", _documentation(tasks)
+    for member, task in tasks:
+        yield f"project_code_structure/{member}_task.py", _task_module(member, task)
+    for filename, content in _INITIAL_FILES.items():
+        yield f"project_code_structure/{filename}", content
+    yield "project_code_structure/requirements.txt", "streamlit\nopenai\nflask\n"  # Add more dependencies as needed
+
+
+@timed("scaffold_zip")
+def generate_project_structure(workload_distribution: Union[str, ParsedAssignments], compression_level: int = ZIP_COMPRESSION_LEVEL) -> bytes:
+    """
+    Builds the project scaffold as an in-memory ZIP archive.
+
+    Runs on job worker threads, so failures are raised for the caller to record
+    rather than reported with Streamlit.
+
+    Args:
+        workload_distribution (Union[str, ParsedAssignments]): The task assignments.
+        compression_level (int): Deflate level (0-9).
+
+    Returns:
+        bytes: The ZIP archive.
+
+    Raises:
+        ValueError: If there are no tasks.
+    """
+    tasks = _scaffold_tasks(workload_distribution)
+    if not tasks:
+        raise ValueError("No tasks found to generate project structure.")
+
+    # Build the archive directly in memory
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=compression_level) as zipf:
+        for arcname, content in iter_scaffold_entries(tasks):
+            zipf.writestr(arcname, content)
+    return buffer.getvalue()
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object that collects bytes until they are drained."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts, self.size = [], 0
+        return data
+
+
+def iter_project_structure_chunks(
+    workload_distribution: Union[str, ParsedAssignments],
+    compression_level: int = ZIP_COMPRESSION_LEVEL,
+    chunk_size: int = ZIP_STREAM_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """
+    Streams the project scaffold ZIP in chunks of roughly ``chunk_size`` bytes.
+
+    Entries are compressed one at a time and emitted as soon as they are written, so
+    very large scaffolds never need to be held in memory as a whole. The tasks are
+    checked when this is called, before the first chunk is requested.
+
+    Args:
+        workload_distribution (Union[str, ParsedAssignments]): The task assignments.
+        compression_level (int): Deflate level (0-9).
+        chunk_size (int): Target size of the yielded chunks.
+
+    Returns:
+        Iterator[bytes]: Consecutive pieces of the ZIP archive.
+
+    Raises:
+        ValueError: If there are no tasks, like generate_project_structure.
+    """
+    tasks = _scaffold_tasks(workload_distribution)
+    if not tasks:
+        raise ValueError("No tasks found to generate project structure.")
+    return _iter_zip_chunks(tasks, compression_level, chunk_size)
+
+
+def _iter_zip_chunks(tasks: List[Tuple[str, str]], compression_level: int, chunk_size: int) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=compression_level) as zipf:
+        for arcname, content in iter_scaffold_entries(tasks):
+            zipf.writestr(arcname, content)
+            if sink.size >= chunk_size:
+                yield sink.drain()
+    # Closing the archive writes the central directory
+    yield sink.drain()
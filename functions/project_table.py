@@ -1,51 +1,173 @@
 # functions/project_table.py
 
-import pandas as pd
+import hashlib
+import importlib.util
+import io
+import json
+import math
 import streamlit as st
-from typing import List, Dict
-from .utils import sanitize_filename  # Import the sanitize function
+from typing import TYPE_CHECKING, List, Dict, Tuple, Union
+from config import TABLE_STATIC_MAX_ROWS, TABLE_PAGE_SIZE, TABLE_CACHE_MAX_BYTES
+from .assignment_parser import ParsedAssignments
+from .cache import LRUCache
+from .artifacts import get_artifact_store
+from .metrics import timed
 
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
 
-def generate_project_table(team_members: List[Dict[str, str]]) -> pd.DataFrame:
+# Export formats: (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": ("CSV", "csv", "text/csv"),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+# Arrow tables keyed by content hash; exported files go to the artifact store
+_table_cache = LRUCache(max_bytes=TABLE_CACHE_MAX_BYTES, sizeof=lambda table: table.nbytes)
+
+
+def _table_columns(team_members: Union[List[Dict[str, str]], ParsedAssignments]) -> Dict[str, List[str]]:
+    if isinstance(team_members, ParsedAssignments):
+        team_members = team_members.as_rows()
+
+    data = {
+        "Team Member": [member['name'] for member in team_members],
+        "Assigned Task": [member.get('task', 'N/A') for member in team_members]
+    }
+    if any(member.get('outcome') for member in team_members):
+        data["Expected Outcome"] = [member.get('outcome', '') for member in team_members]
+    return data
+
+
+def generate_project_table(team_members: Union[List[Dict[str, str]], ParsedAssignments]) -> "pd.DataFrame":
     """
     Generates a pandas DataFrame representing the project table.
 
     Args:
-        team_members (List[Dict[str, str]]): A list of dictionaries containing team member names and their tasks.
+        team_members (Union[List[Dict[str, str]], ParsedAssignments]): Parsed assignments, or a list of
+            dictionaries containing team member names and their tasks.
 
     Returns:
         pd.DataFrame: A DataFrame with the project table.
     """
+    import pandas as pd
+
     # Create a DataFrame from team members
-    data = {
-        "Team Member": [member['name'] for member in team_members],
-        "Assigned Task": [member.get('task', 'N/A') for member in team_members]
-    }
-    df = pd.DataFrame(data)
+    df = pd.DataFrame(_table_columns(team_members))
 
     return df
 
 
-def display_project_table(team_members: List[Dict[str, str]]):
+def generate_arrow_table(team_members: Union[List[Dict[str, str]], ParsedAssignments]) -> Tuple[str, "pa.Table"]:
+    """
+    Builds the project table in columnar (Arrow) form, once per distinct content.
+
+    Args:
+        team_members (Union[List[Dict[str, str]], ParsedAssignments]): Parsed assignments, or a list of
+            dictionaries containing team member names and their tasks.
+
+    Returns:
+        Tuple[str, pa.Table]: The content hash of the table, used to key its exports, and the table.
+    """
+    columns = _table_columns(team_members)
+    key = hashlib.sha256(json.dumps(columns).encode("utf-8")).hexdigest()
+    table = _table_cache.get(key)
+    if table is None:
+        import pyarrow as pa
+
+        table = pa.table(columns)
+        _table_cache.set(key, table)
+    return key, table
+
+
+def available_export_formats() -> List[str]:
+    """Returns the export formats whose writer is installed (XLSX needs openpyxl)."""
+    formats = ["csv", "parquet"]
+    if importlib.util.find_spec("openpyxl") is not None:
+        formats.append("xlsx")
+    return formats
+
+
+@timed("table_export")
+def export_project_table(key: str, table: "pa.Table", fmt: str) -> bytes:
+    """
+    Encodes the project table as a file, reusing earlier exports of the same content.
+
+    Exports are kept in the artifact store under an alias of the table hash and
+    format, so they are shared across sessions and survive restarts.
+
+    Args:
+        key (str): The content hash returned by generate_arrow_table.
+        table (pa.Table): The table.
+        fmt (str): One of EXPORT_FORMATS.
+
+    Returns:
+        bytes: The file contents.
+    """
+    store = get_artifact_store()
+    alias = f"table:{key}:{fmt}"
+    artifact_id = store.lookup(alias)
+    data = store.get(artifact_id) if artifact_id else None
+    if data is not None:
+        return data
+
+    buffer = io.BytesIO()
+    if fmt == "csv":
+        # Same output as before the table moved to Arrow (pyarrow quotes every string)
+        table.to_pandas().to_csv(buffer, index=False)
+    elif fmt == "parquet":
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(table, buffer)
+    elif fmt == "xlsx":
+        table.to_pandas().to_excel(buffer, index=False)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    data = buffer.getvalue()
+    store.put(data, alias=alias)
+    return data
+
+
+@timed("table")
+def display_project_table(team_members: Union[List[Dict[str, str]], ParsedAssignments]):
     """
     Displays the project table in Streamlit.
 
+    Small tables are rendered statically. Larger ones are shown a page at a time in
+    Streamlit's virtualized grid, sliced from the Arrow table without copying. Export
+    files are only encoded when their download button is clicked.
+
     Args:
-        team_members (List[Dict[str, str]]): A list of dictionaries containing team member names and their tasks.
+        team_members (Union[List[Dict[str, str]], ParsedAssignments]): Parsed assignments, or a list of
+            dictionaries containing team member names and their tasks.
     """
     if not team_members:
         st.warning("No team members to display.")
         return
 
-    df = generate_project_table(team_members)
+    key, table = generate_arrow_table(team_members)
     st.markdown("### Team Members and Assigned Tasks")
-    st.table(df)
-
-    # Option to download the table as CSV
-    csv = df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="Download Project Table as CSV",
-        data=csv,
-        file_name="project_table.csv",
-        mime="text/csv",
-    )
+    if table.num_rows <= TABLE_STATIC_MAX_ROWS:
+        st.table(table.to_pandas())
+    else:
+        pages = math.ceil(table.num_rows / TABLE_PAGE_SIZE)
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"project_table_page_{key[:12]}")
+        start = (int(page) - 1) * TABLE_PAGE_SIZE
+        page_rows = table.slice(start, TABLE_PAGE_SIZE)
+        st.dataframe(page_rows, hide_index=True)
+        st.caption(f"Rows {start + 1}-{start + page_rows.num_rows} of {table.num_rows}")
+
+    # Options to download the table; the callables run only when a button is clicked
+    formats = available_export_formats()
+    for fmt, column in zip(formats, st.columns(len(formats))):
+        label, extension, mime = EXPORT_FORMATS[fmt]
+        with column:
+            st.download_button(
+                label=f"Download Project Table as {label}",
+                data=lambda fmt=fmt: export_project_table(key, table, fmt),
+                file_name=f"project_table.{extension}",
+                mime=mime,
+                on_click="ignore",
+            )
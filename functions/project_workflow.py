@@ -1,34 +1,36 @@
 # functions/project_workflow.py
 
+from typing import Iterator, Union
 from openai import OpenAI, OpenAIError
 from config import MODEL_NAME
+from .streaming import stream_chat_completion
+from .errors import as_llm_error
 
-def get_project_workflow(client: OpenAI, project_description: str) -> str:
+def get_project_workflow(client: OpenAI, project_description: str, stream: bool = False) -> Union[str, Iterator[str]]:
     try:
         user_input = (
             f"Provide a detailed step-by-step workflow for the following project: '{project_description}'. "
             "Include expected outcomes for each step."
         )
         
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an AI assistant that outlines project workflows with detailed steps and expected outcomes.",
-                },
-                {
-                    "role": "user",
-                    "content": user_input,
-                },
-            ],
-        )
+        messages = [
+            {
+                "role": "system",
+                "content": "You are an AI assistant that outlines project workflows with detailed steps and expected outcomes.",
+            },
+            {
+                "role": "user",
+                "content": user_input,
+            },
+        ]
+        if stream:
+            return stream_chat_completion(client, messages)
+
+        response = client.chat.completions.create(model=MODEL_NAME, messages=messages)
         
         message = response.choices[0].message.content
         return message
 
     except OpenAIError as e:
-        return f"API request failed: {str(e)}"
-    except Exception as e:
-        return f"An error occurred: {str(e)}"
+        raise as_llm_error(e) from e
 
@@ -0,0 +1,326 @@
+# functions/scheduling.py
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from config import (
+    RATE_LIMIT_RPM,
+    RATE_LIMIT_TPM,
+    SCHEDULER_MAX_CONCURRENCY,
+    SCHEDULER_MIN_CONCURRENCY,
+    SCHEDULER_LATENCY_TARGET_SECONDS,
+    SCHEDULER_COMPLETION_TOKENS_ESTIMATE,
+    CONDENSE_CHARS_PER_TOKEN,
+)
+from .llm_client import ChatClientWrapper
+from .errors import LLMRateLimitError, as_llm_error
+from . import metrics
+
+# Request priorities; lower values are served first
+INTERACTIVE = 0
+PREFETCH = 5
+BATCH = 10
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", PREFETCH: "prefetch", BATCH: "batch"}
+
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar("workup_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """Gives the LLM calls made inside the block (on the same thread or copied contexts) this priority."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """
+    Refills at ``per_minute / 60`` units per second up to ``capacity``.
+
+    Not thread-safe on its own; RateLimiter serializes access.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate) if self.rate > 0 else (0.0 if missing <= 0 else float("inf"))
+
+    def take(self, amount: float):
+        self.tokens -= amount
+
+    def drain(self):
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RateLimiter:
+    """
+    Admits requests within a requests-per-minute and a tokens-per-minute budget.
+
+    A request is charged its estimated tokens up front; the difference to the
+    actual usage is settled once the response arrives. Either limit can be None.
+    """
+
+    def __init__(self, rpm: Optional[float] = RATE_LIMIT_RPM, tpm: Optional[float] = RATE_LIMIT_TPM):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Charges one request of ``tokens`` tokens and returns 0, or returns how long to wait without charging."""
+        now = time.monotonic()
+        with self._lock:
+            delay = max(
+                self.requests.delay(1, now) if self.requests else 0.0,
+                self.tokens.delay(tokens, now) if self.tokens else 0.0,
+            )
+            if delay > 0:
+                return delay
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+            return 0.0
+
+    def settle(self, delta_tokens: int):
+        """Charges (or refunds, if negative) the difference between actual and estimated tokens."""
+        if self.tokens:
+            with self._lock:
+                self.tokens.take(delta_tokens)
+
+    def drain(self):
+        """Empties both buckets after the provider reported a rate limit."""
+        with self._lock:
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.drain()
+
+
+class PriorityScheduler:
+    """
+    Queues LLM calls by priority and admits them within the rate limits and an adaptive concurrency limit.
+
+    Calls are served strictly by priority, then in arrival order. The concurrency
+    limit follows AIMD: it is halved on every 429 (and the rate buckets are emptied),
+    lowered by one when a call is slower than the latency target, and raised by one
+    after a limit's worth of fast successes.
+
+    Args:
+        limiter (RateLimiter): The request and token budgets.
+        max_concurrency (int): Upper bound of the concurrency limit (and its start value).
+        min_concurrency (int): Lower bound of the concurrency limit.
+        latency_target (float): Calls slower than this count as a sign of overload.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        max_concurrency: int = SCHEDULER_MAX_CONCURRENCY,
+        min_concurrency: int = SCHEDULER_MIN_CONCURRENCY,
+        latency_target: float = SCHEDULER_LATENCY_TARGET_SECONDS,
+    ):
+        self.limiter = limiter
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.latency_target = latency_target
+        self.limit = self.max_concurrency
+        self.running = 0
+        self.rate_limited = 0
+        self.max_wait_seconds = 0.0
+        self._successes = 0
+        self._queue: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, priority: int, tokens: int) -> float:
+        """
+        Blocks until the call may start and returns how long it waited.
+
+        Args:
+            priority (int): The call's priority (INTERACTIVE, BATCH, ...).
+            tokens (int): Estimated tokens of the call.
+
+        Returns:
+            float: Seconds spent in the queue.
+        """
+        start = time.monotonic()
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            self._condition.notify_all()  # A new head of the queue may have arrived
+            try:
+                while True:
+                    if self._queue[0] == ticket and self.running < self.limit:
+                        delay = self.limiter.reserve(tokens)
+                        if delay == 0:
+                            heapq.heappop(self._queue)
+                            self.running += 1
+                            break
+                        self._condition.wait(timeout=delay)
+                    else:
+                        self._condition.wait()
+            except BaseException:
+                # Interrupted while queued; don't block the calls behind this one
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                raise
+            finally:
+                self._condition.notify_all()
+            waited = time.monotonic() - start
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return waited
+
+    def release(self, latency: float, rate_limited: bool = False):
+        """Ends a call admitted by acquire and adapts the concurrency limit to its outcome."""
+        with self._condition:
+            self.running -= 1
+            if rate_limited:
+                self.rate_limited += 1
+                self.limit = max(self.min_concurrency, self.limit // 2)
+                self._successes = 0
+                self.limiter.drain()
+            elif latency > self.latency_target:
+                self.limit = max(self.min_concurrency, self.limit - 1)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit = min(self.max_concurrency, self.limit + 1)
+                    self._successes = 0
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """Returns queue depth per priority, running calls, the current limit and wait/429 counters."""
+        with self._condition:
+            stats: Dict[str, float] = {"queue_depth": len(self._queue)}
+            for priority, name in _PRIORITY_NAMES.items():
+                stats[f"queued_{name}"] = sum(1 for ticket in self._queue if ticket[0] == priority)
+            stats.update({
+                "running": self.running,
+                "concurrency_limit": self.limit,
+                "rate_limited_total": self.rate_limited,
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+            })
+            return stats
+
+
+def _estimate_request_tokens(kwargs: Dict[str, Any]) -> int:
+    characters = sum(len(str(message.get("content") or "")) for message in kwargs.get("messages", []))
+    completion = kwargs.get("max_tokens") or SCHEDULER_COMPLETION_TOKENS_ESTIMATE
+    return characters // CONDENSE_CHARS_PER_TOKEN + completion
+
+
+class _ScheduledStream:
+    """Holds the scheduler slot of a streaming call until the stream is exhausted, fails or is dropped."""
+
+    def __init__(self, stream: Any, release: Callable[[bool], None], settle: Callable[[int], None]):
+        self._stream = stream
+        self._iterator = iter(stream)
+        self._release = release
+        self._settle = settle
+        self._released = False
+
+    def __iter__(self) -> "_ScheduledStream":
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            chunk = next(self._iterator)
+        except StopIteration:
+            self._finish(False)
+            raise
+        except Exception as e:
+            self._finish(isinstance(as_llm_error(e), LLMRateLimitError))
+            raise
+        usage = getattr(chunk, "usage", None)
+        if usage is not None and usage.total_tokens:
+            self._settle(usage.total_tokens)
+        return chunk
+
+    def _finish(self, rate_limited: bool):
+        if not self._released:
+            self._released = True
+            self._release(rate_limited)
+
+    def close(self):
+        self._finish(False)
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            close()
+
+    def __del__(self):
+        self._finish(False)
+
+
+class ScheduledClient(ChatClientWrapper):
+    """
+    Sends every call through a PriorityScheduler.
+
+    Sits directly above the provider client, below the retry layer, so each retry
+    attempt is admitted (and counted) separately. The priority comes from
+    request_priority(); time spent queued is recorded as a "queue" metric of the
+    current stage.
+    """
+
+    def __init__(self, inner: Any, scheduler: "PriorityScheduler"):
+        super().__init__(inner)
+        self.scheduler = scheduler
+
+    def create(self, **kwargs) -> Any:
+        tokens = _estimate_request_tokens(kwargs)
+        waited = self.scheduler.acquire(current_priority(), tokens)
+        metrics.registry.record(metrics.MetricEvent(metrics.current_stage(), "queue", waited))
+        start = time.monotonic()
+        try:
+            response = self.inner.chat.completions.create(**kwargs)
+        except Exception as e:
+            self.scheduler.release(time.monotonic() - start, isinstance(as_llm_error(e), LLMRateLimitError))
+            raise
+
+        if kwargs.get("stream"):
+            # Judge a stream's latency by its time to first response, not by its length
+            latency = time.monotonic() - start
+            return _ScheduledStream(
+                response,
+                lambda rate_limited: self.scheduler.release(latency, rate_limited),
+                lambda total_tokens: self.scheduler.limiter.settle(total_tokens - tokens),
+            )
+        usage = getattr(response, "usage", None)
+        if usage is not None and usage.total_tokens:
+            self.scheduler.limiter.settle(usage.total_tokens - tokens)
+        self.scheduler.release(time.monotonic() - start)
+        return response
+
+
+_scheduler: Optional[PriorityScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> PriorityScheduler:
+    """Returns the process-wide scheduler; its counters are also exported as metrics gauges."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PriorityScheduler(RateLimiter())
+            metrics.registry.register_gauges("scheduler", _scheduler.stats)
+        return _scheduler
@@ -0,0 +1,248 @@
+# functions/similarity.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Set
+from config import (
+    SIMILARITY_INDEX_PATH,
+    SIMILARITY_NUM_PERM,
+    SIMILARITY_BANDS,
+    SIMILARITY_THRESHOLD,
+)
+
+# Fixed seed so signatures stay comparable across processes and restarts
+_PERMUTATION_SEED = 20240601
+_WORD = re.compile(r"\w+")
+_MAX_UINT32 = 0xFFFFFFFF
+
+
+class SimilarMatch(NamedTuple):
+    """
+    A previously processed project that resembles the current inputs.
+
+    ``same_roster`` is only set if the stored roster is exactly the current one
+    (in any order); ``roster_similarity`` is the estimate for display.
+    """
+    entry_id: int
+    description_similarity: float
+    roster_similarity: float
+    results: Dict[str, str]
+    same_roster: bool = False
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def roster_text(team_members: List[Dict[str, str]]) -> str:
+    """Canonical text of a roster, independent of member order."""
+    return "\n".join(sorted(f"{member['name']}: {member['expertise']}" for member in team_members))
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SimilarityIndex:
+    """
+    Persistent MinHash/LSH index of processed project descriptions and their results.
+
+    Each entry stores a MinHash signature of the description's word 3-grams (banded
+    into LSH buckets for candidate lookup) and of the team roster, plus exact hashes
+    of both. A lookup only compares signatures of the candidates that share a
+    bucket, so it stays fast with tens of thousands of entries. Adding the same
+    description and roster again replaces the stored results instead of adding an
+    entry.
+
+    Args:
+        path (str): SQLite file holding the index.
+        num_perm (int): Signature length (number of hash permutations).
+        bands (int): Number of LSH bands; ``num_perm`` must be divisible by it.
+    """
+
+    def __init__(self, path: str = SIMILARITY_INDEX_PATH, num_perm: int = SIMILARITY_NUM_PERM,
+                 bands: int = SIMILARITY_BANDS):
+        import numpy as np
+
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(_PERMUTATION_SEED)
+        # Multiply-shift hashing: ((a * x + b) mod 2**64) >> 32 with odd a
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, description_signature BLOB NOT NULL, "
+                "roster_signature BLOB NOT NULL, results TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            for column in ("description_hash", "roster_hash"):
+                if column not in columns:
+                    # Entries of older indexes have no hashes; they never share a roster
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {column} TEXT")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS entries_inputs ON entries (description_hash, roster_hash)")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (band INTEGER, bucket TEXT, entry_id INTEGER)")
+            conn.execute("CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket)")
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def signature(self, text: str):
+        """Returns the MinHash signature of ``text`` as a uint32 array."""
+        import numpy as np
+
+        shingles = _shingles(text)
+        if not shingles:
+            return np.full(self.num_perm, _MAX_UINT32, dtype=np.uint32)
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+            dtype=np.uint64, count=len(shingles),
+        )
+        with np.errstate(over="ignore"):
+            permuted = (hashes[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature) -> List[str]:
+        return [
+            hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def estimate_similarity(first, second) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float((first == second).mean())
+
+    def add(self, project_description: str, team_members: List[Dict[str, str]], results: Dict[str, str]) -> int:
+        """
+        Adds a processed project and its stage results to the index.
+
+        Returns:
+            int: The id of the entry (the existing one if the same inputs were added before).
+        """
+        description_hash = _text_hash(project_description)
+        roster = roster_text(team_members)
+        roster_hash = _text_hash(roster)
+        with self._lock, self._conn as conn:
+            row = conn.execute(
+                "SELECT id FROM entries WHERE description_hash = ? AND roster_hash = ?", (description_hash, roster_hash)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE entries SET results = ?, created_at = ? WHERE id = ?",
+                             (json.dumps(results), time.time(), row[0]))
+                return row[0]
+
+        description_signature = self.signature(project_description)
+        roster_signature = self.signature(roster)
+        with self._lock, self._conn as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO entries (description_signature, roster_signature, results, created_at, "
+                "description_hash, roster_hash) VALUES (?, ?, ?, ?, ?, ?)",
+                (description_signature.tobytes(), roster_signature.tobytes(), json.dumps(results), time.time(),
+                 description_hash, roster_hash),
+            )
+            if not cursor.rowcount:
+                # Added by another thread in the meantime
+                return conn.execute("SELECT id FROM entries WHERE description_hash = ? AND roster_hash = ?",
+                                    (description_hash, roster_hash)).fetchone()[0]
+            entry_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO buckets (band, bucket, entry_id) VALUES (?, ?, ?)",
+                [(band, key, entry_id) for band, key in enumerate(self._band_keys(description_signature))],
+            )
+        return entry_id
+
+    def find(self, project_description: str, team_members: List[Dict[str, str]],
+             threshold: float = SIMILARITY_THRESHOLD) -> Optional[SimilarMatch]:
+        """
+        Returns the most similar indexed project whose description similarity reaches ``threshold``.
+
+        Args:
+            project_description (str): The new description.
+            team_members (List[Dict[str, str]]): The new roster.
+            threshold (float): Minimum estimated Jaccard similarity of the descriptions.
+
+        Returns:
+            Optional[SimilarMatch]: The best match, or None.
+        """
+        import numpy as np
+
+        description_signature = self.signature(project_description)
+        band_keys = self._band_keys(description_signature)
+        with self._lock, self._conn as conn:
+            candidates: Set[int] = set()
+            for band, key in enumerate(band_keys):
+                candidates.update(row[0] for row in conn.execute(
+                    "SELECT entry_id FROM buckets WHERE band = ? AND bucket = ?", (band, key)))
+            if not candidates:
+                return None
+            placeholders = ",".join("?" * len(candidates))
+            rows = conn.execute(
+                "SELECT id, description_signature, roster_signature, results, roster_hash FROM entries "
+                f"WHERE id IN ({placeholders})",
+                tuple(candidates),
+            ).fetchall()
+
+        roster = roster_text(team_members)
+        roster_hash = _text_hash(roster)
+        best = None
+        for entry_id, stored_description, stored_roster, results, stored_roster_hash in rows:
+            similarity = self.estimate_similarity(description_signature, np.frombuffer(stored_description, dtype=np.uint32))
+            # Among equally similar descriptions, prefer the entry made for the same roster
+            rank = (similarity, stored_roster_hash == roster_hash)
+            if similarity >= threshold and (best is None or rank > best[0]):
+                best = (rank, entry_id, stored_roster, results)
+        if best is None:
+            return None
+        (similarity, same_roster), entry_id, stored_roster, results = best
+        roster_similarity = self.estimate_similarity(self.signature(roster), np.frombuffer(stored_roster, dtype=np.uint32))
+        return SimilarMatch(entry_id, similarity, roster_similarity, json.loads(results), same_roster)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def reusable_results(match: SimilarMatch) -> Dict[str, str]:
+    """
+    Returns the stored stage results that are valid for the new inputs.
+
+    Workflow and names depend only on the description and are always reusable;
+    the task assignment names members, so it is only reused for exactly the same roster.
+    """
+    from .pipeline import ASSIGNMENT
+
+    return {stage: text for stage, text in match.results.items() if stage != ASSIGNMENT or match.same_roster}
+
+
+_index: Optional[SimilarityIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Returns the process-wide SimilarityIndex."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SimilarityIndex()
+        return _index
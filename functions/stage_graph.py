@@ -0,0 +1,125 @@
+# functions/stage_graph.py
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+from config import MODEL_NAME
+from .pipeline import ASSIGNMENT, WORKFLOW, NAMING
+from .artifacts import ArtifactStore, get_artifact_store
+
+# Inputs entered by the user
+UPLOAD = "upload"
+TEAM = "team"
+
+# Stages
+EXTRACTION = "extraction"
+BRIEF = "brief"
+PARSED_ASSIGNMENTS = "parsed_assignments"
+FLOWCHART = "flowchart"
+SCAFFOLD = "scaffold"
+TABLE = "table"
+
+
+class StageNode(NamedTuple):
+    """
+    A pipeline stage and the stages (or user inputs) its output is derived from.
+
+    ``llm`` stages also depend on the model. Bump ``version`` when a stage's prompt or
+    logic changes so its memoized outputs are no longer used.
+    """
+    name: str
+    inputs: Tuple[str, ...]
+    llm: bool = False
+    version: int = 1
+
+
+# The setup pipeline as a DAG, in topological order. Extraction is memoized by the
+# extraction cache (keyed by the uploaded bytes) and the table by its content hash
+# (see project_table); the setup job memoizes the stages from the brief to the scaffold.
+STAGE_GRAPH: Dict[str, StageNode] = {
+    node.name: node for node in (
+        StageNode(EXTRACTION, (UPLOAD,)),
+        StageNode(BRIEF, (EXTRACTION,), llm=True),
+        StageNode(ASSIGNMENT, (BRIEF, TEAM), llm=True),
+        StageNode(WORKFLOW, (BRIEF,), llm=True),
+        StageNode(NAMING, (BRIEF,), llm=True),
+        StageNode(PARSED_ASSIGNMENTS, (ASSIGNMENT,)),
+        StageNode(FLOWCHART, (PARSED_ASSIGNMENTS,)),
+        StageNode(SCAFFOLD, (PARSED_ASSIGNMENTS,)),
+        StageNode(TABLE, (PARSED_ASSIGNMENTS,)),
+    )
+}
+
+
+def content_hash(value: Any) -> str:
+    """Hex SHA-256 of text, bytes or a JSON-serializable value."""
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    elif not isinstance(value, bytes):
+        value = json.dumps(value, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(value).hexdigest()
+
+
+def downstream(stages: Iterable[str]) -> Set[str]:
+    """Returns the stages that (transitively) depend on any of ``stages``."""
+    affected = set(stages)
+    found: Set[str] = set()
+    for node in STAGE_GRAPH.values():
+        if affected.intersection(node.inputs):
+            affected.add(node.name)
+            found.add(node.name)
+    return found
+
+
+class StageMemo:
+    """
+    Remembers stage outputs by the hashes of their inputs.
+
+    A stage's key combines its name, version and the hashes of its inputs' outputs
+    (plus the model for LLM stages). Since inputs are identified by what they contain
+    rather than how they were made, an edit only invalidates the stages downstream of
+    an output that actually changed. Outputs are kept in the artifact store under a
+    ``stage:`` alias, so they are shared by all jobs and evicted like other artifacts.
+
+    Args:
+        store (Optional[ArtifactStore]): Where outputs are kept (default: the process-wide store).
+    """
+
+    def __init__(self, store: Optional[ArtifactStore] = None):
+        self.store = store or get_artifact_store()
+
+    def key(self, stage: str, hashes: Dict[str, str]) -> Optional[str]:
+        """
+        Returns the memo key of ``stage``.
+
+        Args:
+            stage (str): A stage of STAGE_GRAPH.
+            hashes (Dict[str, str]): Output hashes of the stages and user inputs computed so far.
+
+        Returns:
+            Optional[str]: The key, or None if an input's hash is not known.
+        """
+        node = STAGE_GRAPH[stage]
+        if any(name not in hashes for name in node.inputs):
+            return None
+        payload = [stage, node.version, MODEL_NAME if node.llm else None, [hashes[name] for name in node.inputs]]
+        return content_hash(payload)
+
+    def get_artifact(self, key: Optional[str]) -> Optional[str]:
+        """Returns the artifact id of the output memoized under ``key``, if it is still stored."""
+        artifact_id = self.store.lookup(f"stage:{key}") if key else None
+        return artifact_id if self.store.has(artifact_id) else None
+
+    def put_artifact(self, key: Optional[str], data: bytes) -> str:
+        """Stores an output and returns its artifact id, which is also its content hash."""
+        return self.store.put(data, alias=f"stage:{key}" if key else None)
+
+    def get_text(self, key: Optional[str]) -> Optional[str]:
+        """Returns the text output memoized under ``key``, if any."""
+        artifact_id = self.get_artifact(key)
+        data = self.store.get(artifact_id) if artifact_id else None
+        return data.decode("utf-8") if data is not None else None
+
+    def put_text(self, key: Optional[str], text: str) -> str:
+        """Stores a text output and returns its content hash."""
+        return self.put_artifact(key, text.encode("utf-8"))
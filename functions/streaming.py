@@ -0,0 +1,49 @@
+# functions/streaming.py
+
+from typing import Any, Dict, Iterator, List
+import httpx
+from openai import OpenAIError
+from config import MODEL_NAME
+from .errors import as_llm_error
+
+
+def iter_text_deltas(stream: Any) -> Iterator[str]:
+    """
+    Yields the text content of each chunk in a streamed chat completion.
+
+    Args:
+        stream: The iterable returned by ``client.chat.completions.create(stream=True)``.
+
+    Yields:
+        str: Non-empty content deltas in arrival order.
+    """
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
+def stream_chat_completion(client: Any, messages: List[Dict[str, str]]) -> Iterator[str]:
+    """
+    Streams a chat completion as text deltas.
+
+    Args:
+        client: The API client.
+        messages (List[Dict[str, str]]): The chat messages to send.
+
+    Yields:
+        str: Content deltas.
+
+    Raises:
+        LLMError: If the request fails or the stream is interrupted.
+    """
+    try:
+        # Ask for the final usage chunk so streamed calls report real token counts
+        stream = client.chat.completions.create(
+            model=MODEL_NAME, messages=messages, stream=True, stream_options={"include_usage": True},
+        )
+        yield from iter_text_deltas(stream)
+    except (OpenAIError, httpx.HTTPError) as e:
+        raise as_llm_error(e) from e
@@ -0,0 +1,198 @@
+# functions/structured_generation.py
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+from openai import OpenAI, OpenAIError
+from config import MODEL_NAME
+from .assignment_parser import SUMMARY_HEADING, ParsedAssignments, TaskAssignment
+from .errors import as_llm_error
+from .expertise_index import compact_expertise
+
+# JSON schema of the combined response; strict mode requires every property to be listed as required
+SETUP_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "assignments": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "member": {"type": "string"},
+                    "task": {"type": "string"},
+                    "outcome": {"type": "string"},
+                },
+                "required": ["member", "task", "outcome"],
+                "additionalProperties": False,
+            },
+        },
+        "workflow": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "step": {"type": "string"},
+                    "outcome": {"type": "string"},
+                },
+                "required": ["step", "outcome"],
+                "additionalProperties": False,
+            },
+        },
+        "names": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "assignments", "workflow", "names"],
+    "additionalProperties": False,
+}
+
+
+class StructuredOutputError(ValueError):
+    """The combined response was not valid JSON or did not match SETUP_SCHEMA."""
+
+
+@dataclass(frozen=True)
+class StructuredSetup:
+    """Project summary, assignments, workflow steps and name suggestions from a single combined response."""
+    __slots__ = ("assignments", "workflow", "names", "summary")
+    assignments: ParsedAssignments
+    workflow: Tuple[Tuple[str, str], ...]
+    names: Tuple[str, ...]
+    summary: str
+
+    def assignment_text(self) -> str:
+        """
+        The assignments in the "Member: Task" format the per-stage response uses, followed by the project summary.
+
+        parse_assignments stops at the summary heading, so the summary is never taken for a member.
+        """
+        lines = []
+        for item in self.assignments:
+            lines.append(f"{item.member}: {item.task}")
+            if item.outcome:
+                lines.append(f"Expected outcome: {item.outcome}")
+        if self.summary:
+            lines.extend(["", SUMMARY_HEADING, self.summary])
+        return "\n".join(lines)
+
+    def workflow_text(self) -> str:
+        """The workflow as numbered steps with their expected outcomes."""
+        return "\n".join(
+            f"{number}. {step}" + (f"\n   Expected outcome: {outcome}" if outcome else "")
+            for number, (step, outcome) in enumerate(self.workflow, start=1)
+        )
+
+    def names_text(self) -> str:
+        """The name suggestions as a numbered list."""
+        return "\n".join(f"{number}. {name}" for number, name in enumerate(self.names, start=1))
+
+
+def _strings(item: Any, keys: List[str], where: str) -> List[str]:
+    if not isinstance(item, dict):
+        raise StructuredOutputError(f"{where} is not an object")
+    values = []
+    for key in keys:
+        value = item.get(key)
+        if not isinstance(value, str):
+            raise StructuredOutputError(f"{where} has no string '{key}'")
+        values.append(value.strip())
+    return values
+
+
+def parse_structured_setup(content: str, team_members: List[Dict[str, str]]) -> StructuredSetup:
+    """
+    Validates a combined response against SETUP_SCHEMA and the roster.
+
+    Assignments for names that are not on the roster are dropped and names are
+    normalized to their roster spelling.
+
+    Args:
+        content (str): The JSON text returned by the model.
+        team_members (List[Dict[str, str]]): Team member names and expertise.
+
+    Returns:
+        StructuredSetup: The parsed response.
+
+    Raises:
+        StructuredOutputError: If the response is malformed or a section is empty.
+    """
+    try:
+        data = json.loads(content or "")
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Response is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise StructuredOutputError("Response is not a JSON object")
+    for key in ("assignments", "workflow", "names"):
+        if not isinstance(data.get(key), list) or not data[key]:
+            raise StructuredOutputError(f"'{key}' is missing or empty")
+    if not isinstance(data.get("summary"), str):
+        raise StructuredOutputError("'summary' is missing")
+
+    roster = {member["name"].casefold(): member["name"] for member in team_members}
+    assignments = []
+    for index, item in enumerate(data["assignments"]):
+        member, task, outcome = _strings(item, ["member", "task", "outcome"], f"assignments[{index}]")
+        name = roster.get(member.casefold())
+        if name is not None and task:
+            assignments.append(TaskAssignment(name, task, outcome))
+    if not assignments:
+        raise StructuredOutputError("No assignment names a team member")
+
+    workflow = tuple(
+        tuple(_strings(item, ["step", "outcome"], f"workflow[{index}]")) for index, item in enumerate(data["workflow"])
+    )
+    names = tuple(name.strip() for name in data["names"] if isinstance(name, str) and name.strip())
+    if not names:
+        raise StructuredOutputError("'names' has no suggestions")
+    return StructuredSetup(ParsedAssignments(tuple(assignments)), workflow, names, data["summary"].strip())
+
+
+def generate_structured_setup(client: OpenAI, project_description: str, team_members: List[Dict[str, str]]) -> StructuredSetup:
+    """
+    Generates a project summary, assignments, workflow and project names in one schema-constrained completion.
+
+    The project description is sent once instead of once per stage.
+
+    Args:
+        client (OpenAI): The API client.
+        project_description (str): The project description.
+        team_members (List[Dict[str, str]]): Team member names and expertise.
+
+    Returns:
+        StructuredSetup: The validated response.
+
+    Raises:
+        StructuredOutputError: If the response does not match the schema.
+        LLMError: If the request fails.
+    """
+    expertise_list, shortlist = compact_expertise(project_description, team_members)
+    candidates = f"Members whose expertise best matches each project area:\n{shortlist}\n" if shortlist else ""
+    user_input = (
+        f"The project is described as: '{project_description}'.\n"
+        f"{candidates}"
+        f"The following team members with different expertise are involved:\n{expertise_list}.\n"
+        "Summarize the project, assign each team member a task based on their expertise with its expected outcome, "
+        "outline a step-by-step workflow with the expected outcome of each step, "
+        "and suggest 5 creative, unique project names that reflect the project's objectives."
+    )
+    messages = [
+        {
+            "role": "system",
+            "content": "You are an AI assistant who sets up projects: you assign tasks based on expertise, outline workflows and suggest project names. Answer in JSON.",
+        },
+        {
+            "role": "user",
+            "content": user_input,
+        },
+    ]
+    try:
+        response = client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=messages,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "project_setup", "schema": SETUP_SCHEMA, "strict": True},
+            },
+        )
+    except OpenAIError as e:
+        raise as_llm_error(e) from e
+    return parse_structured_setup(response.choices[0].message.content, team_members)
@@ -1,29 +1,79 @@
 # functions/utils.py
 
 import os
-import tempfile
-from typing import Optional
-import PyPDF2
-import docx
+import hashlib
+import threading
+import time
+from typing import Dict, Optional
 import streamlit as st
 import re  # Import regex for sanitizing filenames
+from config import EXTRACTION_CACHE_MAX_BYTES
+from .cache import LRUCache
+from .pdf_extraction import iter_pdf_pages
+from .metrics import timed
+
+# Extracted text keyed by (MIME type, SHA-256 of the uploaded bytes); shared by every session in the process
+_extraction_cache = LRUCache(max_bytes=EXTRACTION_CACHE_MAX_BYTES, sizeof=lambda text: len(text.encode("utf-8")))
+_extraction_timings = {"extractions": 0, "total_seconds": 0.0, "last_seconds": 0.0, "max_seconds": 0.0}
+_timings_lock = threading.Lock()
 
 
 def extract_text_from_pdf(file) -> str:
-    reader = PyPDF2.PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+    return "".join(f"{page}\n" for page in iter_pdf_pages(file))
 
 
 def extract_text_from_docx(file) -> str:
+    import docx
+
     doc = docx.Document(file)
     text = "\n".join([para.text for para in doc.paragraphs])
     return text
 
 
+@timed("extraction")
 def extract_text(file) -> Optional[str]:
+    """
+    Extracts the text of an uploaded file, reusing earlier results for identical content.
+
+    Streamlit reruns the script on every interaction, so results are memoized by a
+    hash of the uploaded bytes. Failed extractions are not cached.
+
+    Args:
+        file: The uploaded file (anything with ``type`` and ``getvalue()``).
+
+    Returns:
+        Optional[str]: The extracted text, or None if extraction failed.
+    """
+    key = (file.type, hashlib.sha256(file.getvalue()).hexdigest())
+    text = _extraction_cache.get(key)
+    if text is not None:
+        return text
+
+    start = time.perf_counter()
+    text = _extract_text_uncached(file)
+    _record_extraction_time(time.perf_counter() - start)
+    if text is not None:
+        _extraction_cache.set(key, text)
+    return text
+
+
+def extraction_cache_stats() -> Dict[str, float]:
+    """Returns hit/miss/size counters of the extraction cache together with extraction timings."""
+    with _timings_lock:
+        stats = dict(_extraction_timings)
+    stats.update(_extraction_cache.stats())
+    return stats
+
+
+def _record_extraction_time(seconds: float):
+    with _timings_lock:
+        _extraction_timings["extractions"] += 1
+        _extraction_timings["total_seconds"] += seconds
+        _extraction_timings["last_seconds"] = seconds
+        _extraction_timings["max_seconds"] = max(_extraction_timings["max_seconds"], seconds)
+
+
+def _extract_text_uncached(file) -> Optional[str]:
     try:
         if file.type == "application/pdf":
             return extract_text_from_pdf(file)
@@ -1,42 +1,45 @@
 # functions/workload_distribution.py
 
-from typing import List, Dict
+from typing import Dict, Iterator, List, Union
 from openai import OpenAI, OpenAIError
 from config import MODEL_NAME
-from .utils import extract_text
+from .streaming import stream_chat_completion
+from .errors import as_llm_error
+from .expertise_index import compact_expertise
 
-def get_workload_distribution(client: OpenAI, project_description: str, team_members: List[Dict[str, str]]) -> str:
+def get_workload_distribution(client: OpenAI, project_description: str, team_members: List[Dict[str, str]], stream: bool = False) -> Union[str, Iterator[str]]:
     try:
-        # Construct expertise list
-        expertise_list = "\n".join([f"{member['name']}: {member['expertise']}" for member in team_members])
-        
+        # Construct expertise list, summarized with a shortlist of candidates per project area when the prompt is long
+        expertise_list, shortlist = compact_expertise(project_description, team_members)
+        candidates = f"Members whose expertise best matches each project area:\n{shortlist}\n" if shortlist else ""
+
         user_input = (
             f"The project is described as: '{project_description}'.\n"
+            f"{candidates}"
             f"The following team members with different expertise are involved:\n{expertise_list}.\n"
             "Please intelligently assign tasks based on their expertise, "
             "summarize the project, and provide expected outcomes."
         )
         
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an AI assistant who assigns project tasks intelligently based on expertise, summarizes project details, and provides expected outcomes.",
-                },
-                {
-                    "role": "user",
-                    "content": user_input,
-                },
-            ],
-        )
+        messages = [
+            {
+                "role": "system",
+                "content": "You are an AI assistant who assigns project tasks intelligently based on expertise, summarizes project details, and provides expected outcomes.",
+            },
+            {
+                "role": "user",
+                "content": user_input,
+            },
+        ]
+        if stream:
+            return stream_chat_completion(client, messages)
+
+        response = client.chat.completions.create(model=MODEL_NAME, messages=messages)
 
         # Extract and return the assistant's response
         message = response.choices[0].message.content
         return message
 
     except OpenAIError as e:
-        return f"API request failed: {str(e)}"
-    except Exception as e:
-        return f"An error occurred: {str(e)}"
+        raise as_llm_error(e) from e
 
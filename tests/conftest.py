@@ -0,0 +1,48 @@
+# tests/conftest.py
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# config.py reads the API settings from Streamlit secrets unless these are set
+os.environ.setdefault("WORKUP_API_KEY", "test-key")
+os.environ.setdefault("WORKUP_BASE_URL", "http://localhost:1")
+os.environ.setdefault("WORKUP_MODEL_NAME", "test-model")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    """Stands in for the ``time`` module of the code under test; advance() moves both clocks."""
+
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+        self.slept = []
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def fake_client(create):
+    """An object with the OpenAI client's ``chat.completions.create`` entry point."""
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
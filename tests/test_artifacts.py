@@ -0,0 +1,63 @@
+# tests/test_artifacts.py
+
+import os
+
+import pytest
+
+from functions import artifacts
+from functions.artifacts import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(artifacts, "time", clock)
+    store = ArtifactStore(str(tmp_path / "artifacts"), max_disk_bytes=100, memory_bytes=1000, ttl_seconds=60)
+    yield store
+    store.close()
+
+
+def test_put_is_content_addressed(store):
+    first = store.put(b"flowchart", alias="flowchart:a")
+    assert store.put(b"flowchart", alias="flowchart:b") == first
+    assert store.get(first) == b"flowchart"
+    assert store.lookup("flowchart:a") == store.lookup("flowchart:b") == first
+    assert store.stats()["artifacts"] == 1
+
+
+def test_artifacts_expire_after_ttl(store, clock):
+    artifact_id = store.put(b"scaffold", alias="scaffold")
+    clock.advance(59)
+    assert store.has(artifact_id)
+    assert store.get(artifact_id) == b"scaffold"  # Reading refreshes the access time
+    clock.advance(61)
+    assert store.lookup("scaffold") is None
+    assert not store.has(artifact_id)
+    assert store.get(artifact_id) is None
+    assert not os.path.exists(store.path(artifact_id))
+
+
+def test_expired_artifacts_are_removed_on_put(store, clock):
+    old = store.put(b"old")
+    clock.advance(61)
+    store.put(b"new")
+    assert store.stats()["artifacts"] == 1
+    assert not os.path.exists(store.path(old))
+
+
+def test_least_recently_used_artifacts_are_evicted(store, clock):
+    first = store.put(b"a" * 40)
+    clock.advance(1)
+    second = store.put(b"b" * 40)
+    clock.advance(1)
+    store.get(first)
+    clock.advance(1)
+    third = store.put(b"c" * 40)
+    assert store.has(first) and store.has(third)
+    assert not store.has(second)
+    assert store.stats()["disk_bytes"] == 80
+
+
+def test_missing_file_is_not_reported_as_stored(store):
+    artifact_id = store.put(b"zip")
+    os.remove(store.path(artifact_id))
+    assert not store.has(artifact_id)
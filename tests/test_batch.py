@@ -0,0 +1,64 @@
+# tests/test_batch.py
+
+import json
+import os
+
+import pytest
+
+from functions import batch
+from functions.batch import artifacts_dirname, run_batch
+from functions.pipeline import ASSIGNMENT, NAMING, WORKFLOW
+
+
+@pytest.fixture(autouse=True)
+def pipeline(monkeypatch):
+    def run_project_setup(client, description, team_members):
+        return {ASSIGNMENT: "Alice: API", WORKFLOW: "1. Plan", NAMING: "Atlas", "project_zip": b"zip", "errors": {}}
+
+    monkeypatch.setattr(batch, "run_project_setup", run_project_setup)
+
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_malformed_lines_become_error_records(tmp_path):
+    input_path = write_lines(tmp_path / "projects.jsonl", [
+        json.dumps({"id": "a", "description": "First"}),
+        '{"id": "b", "description": ',
+        "[1, 2]",
+        json.dumps({"id": "c", "description": "Third"}),
+    ])
+    output_path = str(tmp_path / "results.jsonl")
+    counts = run_batch(None, input_path, output_path, str(tmp_path / "artifacts"), concurrency=2)
+    assert counts == {"ok": 2, "error": 2, "skipped": 0}
+    records = {record["id"]: record for record in read_records(output_path)}
+    assert records["a"]["status"] == records["c"]["status"] == "ok"
+    assert records["line-2"]["status"] == "error" and "Line 2" in records["line-2"]["errors"]["input"]
+    assert records["line-3"]["status"] == "error"
+
+    # A restart skips the finished projects and reports the bad lines again
+    assert run_batch(None, input_path, output_path, str(tmp_path / "artifacts")) == {"ok": 0, "error": 2, "skipped": 2}
+
+
+def test_ids_cannot_escape_the_artifacts_directory(tmp_path):
+    input_path = write_lines(tmp_path / "projects.jsonl", [json.dumps({"id": "../../escaped", "description": "x"})])
+    artifacts_dir = tmp_path / "run" / "artifacts"
+    run_batch(None, input_path, str(tmp_path / "results.jsonl"), str(artifacts_dir))
+    zip_path = read_records(tmp_path / "results.jsonl")[0]["artifacts"]["project_structure"]
+    assert os.path.commonpath([os.path.abspath(zip_path), str(artifacts_dir)]) == str(artifacts_dir)
+    assert not (tmp_path / "escaped").exists()
+
+
+def test_artifacts_dirname_keeps_plain_ids_and_separates_sanitized_ones():
+    assert artifacts_dirname("project-1.v2") == "project-1.v2"
+    assert artifacts_dirname("a/b") != artifacts_dirname("a_b")
+    for unsafe in ("..", ".", "../x", "a\\b", ".hidden"):
+        name = artifacts_dirname(unsafe)
+        assert os.sep not in name and "/" not in name and not name.startswith(".")
@@ -0,0 +1,153 @@
+# tests/test_cache.py
+
+import pytest
+
+from conftest import fake_client
+from functions import cache
+from functions.cache import CachedClient, LRUCache, ResponseCache, request_fingerprint
+
+
+@pytest.fixture
+def response_cache(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(cache, "time", clock)
+    response_cache = ResponseCache(str(tmp_path / "responses.sqlite3"), max_memory_entries=2,
+                                   max_disk_bytes=100, ttl_seconds=60)
+    yield response_cache
+    response_cache.close()
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert "a" in lru and "c" in lru and "b" not in lru
+    assert lru.stats()["evictions"] == 1
+
+
+def test_lru_cache_respects_the_byte_budget():
+    lru = LRUCache(max_bytes=10)
+    lru.set("a", b"12345")
+    lru.set("b", b"12345")
+    lru.set("c", b"1")
+    assert "a" not in lru and lru.total_bytes == 6
+    lru.set("huge", b"x" * 11)
+    assert "huge" not in lru
+
+
+def test_fingerprint_ignores_non_semantic_arguments():
+    messages = [{"role": "user", "content": "hi"}]
+    assert request_fingerprint(model="m", messages=messages) == request_fingerprint(
+        model="m", messages=messages, stream=True, stream_options={"include_usage": True}, timeout=5)
+    assert request_fingerprint(model="m", messages=messages) != request_fingerprint(
+        model="m", messages=messages, temperature=0.5)
+
+
+def test_disk_tier_survives_memory_eviction(response_cache):
+    for key in ("a", "b", "c"):
+        response_cache.set(key, key * 10)
+    assert response_cache.get("a") == "a" * 10
+    assert response_cache.stats()["disk_hits"] == 1
+
+
+def test_entries_expire(response_cache, clock):
+    response_cache.set("a", "value")
+    clock.advance(61)
+    assert response_cache.get("a") is None
+    assert response_cache.stats()["misses"] == 1
+
+
+def test_disk_tier_stays_within_budget(response_cache, clock):
+    for key in ("a", "b", "c"):
+        response_cache.set(key, "x" * 40)
+        clock.advance(1)
+    response_cache._memory.clear()
+    assert response_cache.get("a") is None
+    assert response_cache.get("c") == "x" * 40
+    assert response_cache.stats()["disk_evictions"] == 1
+    assert response_cache.stats()["disk_bytes"] == 80
+    response_cache.set("c", "y" * 10)  # Replacing an entry only counts its new size
+    assert response_cache.stats()["disk_bytes"] == 50
+
+
+def test_disk_size_is_restored_on_open(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    first = ResponseCache(path, 8, 1000, 60)
+    first.set("a", "x" * 30)
+    first.close()
+    reopened = ResponseCache(path, 8, 1000, 60)
+    assert reopened.stats()["disk_bytes"] == 30
+    reopened.close()
+
+
+def test_memory_tier_respects_the_byte_budget(tmp_path):
+    response_cache = ResponseCache(str(tmp_path / "responses.sqlite3"), 100, 10 ** 6, 60, max_memory_bytes=100)
+    response_cache.set("a", "x" * 60)
+    response_cache.set("b", "x" * 60)
+    assert response_cache.stats()["memory_entries"] == 1
+    assert response_cache.stats()["memory_bytes"] == 60
+    assert response_cache.get("a") == "x" * 60  # Still on disk
+    response_cache.close()
+
+
+def _chunk(content=None, finish_reason=None, usage=None):
+    from openai.types.chat import ChatCompletionChunk
+
+    return ChatCompletionChunk.model_validate({
+        "id": "c1", "object": "chat.completion.chunk", "created": 0, "model": "m",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": finish_reason}] if usage is None else [],
+        "usage": usage,
+    })
+
+
+def test_streams_are_cached_with_their_finish_reason(tmp_path):
+    response_cache = ResponseCache(str(tmp_path / "responses.sqlite3"), 8, 10 ** 6, 60)
+    chunks = [_chunk("Hello"), _chunk(" world"), _chunk(finish_reason="tool_calls"),
+              _chunk(usage={"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5})]
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return iter(chunks)
+
+    client = CachedClient(fake_client(create), response_cache)
+    request = dict(model="m", messages=[{"role": "user", "content": "hi"}], stream=True)
+    assert len(list(client.create(**request))) == 4
+
+    replayed = list(client.create(**request))
+    assert len(calls) == 1
+    assert replayed[0].choices[0].delta.content == "Hello world"
+    assert replayed[0].choices[0].finish_reason == "tool_calls"
+    completion = client.create(**dict(request, stream=False))
+    assert completion.usage.completion_tokens == 2
+    response_cache.close()
+
+
+def _completion(finish_reason):
+    from openai.types.chat import ChatCompletion
+
+    return ChatCompletion.model_validate({
+        "id": "c1", "object": "chat.completion", "created": 0, "model": "m",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello"}, "finish_reason": finish_reason}],
+    })
+
+
+@pytest.mark.parametrize("finish_reason, cached", [("stop", True), ("length", False), ("content_filter", False)])
+def test_only_complete_responses_are_cached(tmp_path, finish_reason, cached):
+    response_cache = ResponseCache(str(tmp_path / "responses.sqlite3"), 8, 10 ** 6, 60)
+    client = CachedClient(fake_client(lambda **kwargs: _completion(finish_reason)), response_cache)
+    request = dict(model="m", messages=[{"role": "user", "content": "hi"}])
+    client.create(**request)
+    assert (response_cache.get(request_fingerprint(**request)) is not None) == cached
+    response_cache.close()
+
+
+@pytest.mark.parametrize("last_chunks", [[], [_chunk(finish_reason="length")]])
+def test_interrupted_or_cut_off_streams_are_not_cached(tmp_path, last_chunks):
+    response_cache = ResponseCache(str(tmp_path / "responses.sqlite3"), 8, 10 ** 6, 60)
+    client = CachedClient(fake_client(lambda **kwargs: iter([_chunk("Hel")] + last_chunks)), response_cache)
+    request = dict(model="m", messages=[{"role": "user", "content": "hi"}], stream=True)
+    list(client.create(**request))
+    assert response_cache.get(request_fingerprint(**request)) is None
+    response_cache.close()
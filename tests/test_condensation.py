@@ -0,0 +1,84 @@
+# tests/test_condensation.py
+
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import fake_client
+from functions import condensation
+from functions.condensation import chunk_text, condense_brief, estimate_tokens, summarize_chunk
+from functions.errors import LLMServerError
+
+LONG_DESCRIPTION = "\n\n".join(f"Section {i}: " + "requirement detail " * 150 for i in range(12))
+
+
+def completion(content, finish_reason="stop"):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content),
+                                                    finish_reason=finish_reason)])
+
+
+@pytest.fixture(autouse=True)
+def empty_brief_cache():
+    condensation._brief_cache.clear()
+    yield
+    condensation._brief_cache.clear()
+
+
+def test_short_descriptions_are_kept():
+    client = fake_client(lambda **kwargs: pytest.fail("no call expected"))
+    assert condense_brief(client, "A small project.") == ("A small project.", True)
+
+
+def test_long_descriptions_fit_the_budget():
+    client = fake_client(lambda **kwargs: completion("Summary of a section."))
+    brief, complete = condense_brief(client, LONG_DESCRIPTION, token_budget=500, chunk_tokens=400)
+    assert complete
+    assert estimate_tokens(brief) <= 500
+    assert "Summary of a section." in brief
+
+
+@pytest.mark.parametrize("response", [completion(None), completion("   "), SimpleNamespace(choices=[])])
+def test_missing_content_falls_back_to_truncation(response):
+    client = fake_client(lambda **kwargs: response)
+    assert summarize_chunk(client, "x" * 1000, 10) == ("x" * 40, False)
+
+
+def test_cut_off_summary_is_incomplete():
+    client = fake_client(lambda **kwargs: completion("Partial summ", finish_reason="length"))
+    assert summarize_chunk(client, "x" * 1000, 10) == ("Partial summ", False)
+
+
+def test_provider_errors_fall_back_but_other_errors_raise():
+    def unavailable(**kwargs):
+        raise LLMServerError("unavailable", 503)
+
+    def bug(**kwargs):
+        raise KeyError("bug")
+
+    assert summarize_chunk(fake_client(unavailable), "x" * 1000, 10)[1] is False
+    with pytest.raises(KeyError):
+        summarize_chunk(fake_client(bug), "x" * 1000, 10)
+
+
+def test_incomplete_briefs_are_not_cached():
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise LLMServerError("unavailable", 503)
+        return completion("Summary of a section.")
+
+    client = fake_client(create)
+    assert condense_brief(client, LONG_DESCRIPTION, token_budget=500, chunk_tokens=400)[1] is False
+    brief, complete = condense_brief(client, LONG_DESCRIPTION, token_budget=500, chunk_tokens=400)
+    assert complete
+    calls.clear()
+    assert condense_brief(client, LONG_DESCRIPTION, token_budget=500, chunk_tokens=400) == (brief, True)
+    assert calls == []
+
+
+def test_chunks_cover_the_text():
+    chunks = chunk_text(LONG_DESCRIPTION, 400)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 400 for chunk in chunks)
@@ -0,0 +1,25 @@
+# tests/test_expertise_index.py
+
+from functions.expertise_index import compact_expertise
+
+LONG_EXPERTISE = ("Ten years of backend development in Python and Go, designing REST and gRPC services, "
+                  "PostgreSQL schema design, query tuning, Kafka pipelines and Kubernetes deployments.")
+TEAM = [{"name": f"Member {i}", "expertise": LONG_EXPERTISE + f" Specialist in area {i}."} for i in range(6)]
+DESCRIPTION = "Build a Kafka pipeline into PostgreSQL. Deploy the services on Kubernetes."
+
+
+def verbatim(team):
+    return "\n".join(f"{member['name']}: {member['expertise']}" for member in team)
+
+
+def test_expertise_within_budget_is_sent_verbatim():
+    assert compact_expertise(DESCRIPTION, TEAM, token_budget=10_000) == (verbatim(TEAM), "")
+
+
+def test_expertise_over_budget_is_summarized():
+    expertise_list, shortlist = compact_expertise(DESCRIPTION, TEAM, token_budget=100)
+    assert len(expertise_list) < len(verbatim(TEAM))
+    assert LONG_EXPERTISE not in expertise_list
+    assert all(f"Member {i}:" in expertise_list for i in range(len(TEAM)))
+    # Never longer than the verbatim roster, shortlist included
+    assert len(expertise_list) + len(shortlist) < len(verbatim(TEAM))
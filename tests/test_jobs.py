@@ -0,0 +1,79 @@
+# tests/test_jobs.py
+
+import time
+
+import pytest
+
+from functions import jobs
+from functions.artifacts import ArtifactStore
+from functions.jobs import DONE, FAILED, JOB_STAGES, JobManager
+from functions.pipeline import ASSIGNMENT, NAMING, WORKFLOW, StageEvent
+from functions.stage_graph import StageMemo
+
+TEAM = [{"name": "Alice", "expertise": "Python backend"}]
+OUTPUTS = {ASSIGNMENT: "Alice: Build the API\nExpected outcome: A working API", WORKFLOW: "1. Plan", NAMING: "Atlas"}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path / "artifacts"), max_disk_bytes=10 ** 6, memory_bytes=10 ** 6, ttl_seconds=None)
+    monkeypatch.setattr(jobs, "StageMemo", lambda: StageMemo(store))
+    monkeypatch.setattr(jobs, "get_artifact_store", lambda: store)
+    monkeypatch.setattr(jobs, "SIMILARITY_ENABLED", False)
+    monkeypatch.setattr(jobs, "condense_brief", lambda client, description: (description, True))
+    monkeypatch.setattr(jobs, "run_llm_stages", lambda client, brief, team, stream, stages, structured: iter(
+        [StageEvent(stage, OUTPUTS[stage], done=True) for stage in stages]))
+    monkeypatch.setattr(jobs, "generate_flowchart", lambda assignments: b"png")
+    monkeypatch.setattr(jobs, "generate_project_structure", lambda assignments: b"zip")
+    manager = JobManager(str(tmp_path / "jobs"), max_workers=1)
+    yield manager
+    store.close()
+
+
+def wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+
+def test_finished_job_is_reused(manager):
+    job = manager.submit(None, "A project", TEAM, structured=False)
+    wait(job)
+    assert job.status == DONE and job.error is None
+    assert job.stages[NAMING]["text"] == "Atlas"
+    assert manager.submit(None, "A project", TEAM) is job
+
+
+def test_unexpected_error_fails_every_unfinished_stage(manager, monkeypatch):
+    def fail(client, description):
+        raise RuntimeError("provider exploded")
+
+    monkeypatch.setattr(jobs, "condense_brief", fail)
+    job = manager.submit(None, "A project", TEAM, structured=False)
+    wait(job)
+    assert job.status == FAILED
+    assert job.error == "provider exploded"
+    assert all(job.stages[stage]["status"] == FAILED for stage in JOB_STAGES)
+    assert {job.stages[stage]["error"] for stage in JOB_STAGES} == {"provider exploded"}
+    # The reason survives a server restart
+    assert manager._load(job.id).error == "provider exploded"
+
+
+def test_failed_job_is_retried(manager, monkeypatch):
+    store_writes = []
+
+    def fail_once(key, text):
+        if not store_writes:
+            store_writes.append(key)
+            raise OSError("disk full")
+
+    monkeypatch.setattr(StageMemo, "put_text", lambda self, key, text: fail_once(key, text))
+    failed = manager.submit(None, "A project", TEAM, structured=False)
+    wait(failed)
+    assert failed.status == FAILED and failed.error == "disk full"
+
+    retried = manager.submit(None, "A project", TEAM, structured=False)
+    assert retried is not failed
+    wait(retried)
+    assert retried.status == DONE
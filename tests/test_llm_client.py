@@ -0,0 +1,182 @@
+# tests/test_llm_client.py
+
+import pytest
+
+from conftest import fake_client
+from functions import llm_client
+from functions.errors import CircuitOpenError, LLMRateLimitError, LLMServerError
+from functions.llm_client import CircuitBreaker, ResilientClient
+
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    monkeypatch.setattr(llm_client, "time", clock)
+    return CircuitBreaker(failure_threshold=2, reset_seconds=30)
+
+
+def open_circuit(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_circuit_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_trial_through(breaker, clock):
+    open_circuit(breaker)
+    clock.advance(30)
+    assert breaker.state == "half-open"
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_failed_trial_reopens_the_circuit(breaker, clock):
+    open_circuit(breaker)
+    clock.advance(30)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.advance(29)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_released_trial_frees_the_slot(breaker, clock):
+    open_circuit(breaker)
+    clock.advance(30)
+    breaker.before_call()
+    breaker.release_trial()
+    assert breaker.state == "half-open"
+    assert breaker.before_call() is True
+
+
+def test_rate_limited_trial_closes_the_circuit(breaker, clock):
+    def create(**kwargs):
+        raise LLMRateLimitError("slow down")
+
+    client = ResilientClient(fake_client(create), max_attempts=1, breaker=breaker)
+    open_circuit(breaker)
+    clock.advance(30)
+    with pytest.raises(LLMRateLimitError):
+        client.create(model="m", messages=[])
+    # The provider answered, so it is reachable again
+    assert breaker.state == "closed"
+
+
+def test_unexpected_exception_in_trial_does_not_block_the_circuit(breaker, clock):
+    def create(**kwargs):
+        raise RuntimeError("bug")
+
+    client = ResilientClient(fake_client(create), max_attempts=1, breaker=breaker)
+    open_circuit(breaker)
+    clock.advance(30)
+    with pytest.raises(RuntimeError):
+        client.create(model="m", messages=[])
+    assert breaker.before_call() is True
+
+
+def test_server_errors_are_retried_then_raised(breaker, clock):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise LLMServerError("unavailable", 503)
+
+    client = ResilientClient(fake_client(create), max_attempts=3, base_delay=1, max_delay=4,
+                             breaker=CircuitBreaker(failure_threshold=10))
+    with pytest.raises(LLMServerError):
+        client.create(model="m", messages=[])
+    assert len(calls) == 3
+    assert len(clock.slept) == 2
+    assert all(0 <= delay <= 4 for delay in clock.slept)
+
+
+def test_retry_after_is_honoured(breaker, clock):
+    responses = iter([LLMRateLimitError("slow down", retry_after=2.5), "ok"])
+
+    def create(**kwargs):
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client = ResilientClient(fake_client(create), max_attempts=2, breaker=breaker)
+    assert client.create(model="m", messages=[]) == "ok"
+    assert clock.slept == [2.5]
+
+
+def failing_stream(chunks, error):
+    yield from chunks
+    raise error
+
+
+def test_stream_success_is_recorded_when_it_ends(breaker, clock):
+    client = ResilientClient(fake_client(lambda **kwargs: iter(["a", "b"])), max_attempts=1, breaker=breaker)
+    open_circuit(breaker)
+    clock.advance(30)
+    stream = client.create(model="m", messages=[], stream=True)
+    assert next(stream) == "a"
+    # Still the trial: the stream has not ended yet
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert list(stream) == ["b"]
+    assert breaker.state == "closed"
+
+
+def test_stream_failing_midway_counts_as_a_failure(breaker):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return failing_stream(["a"], LLMServerError("dropped", 502))
+
+    client = ResilientClient(fake_client(create), max_attempts=3, breaker=breaker)
+    stream = client.create(model="m", messages=[], stream=True)
+    assert next(stream) == "a"
+    # Chunks were already passed on, so the request is not repeated
+    with pytest.raises(LLMServerError):
+        next(stream)
+    assert len(calls) == 1
+    # A second failure opens the circuit
+    with pytest.raises(LLMServerError):
+        list(client.create(model="m", messages=[], stream=True))
+    assert breaker.state == "open"
+
+
+def test_stream_failing_before_the_first_chunk_is_retried(breaker, clock):
+    import httpx
+
+    streams = iter([failing_stream([], httpx.ReadError("reset")), iter(["a", "b"])])
+    client = ResilientClient(fake_client(lambda **kwargs: next(streams)), max_attempts=2, base_delay=1,
+                             breaker=breaker)
+    assert list(client.create(model="m", messages=[], stream=True)) == ["a", "b"]
+    assert len(clock.slept) == 1
+    assert breaker.state == "closed"
+
+
+def test_abandoned_trial_stream_frees_the_slot(breaker, clock):
+    client = ResilientClient(fake_client(lambda **kwargs: iter(["a", "b"])), max_attempts=1, breaker=breaker)
+    open_circuit(breaker)
+    clock.advance(30)
+    stream = client.create(model="m", messages=[], stream=True)
+    next(stream)
+    stream.close()
+    assert breaker.before_call() is True
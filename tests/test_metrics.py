@@ -0,0 +1,25 @@
+# tests/test_metrics.py
+
+import logging
+
+from functions import metrics
+from functions.metrics import MetricEvent, configure_log_sink, log_sink
+
+
+def test_log_sink_lines_are_emitted(monkeypatch):
+    records = []
+    monkeypatch.setattr(metrics._log_handler, "emit", records.append)
+    log_sink(MetricEvent("assignment", "llm", 1.5, prompt_tokens=10, completion_tokens=20))
+    assert [record.getMessage() for record in records] == [
+        "kind=llm stage=assignment seconds=1.5000 error=None prompt_tokens=10 completion_tokens=20"]
+
+
+def test_configuring_again_keeps_a_single_handler():
+    handlers = list(metrics.logger.handlers)
+    try:
+        configure_log_sink("WARNING")
+        assert metrics.logger.handlers == handlers
+        assert not metrics.logger.isEnabledFor(logging.INFO)
+    finally:
+        configure_log_sink()
+    assert metrics.logger.isEnabledFor(logging.INFO)
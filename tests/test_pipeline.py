@@ -0,0 +1,76 @@
+# tests/test_pipeline.py
+
+import threading
+
+import pytest
+
+from functions import pipeline
+from functions.pipeline import ASSIGNMENT, NAMING, WORKFLOW, run_llm_stages
+
+TEAM = [{"name": "Alice", "expertise": "Python backend"}]
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Replaces the three stage calls; each one waits until all three are running."""
+    started = threading.Barrier(3, timeout=5)
+    release_workflow = threading.Event()
+
+    def assignment(client, description, team_members, stream=False):
+        started.wait()
+        raise RuntimeError("assignment failed")
+
+    def workflow(client, description, stream=False):
+        started.wait()
+        assert release_workflow.wait(timeout=5)
+        return iter(["1. Plan", "\n2. Build"]) if stream else "1. Plan\n2. Build"
+
+    def naming(client, description, stream=False):
+        started.wait()
+        return iter(["Atlas", ", Beacon"]) if stream else "Atlas, Beacon"
+
+    monkeypatch.setattr(pipeline, "get_workload_distribution", assignment)
+    monkeypatch.setattr(pipeline, "get_project_workflow", workflow)
+    monkeypatch.setattr(pipeline, "suggest_project_names", naming)
+    return release_workflow
+
+
+def test_stages_run_concurrently_and_report_as_they_complete(stages):
+    events = run_llm_stages(None, "A project", TEAM)
+    # The barrier only opens if all three stages are running at the same time
+    first = [next(events), next(events)]
+    assert {event.stage for event in first} == {ASSIGNMENT, NAMING}
+    assert not stages.is_set()  # Workflow is still running
+
+    stages.set()
+    last = next(events)
+    assert last.stage == WORKFLOW and last.done and last.text == "1. Plan\n2. Build"
+    assert list(events) == []
+
+
+def test_failing_stage_does_not_hide_the_others(stages):
+    stages.set()
+    results = {event.stage: event for event in run_llm_stages(None, "A project", TEAM)}
+    assert isinstance(results[ASSIGNMENT].error, RuntimeError)
+    assert results[ASSIGNMENT].text == ""
+    assert results[WORKFLOW].error is None and results[WORKFLOW].text == "1. Plan\n2. Build"
+    assert results[NAMING].error is None and results[NAMING].text == "Atlas, Beacon"
+
+
+def test_streamed_stages_report_partial_text(stages):
+    stages.set()
+    events = list(run_llm_stages(None, "A project", TEAM, stream=True))
+    finals = {event.stage: event for event in events if event.done}
+    assert set(finals) == {ASSIGNMENT, WORKFLOW, NAMING}
+    assert finals[NAMING].text == "Atlas, Beacon"
+    # Partial events only ever carry a prefix of the final text, and precede it
+    for stage in (WORKFLOW, NAMING):
+        stage_events = [event for event in events if event.stage == stage]
+        assert stage_events[-1].done
+        assert all(finals[stage].text.startswith(event.text) for event in stage_events)
+
+
+def test_only_requested_stages_run(stages, monkeypatch):
+    monkeypatch.setattr(pipeline, "suggest_project_names", lambda client, description: "Atlas")
+    events = list(run_llm_stages(None, "A project", TEAM, stages=(NAMING,), max_workers=1))
+    assert [(event.stage, event.text) for event in events] == [(NAMING, "Atlas")]
@@ -0,0 +1,58 @@
+# tests/test_prefetch.py
+
+import time
+
+import pytest
+
+from functions import prefetch
+from functions.pipeline import NAMING, WORKFLOW, StageEvent
+from functions.prefetch import READY, SCHEDULED, Prefetcher, description_key
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    monkeypatch.setattr(prefetch, "condense_brief", lambda client, description: (description, True))
+    monkeypatch.setattr(prefetch, "run_llm_stages", lambda client, brief, team, stream, stages: iter(
+        [StageEvent(stage, f"{stage} for {brief}", done=True) for stage in stages]))
+
+
+@pytest.fixture
+def idle_prefetcher(clock, monkeypatch):
+    monkeypatch.setattr(prefetch, "time", clock)
+    # The debounce never elapses, so requests stay scheduled
+    prefetcher = Prefetcher(debounce=3600, max_workers=1, session_idle=60)
+    yield prefetcher
+    for timer in prefetcher._timers.values():
+        timer.cancel()
+
+
+def test_prefetched_stages_are_handed_over(stages):
+    prefetcher = Prefetcher(debounce=0, max_workers=1)
+    prefetcher.request("s1", None, "A project")
+    deadline = time.monotonic() + 5
+    while prefetcher.status("A project") != READY and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert prefetcher.take("A project") == {WORKFLOW: "workflow for A project", NAMING: "naming for A project"}
+
+
+def test_shared_description_stays_wanted_until_its_last_session_leaves(idle_prefetcher):
+    assert idle_prefetcher.request("s1", None, "A project") == SCHEDULED
+    assert idle_prefetcher.request("s2", None, "A project") == SCHEDULED
+    idle_prefetcher.cancel("s1")
+    assert idle_prefetcher.status("A project") == SCHEDULED
+    idle_prefetcher.cancel("s2")
+    assert idle_prefetcher.status("A project") is None
+    assert not idle_prefetcher._waiting
+
+
+def test_idle_sessions_are_forgotten(idle_prefetcher, clock):
+    idle_prefetcher.request("closed-tab", None, "Old project")
+    idle_prefetcher.request("active", None, "A project")
+    clock.advance(40)
+    idle_prefetcher.request("active", None, "A project")  # Still typing: refreshes the session
+    clock.advance(30)
+    idle_prefetcher.request("new", None, "Another project")
+    assert list(idle_prefetcher._sessions) == ["active", "new"]
+    assert idle_prefetcher.status("Old project") is None
+    assert description_key("Old project") not in idle_prefetcher._timers
+    assert idle_prefetcher.status("A project") == SCHEDULED
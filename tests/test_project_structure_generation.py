@@ -0,0 +1,26 @@
+# tests/test_project_structure_generation.py
+
+import io
+import zipfile
+
+import pytest
+
+from functions.project_structure_generation import generate_project_structure, iter_project_structure_chunks
+
+ASSIGNMENTS = "Alice: Build the API\nExpected outcome: A working API\nBob: Build the UI"
+
+
+def test_chunks_form_the_same_archive():
+    chunks = list(iter_project_structure_chunks(ASSIGNMENTS, chunk_size=64))
+    assert len(chunks) > 1
+    streamed = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    built = zipfile.ZipFile(io.BytesIO(generate_project_structure(ASSIGNMENTS)))
+    assert streamed.namelist() == built.namelist()
+    assert all(streamed.read(name) == built.read(name) for name in built.namelist())
+
+
+@pytest.mark.parametrize("build", [generate_project_structure, iter_project_structure_chunks])
+def test_no_tasks_is_rejected_before_any_output(build):
+    # The streaming variant raises on the call, not on the first chunk
+    with pytest.raises(ValueError, match="No tasks found"):
+        build("No assignments here")
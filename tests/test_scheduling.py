@@ -0,0 +1,94 @@
+# tests/test_scheduling.py
+
+import threading
+import time
+
+import pytest
+
+from functions.scheduling import BATCH, INTERACTIVE, PriorityScheduler, RateLimiter, TokenBucket
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(per_minute=60)
+    start = bucket._updated
+    bucket.take(60)
+    assert bucket.delay(1, start) == pytest.approx(1.0)
+    assert bucket.delay(1, start + 0.5) == pytest.approx(0.5)
+    assert bucket.delay(1, start + 1) == 0.0
+    assert bucket.delay(10, start + 5) == pytest.approx(5.0)
+
+
+def test_token_bucket_never_exceeds_capacity():
+    bucket = TokenBucket(per_minute=60, capacity=10)
+    start = bucket._updated
+    bucket.delay(0, start + 3600)
+    assert bucket.tokens == 10
+    # Requests larger than the bucket wait for a full one instead of forever
+    assert bucket.delay(50, start + 3600) == 0.0
+
+
+def test_rate_limiter_reserves_requests_and_tokens():
+    limiter = RateLimiter(rpm=2, tpm=1000)
+    assert limiter.reserve(400) == 0.0
+    assert limiter.reserve(400) == 0.0
+    assert limiter.reserve(100) > 0
+    # A refused reservation charges nothing
+    assert limiter.tokens.tokens == pytest.approx(200, abs=1)
+
+
+def test_rate_limiter_settles_actual_usage():
+    limiter = RateLimiter(rpm=None, tpm=1000)
+    assert limiter.reserve(600) == 0.0
+    limiter.settle(-500)  # Used 100 tokens instead of 600
+    assert limiter.reserve(900) == 0.0
+    limiter.settle(300)  # Used 1200 tokens instead of 900
+    assert limiter.tokens.tokens < 0
+    assert limiter.reserve(1) > 0
+
+
+def test_rate_limiter_drain_empties_the_buckets():
+    limiter = RateLimiter(rpm=10, tpm=1000)
+    limiter.drain()
+    assert limiter.reserve(1) > 0
+
+
+def test_scheduler_serves_higher_priority_first():
+    scheduler = PriorityScheduler(RateLimiter(rpm=None, tpm=None), max_concurrency=1, min_concurrency=1)
+    scheduler.acquire(INTERACTIVE, 1)
+    order = []
+
+    def call(priority, name):
+        scheduler.acquire(priority, 1)
+        order.append(name)
+        scheduler.release(0.0)
+
+    threads = [threading.Thread(target=call, args=(BATCH, "batch"))]
+    threads[0].start()
+    while scheduler.stats()["queue_depth"] < 1:
+        time.sleep(0.001)
+    threads.append(threading.Thread(target=call, args=(INTERACTIVE, "interactive")))
+    threads[1].start()
+    while scheduler.stats()["queue_depth"] < 2:
+        time.sleep(0.001)
+
+    scheduler.release(0.0)
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ["interactive", "batch"]
+    assert scheduler.stats()["running"] == 0
+
+
+def test_scheduler_adapts_the_concurrency_limit():
+    scheduler = PriorityScheduler(RateLimiter(rpm=None, tpm=None), max_concurrency=8, min_concurrency=1,
+                                  latency_target=1.0)
+    scheduler.acquire(INTERACTIVE, 1)
+    scheduler.release(0.1, rate_limited=True)
+    assert scheduler.limit == 4
+    scheduler.acquire(INTERACTIVE, 1)
+    scheduler.release(5.0)
+    assert scheduler.limit == 3
+    for _ in range(3):
+        scheduler.acquire(INTERACTIVE, 1)
+        scheduler.release(0.1)
+    assert scheduler.limit == 4
+    assert scheduler.stats()["rate_limited_total"] == 1
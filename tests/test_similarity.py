@@ -0,0 +1,93 @@
+# tests/test_similarity.py
+
+import pytest
+
+from functions.similarity import SimilarityIndex, reusable_results
+
+DESCRIPTION = (
+    "A web platform for students to plan coursework, share lecture notes and track assignment deadlines "
+    "together with their study group, with reminders by email and a shared calendar view."
+)
+TEAM = [{"name": "Alice", "expertise": "Python backend"}, {"name": "Bob", "expertise": "React frontend"}]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SimilarityIndex(str(tmp_path / "similarity.sqlite3"))
+    yield index
+    index.close()
+
+
+def test_identical_signatures_match_exactly(index):
+    signature = index.signature(DESCRIPTION)
+    assert index.estimate_similarity(signature, index.signature(DESCRIPTION)) == 1.0
+    assert index.estimate_similarity(signature, index.signature("An unrelated embedded firmware project")) < 0.2
+
+
+def test_near_duplicate_is_found(index):
+    index.add(DESCRIPTION, TEAM, {"workflow": "1. Plan"})
+    match = index.find(DESCRIPTION.replace("email", "e-mail"), list(reversed(TEAM)), threshold=0.7)
+    assert match is not None
+    assert match.description_similarity >= 0.7
+    assert match.roster_similarity == 1.0 and match.same_roster
+    assert match.results == {"workflow": "1. Plan"}
+    assert len(index) == 1
+
+
+def test_unrelated_description_is_not_found(index):
+    index.add(DESCRIPTION, TEAM, {"workflow": "1. Plan"})
+    assert index.find("Firmware for a battery-powered soil moisture sensor with LoRa uplink.", TEAM) is None
+
+
+def test_assignment_is_only_reused_for_the_same_roster(index):
+    from functions.pipeline import ASSIGNMENT, WORKFLOW
+
+    results = {ASSIGNMENT: "Alice: API", WORKFLOW: "1. Plan"}
+    index.add(DESCRIPTION, TEAM, results)
+    assert ASSIGNMENT in reusable_results(index.find(DESCRIPTION, list(reversed(TEAM))))
+    renamed = [{"name": "Alicia", "expertise": "Python backend"}, TEAM[1]]
+    assert ASSIGNMENT not in reusable_results(index.find(DESCRIPTION, renamed))
+    assert ASSIGNMENT not in reusable_results(index.find(DESCRIPTION, TEAM[:1]))
+    assert WORKFLOW in reusable_results(index.find(DESCRIPTION, renamed))
+
+
+def test_same_roster_is_preferred_among_equal_descriptions(index):
+    other_team = [{"name": "Carol", "expertise": "Embedded C"}]
+    index.add(DESCRIPTION, other_team, {"assignment": "Carol: Firmware"})
+    index.add(DESCRIPTION, TEAM, {"assignment": "Alice: API"})
+    index.add(DESCRIPTION, other_team, {"assignment": "Carol: Sensors"})
+    assert index.find(DESCRIPTION, TEAM).results == {"assignment": "Alice: API"}
+    assert index.find(DESCRIPTION, other_team).results == {"assignment": "Carol: Sensors"}
+
+
+def test_adding_the_same_inputs_again_replaces_the_entry(index):
+    first = index.add(DESCRIPTION, TEAM, {"workflow": "1. Plan"})
+    assert index.add(DESCRIPTION, list(reversed(TEAM)), {"workflow": "1. Plan again"}) == first
+    assert len(index) == 1
+    assert index.find(DESCRIPTION, TEAM).results == {"workflow": "1. Plan again"}
+    with index._lock:
+        assert index._conn.execute("SELECT COUNT(*) FROM buckets").fetchone()[0] == index.bands
+
+
+def test_entries_of_an_older_index_are_migrated(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "old.sqlite3")
+    index = SimilarityIndex(path)
+    signature = index.signature(DESCRIPTION).tobytes()
+    with index._conn as conn:
+        conn.execute("DROP TABLE entries")
+        conn.execute("CREATE TABLE entries (id INTEGER PRIMARY KEY AUTOINCREMENT, description_signature BLOB NOT NULL, "
+                     "roster_signature BLOB NOT NULL, results TEXT NOT NULL, created_at REAL NOT NULL)")
+        entry_id = conn.execute("INSERT INTO entries (description_signature, roster_signature, results, created_at) "
+                                "VALUES (?, ?, '{\"assignment\": \"Alice: API\"}', 0)", (signature, signature)).lastrowid
+        conn.executemany("INSERT INTO buckets VALUES (?, ?, ?)",
+                         [(band, key, entry_id) for band, key in enumerate(index._band_keys(index.signature(DESCRIPTION)))])
+    index.close()
+
+    index = SimilarityIndex(path)
+    match = index.find(DESCRIPTION, TEAM)
+    assert match is not None and not match.same_roster
+    assert reusable_results(match) == {}
+    index.close()
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 1
@@ -0,0 +1,76 @@
+# tests/test_stage_graph.py
+
+import pytest
+
+from functions import stage_graph
+from functions.artifacts import ArtifactStore
+from functions.pipeline import ASSIGNMENT, NAMING, WORKFLOW
+from functions.stage_graph import (
+    BRIEF,
+    EXTRACTION,
+    FLOWCHART,
+    PARSED_ASSIGNMENTS,
+    SCAFFOLD,
+    TABLE,
+    TEAM,
+    StageMemo,
+    StageNode,
+    content_hash,
+    downstream,
+)
+
+
+@pytest.fixture
+def memo(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"), max_disk_bytes=10 ** 6, memory_bytes=10 ** 6, ttl_seconds=None)
+    yield StageMemo(store)
+    store.close()
+
+
+def test_downstream_follows_the_graph():
+    assert downstream([TEAM]) == {ASSIGNMENT, PARSED_ASSIGNMENTS, FLOWCHART, SCAFFOLD, TABLE}
+    assert downstream([BRIEF]) == {ASSIGNMENT, WORKFLOW, NAMING, PARSED_ASSIGNMENTS, FLOWCHART, SCAFFOLD, TABLE}
+    assert downstream([NAMING]) == set()
+
+
+def test_content_hash_is_stable_for_equal_values():
+    assert content_hash("text") == content_hash(b"text")
+    assert content_hash({"a": 1, "b": 2}) == content_hash({"b": 2, "a": 1})
+
+
+def test_key_needs_all_inputs(memo):
+    assert memo.key(ASSIGNMENT, {BRIEF: content_hash("brief")}) is None
+    assert memo.key(ASSIGNMENT, {BRIEF: content_hash("brief"), TEAM: content_hash("team")}) is not None
+
+
+def test_changed_input_only_invalidates_dependent_stages(memo):
+    hashes = {EXTRACTION: content_hash("description"), TEAM: content_hash("alice")}
+    hashes[BRIEF] = content_hash("brief")
+    memo.put_text(memo.key(WORKFLOW, hashes), "workflow")
+    memo.put_text(memo.key(ASSIGNMENT, hashes), "assignment")
+
+    edited = dict(hashes, **{TEAM: content_hash("alice, bob")})
+    assert memo.get_text(memo.key(WORKFLOW, edited)) == "workflow"
+    assert memo.get_text(memo.key(ASSIGNMENT, edited)) is None
+
+    # An edit that produces the same brief keeps everything downstream of it
+    rephrased = dict(hashes, **{EXTRACTION: content_hash("description, reworded")})
+    assert memo.get_text(memo.key(ASSIGNMENT, rephrased)) == "assignment"
+
+
+def test_model_and_version_are_part_of_llm_keys(memo, monkeypatch):
+    hashes = {BRIEF: content_hash("brief")}
+    key = memo.key(WORKFLOW, hashes)
+    monkeypatch.setattr(stage_graph, "MODEL_NAME", "other-model")
+    assert memo.key(WORKFLOW, hashes) != key
+    monkeypatch.undo()
+    monkeypatch.setitem(stage_graph.STAGE_GRAPH, WORKFLOW, StageNode(WORKFLOW, (BRIEF,), llm=True, version=2))
+    assert memo.key(WORKFLOW, hashes) != key
+
+
+def test_evicted_output_is_a_miss(memo):
+    key = memo.key(FLOWCHART, {PARSED_ASSIGNMENTS: content_hash([])})
+    artifact_id = memo.put_artifact(key, b"png")
+    assert memo.get_artifact(key) == artifact_id
+    memo.store._delete(memo.store._conn, artifact_id)
+    assert memo.get_artifact(key) is None
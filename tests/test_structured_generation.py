@@ -0,0 +1,79 @@
+# tests/test_structured_generation.py
+
+import json
+
+import pytest
+
+from functions import pipeline
+from functions.assignment_parser import parse_assignments
+from functions.errors import CircuitOpenError, LLMRateLimitError, LLMRequestError
+from functions.pipeline import ASSIGNMENT, NAMING, WORKFLOW, run_llm_stages
+from functions.structured_generation import StructuredOutputError, parse_structured_setup
+
+TEAM = [{"name": "Alice", "expertise": "Python backend"}, {"name": "Bob", "expertise": "React frontend"}]
+RESPONSE = {
+    "summary": "A study planner for students: shared notes and deadlines.",
+    "assignments": [
+        {"member": "alice", "task": "Build the API", "outcome": "A documented API"},
+        {"member": "Mallory", "task": "Not on the team", "outcome": ""},
+        {"member": "Bob", "task": "Build the UI", "outcome": "A responsive UI"},
+    ],
+    "workflow": [{"step": "Plan", "outcome": "A backlog"}, {"step": "Build", "outcome": ""}],
+    "names": ["Atlas", " ", "Beacon"],
+}
+
+
+def test_response_is_validated_against_the_roster():
+    setup = parse_structured_setup(json.dumps(RESPONSE), TEAM)
+    assert [(item.member, item.task) for item in setup.assignments] == [("Alice", "Build the API"), ("Bob", "Build the UI")]
+    assert setup.names == ("Atlas", "Beacon")
+    assert setup.summary == RESPONSE["summary"]
+
+
+def test_assignment_text_includes_the_summary_and_parses_back():
+    setup = parse_structured_setup(json.dumps(RESPONSE), TEAM)
+    text = setup.assignment_text()
+    assert text.endswith("Project Summary\n" + RESPONSE["summary"])
+    # The summary contains a colon, but is not taken for a member
+    assert parse_assignments(text) == setup.assignments
+
+
+@pytest.mark.parametrize("change", [
+    {"summary": None}, {"assignments": []}, {"names": ["  "]},
+    {"assignments": [{"member": "Mallory", "task": "x", "outcome": ""}]},
+])
+def test_malformed_responses_are_rejected(change):
+    response = {key: value for key, value in dict(RESPONSE, **change).items() if value is not None}
+    with pytest.raises(StructuredOutputError):
+        parse_structured_setup(json.dumps(response), TEAM)
+
+
+@pytest.fixture
+def per_stage_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(pipeline, "get_workload_distribution", lambda *args: calls.append(ASSIGNMENT) or "Alice: API")
+    monkeypatch.setattr(pipeline, "get_project_workflow", lambda *args: calls.append(WORKFLOW) or "1. Plan")
+    monkeypatch.setattr(pipeline, "suggest_project_names", lambda *args: calls.append(NAMING) or "Atlas")
+    return calls
+
+
+@pytest.mark.parametrize("error", [StructuredOutputError("not JSON"), LLMRequestError("bad request", 400)])
+def test_falls_back_to_per_stage_calls(monkeypatch, per_stage_calls, error):
+    def structured(*args):
+        raise error
+
+    monkeypatch.setattr(pipeline, "generate_structured_setup", structured)
+    results = {event.stage: event.text for event in run_llm_stages(None, "A project", TEAM, structured=True)}
+    assert results == {ASSIGNMENT: "Alice: API", WORKFLOW: "1. Plan", NAMING: "Atlas"}
+    assert sorted(per_stage_calls) == sorted([ASSIGNMENT, WORKFLOW, NAMING])
+
+
+@pytest.mark.parametrize("error", [CircuitOpenError("open"), LLMRateLimitError("slow down")])
+def test_provider_unavailability_is_raised(monkeypatch, per_stage_calls, error):
+    def structured(*args):
+        raise error
+
+    monkeypatch.setattr(pipeline, "generate_structured_setup", structured)
+    with pytest.raises(type(error)):
+        list(run_llm_stages(None, "A project", TEAM, structured=True))
+    assert per_stage_calls == []